@@ -12,10 +12,11 @@ import dash_html_components as html
 from dash.dependencies import Input, Output
 import numpy as np
 import pandas as pd
-import folium
 import json
 import pathlib
-from map_pac import map_pac
+from functools import lru_cache
+from fec.map_pac import map_pac
+from fec.datasets import available_cycles, load_data, read_map_data
 
 ######
 # DATA
@@ -28,21 +29,57 @@ from map_pac import map_pac
 # Load the pickled data.
 # zips = pickle.load(open(DATA_PATH.joinpath('zips'), 'rb'))
 
-df_committee = pd.read_pickle('data/df_committee')
-df_individuals = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_individuals')
-df_cc = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_cc')
-zip_points = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zip_points')
-zip_bounds = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zip_bounds')
-state_abbreviations = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/state_abbreviations')
-sf_states = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/sf_states')
+# The finalized dataframes are saved in one folder per election cycle by process_data.py (see datasets.py). The map data is the same for every cycle.
 
-# df_expenditures = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_expenditures')
-# df_candidate = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_candidate')
-# zips = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zips')
+DATA_PATH = 'C:/Users/Gabriel/Desktop/FEC/cleaned_data/'
 
-# Create a dictionary list of choices to use in the dropdown menu.
+# map_data() loads the zip code and state shapes from mapping.py the first time a map is drawn, so the app starts without reading them.
 
-pac_choices = list(df_individuals.drop_duplicates(subset='recipient').sort_values(by='recipient').apply(lambda x: {'label': x['recipient'], 'value': x['recipient']}, axis='columns'))
+@lru_cache(maxsize=1)
+def map_data():
+
+    return tuple(read_map_data(DATA_PATH, name) for name in ['zip_bounds', 'zip_points', 'sf_states', 'state_abbreviations'])
+
+# df_expenditures = load_data(DATA_PATH, 'df_expenditures', [2020])
+# df_candidate = load_data(DATA_PATH, 'df_candidate', [2020])
+# zips = read_map_data(DATA_PATH, 'zips')
+
+# The cycles to choose from, newest first.
+
+cycles = available_cycles(DATA_PATH, 'df_individuals')[::-1]
+
+cycle_choices = [{'label': str(cycle - 1) + '-' + str(cycle), 'value': cycle} for cycle in cycles]
+
+# The columns map_pac() uses. Nothing else is read.
+
+individual_columns = ['beneficiary', 'conduit_copy', 'first_last', 'city', 'state', 'zip', 'amount', 'date']
+cc_columns = ['sender', 'recipient', 'city', 'state', 'zip', 'amount', 'date', 'image']
+
+# pac_choices() returns a dictionary list of the PACs of one cycle to use in the dropdown menu. Only the column of PAC names is read.
+
+@lru_cache(maxsize=4)
+def pac_choices(cycle):
+
+    pacs = load_data(DATA_PATH, 'df_individuals', [cycle], columns=['beneficiary']).beneficiary
+
+    return [{'label': pac, 'value': pac} for pac in sorted(pacs.dropna().unique())]
+
+# pac_data() loads the contributions to one PAC and the transfers it sent in one cycle.
+# The saved dataframes are sorted by these columns (see datasets.py), so only the few row groups with the PAC's rows are read, and only the columns above.
+# The most recently selected PACs are kept in memory.
+
+@lru_cache(maxsize=8)
+def pac_data(pac, cycle):
+
+    df_individuals = load_data(DATA_PATH, 'df_individuals', [cycle], columns=individual_columns, filters=[('beneficiary', '==', pac)])
+
+    # Show contributions made through conduits (e.g., ActBlue) for the committees they were earmarked for, and leave out the conduits' copies of contributions those committees also reported (see earmarks.py).
+
+    df_individuals = df_individuals[~df_individuals.conduit_copy].drop(columns='conduit_copy').rename(columns={'beneficiary': 'recipient'})
+
+    df_cc = load_data(DATA_PATH, 'df_cc', [cycle], columns=cc_columns, filters=[('sender', '==', pac)])
+
+    return df_individuals, df_cc
 
 markdown_text = '''
 ### Dash and Markdown!!
@@ -107,9 +144,17 @@ app.layout = html.Div(
             id='header',
             children=[
                 html.Hr(),
+                dcc.Dropdown(
+                    id='cycle-input-box',
+                    options=cycle_choices,
+                    multi=False,
+                    searchable=False,
+                    clearable=False,
+                    value=cycles[0] if cycles else None
+                ),
                 dcc.Dropdown(
                     id='pac-input-box',
-                    options=pac_choices,
+                    options=[],
                     multi=False,
                     searchable=False,
                     value='Hallmark Cards Pac'
@@ -198,14 +243,47 @@ app.layout = html.Div(
     [Input(component_id='pac-input-box', component_property='value')]
 )
 def update_output_div(input_value):
+
+    if input_value is None:
+
+        return html.H1(children='')
     
     return html.H1(children=input_value.upper())
 
+# Fill the PAC dropdown with the PACs of the selected cycle. There are none to choose from until process_data.py has saved a cycle.
+
+@app.callback(
+    Output(component_id='pac-input-box', component_property='options'),
+    [Input(component_id='cycle-input-box', component_property='value')]
+)
+def update_pac_choices(cycle):
+
+    if cycle is None:
+
+        return []
+
+    return pac_choices(cycle)
+
+# Map the selected PAC, or say what is missing when no cycle or PAC is selected yet.
+
 @app.callback(
     Output(component_id='pac-map', component_property='children'),
-    [Input(component_id='pac-input-box', component_property='value')]
+    [Input(component_id='pac-input-box', component_property='value'),
+     Input(component_id='cycle-input-box', component_property='value')]
 )
-def update_map(input_value):
+def update_map(input_value, cycle):
+
+    if cycle is None:
+
+        return html.P(children='No cleaned data found in ' + DATA_PATH + '. Run process_data.py first.')
+
+    if input_value is None:
+
+        return html.P(children='Choose a PAC to map.')
+    
+    df_individuals, df_cc = pac_data(input_value, cycle)
+
+    zip_bounds, zip_points, sf_states, state_abbreviations = map_data()
     
     return html.Iframe(
         srcDoc=map_pac(input_value, df_individuals, zip_bounds, zip_points, sf_states, state_abbreviations, df_cc), 
@@ -0,0 +1,31 @@
+# The library behind process_data.py, incremental.py, and app.py: reading, cleaning, and resolving the FEC bulk data, the pipeline stages, and the maps.
+# Importing the package (or one of its functions, e.g., from fec import clean_names) runs nothing. Each function is imported from its module the first time it is used,
+# and modules import heavy dependencies (fuzzywuzzy, scipy, folium) inside the functions that need them, so only the stages that use them pay for loading them.
+
+import importlib
+
+# The module each function of the package is in.
+# Functions named like their module (read_fec() and map_pac()) aren't listed: once the module is imported, fec.read_fec is the module itself. Import them from their module instead (from fec.read_fec import read_fec).
+
+EXPORTS = {'archive_path': 'read_fec',
+           'clean_names': 'clean_data', 'normalize_text': 'clean_data', 'parse_dates': 'clean_data', 'split_zips': 'clean_data', 'remove_invalid': 'clean_data',
+           'compact': 'schema', 'concat': 'schema',
+           'load_data': 'datasets', 'save_data': 'datasets', 'available_cycles': 'datasets',
+           'parallel_apply': 'parallel', 'parallel_map': 'parallel', 'worker_pool': 'parallel',
+           'run_stages': 'scheduler',
+           'label_parties': 'party_rules',
+           'assign_donors': 'donors', 'canonicalize': 'canonical', 'trace_earmarks': 'earmarks',
+           'cycle_stages': 'pipeline', 'pipeline_stages': 'pipeline'}
+
+__all__ = list(EXPORTS)
+
+# __getattr__()
+# This function takes in the name of a function in EXPORTS and returns it from its module, which is only imported then.
+
+def __getattr__(name):
+
+    if name not in EXPORTS:
+
+        raise AttributeError('module ' + repr(__name__) + ' has no attribute ' + repr(name))
+
+    return getattr(importlib.import_module('.' + EXPORTS[name], __name__), name)
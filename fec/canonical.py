@@ -0,0 +1,137 @@
+# This module gives the employers and occupations of individual contributions one canonical spelling each, so "Self-Employed", "Self Employed", and "Self" are counted together.
+# Values are first compared by a key without punctuation, case, or (for employers) words like "Inc" and "LLC". Keys in the alias table (data/aliases.json) get the canonical name listed there.
+# Any other key that is rare in the data is matched against the common keys with the n-gram index in fuzzy_index.py, so each rare key is only scored against the few common keys that share the most pieces with it, and it joins the closest one if they are close enough.
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'aliases.json')
+
+# The columns that are canonicalized, and the column each one's canonical value is stored in.
+
+COLUMNS = {'employer': 'employer_canonical', 'occupation': 'occupation_canonical'}
+
+# Words left out of employer keys, since "Acme", "Acme Inc", and "The Acme Company" are the same employer.
+
+LEGAL = ['THE', 'INC', 'INCORPORATED', 'LLC', 'L L C', 'LLP', 'LP', 'CORP', 'CORPORATION', 'CO', 'COMPANY', 'LTD', 'PC', 'PLLC', 'PA']
+
+# Keys seen in at least COMMON_ROWS rows are kept as they are. Rarer keys join the closest common key if it scores at least MATCH_SCORE (out of 100).
+
+COMMON_ROWS = 5
+
+MATCH_SCORE = 90
+
+# load_aliases()
+# This function takes in the path to an alias table and returns a dictionary for each column that maps keys (see value_keys()) to their canonical names.
+
+def load_aliases(path=ALIASES_PATH):
+
+    with open(path) as f:
+
+        table = json.load(f)
+
+    return {column: {key: name for name, aliases in groups.items() for key in value_keys(pd.Series(aliases + [name]), column)}
+            for column, groups in table.items()}
+
+# value_keys()
+# This function takes in a column of distinct employers or occupations and the name of the column. It returns the key each one is compared by: upper case, "&" spelled out, only letters, digits, and single spaces, and without the words in LEGAL for employers.
+
+def value_keys(values, column):
+
+    keys = values.astype('str').str.upper().str.replace('&', ' AND ', regex=False).str.replace(r'[^A-Z0-9]+', ' ', regex=True).str.strip()
+
+    if column == 'employer':
+
+        stripped = keys.str.replace(r'\b(' + '|'.join(LEGAL) + r')\b', ' ', regex=True).str.replace(r'\s+', ' ', regex=True).str.strip()
+
+        # Keep the whole key if it is nothing but legal words (e.g., "The Company").
+
+        keys = stripped.where(stripped != '', keys)
+
+    return keys
+
+# canonical_values()
+# This function takes in a column of employers or occupations, the name of the column, the alias table for that column from load_aliases(), and a folder for caching fuzzy matches (or None). It returns the canonical value of each row as a categorical, missing where the value is.
+# Values without an alias are named by their most common spelling among the values that share their canonical key.
+# others is the same column for rows that aren't canonicalized here but still count toward the common keys and spellings (e.g., the rows incremental.py keeps as they are).
+
+def canonical_values(values, column, aliases, cache=None, others=None):
+
+    codes, uniques = pd.factorize(values)
+
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    uniques = pd.Series(np.asarray(uniques, dtype='object'), dtype='object')
+
+    # Add the other rows' counts, and their values that don't appear here after this column's own, so the row codes stay valid.
+
+    if others is not None:
+
+        other_counts = others.value_counts()
+
+        other_counts = pd.Series(other_counts.values, index=np.asarray(other_counts.index, dtype='object'))[other_counts.values > 0]
+
+        counts = counts + other_counts.reindex(uniques.values).fillna(0).values.astype(counts.dtype)
+
+        extra = other_counts[~other_counts.index.isin(uniques.values)]
+
+        uniques = pd.concat([uniques, pd.Series(extra.index, dtype='object')], ignore_index=True)
+
+        counts = np.append(counts, extra.values.astype(counts.dtype))
+
+    keys = value_keys(uniques, column)
+
+    # Count the rows of each key to find the common ones. Blank keys and aliased keys are never matched.
+
+    key_rows = pd.Series(counts).groupby(keys.values).sum()
+
+    aliased = key_rows.index.isin(list(aliases)) | (key_rows.index == '')
+
+    common = pd.Series(np.sort(key_rows.index[~aliased & (key_rows.values >= COMMON_ROWS)]), dtype='object')
+
+    rare = pd.Series(key_rows.index[~aliased & (key_rows.values < COMMON_ROWS)], dtype='object')
+
+    # Rare keys take the key of their match, if it is close enough. extract_cached() searches each distinct key once and reuses matches from earlier runs.
+
+    canonical = pd.Series(key_rows.index, index=key_rows.index, dtype='object')
+
+    if not common.empty and not rare.empty:
+
+        from .fuzzy_index import extract_cached
+
+        matches = extract_cached(rare, common, cache, column + '_matches')
+
+        matched = (matches.score >= MATCH_SCORE).values
+
+        canonical[rare.values[matched]] = matches.match.values[matched]
+
+    final = canonical.reindex(keys.values).values
+
+    # Name each canonical key by its alias, or else by its most common spelling.
+
+    spellings = pd.DataFrame({'final': final, 'value': uniques.values, 'rows': counts}).sort_values('rows', ascending=False, kind='stable')
+
+    names = spellings.drop_duplicates(subset='final').set_index('final').value
+
+    names = pd.Series(names.index.map(aliases), index=names.index, dtype='object').fillna(names)
+
+    names = names[names.index != '']
+
+    name_codes, categories = pd.factorize(names.reindex(final).values)
+
+    # Missing values (code -1) and blank keys (name code -1) stay missing.
+
+    codes = np.where(codes >= 0, np.append(name_codes, -1)[codes], -1)
+
+    return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype='object')), index=values.index)
+
+# canonicalize()
+# This function takes in a dataframe of individual contributions, the path to an alias table, a folder for caching fuzzy matches, and optionally other contributions that count toward the common values without being canonicalized (see canonical_values()). It returns the dataframe with the canonical employer and occupation of every row (see COLUMNS).
+
+def canonicalize(df, aliases_path=ALIASES_PATH, cache=None, others=None):
+
+    aliases = load_aliases(aliases_path)
+
+    return df.assign(**{canonical: canonical_values(df[column], column, aliases.get(column, {}), cache, None if others is None else others[column]) for column, canonical in COLUMNS.items()})
@@ -0,0 +1,251 @@
+# This module saves the result of each pipeline stage to disk so that a rerun can skip every stage whose inputs haven't changed (see run_stages() in scheduler.py).
+# A stage's checkpoint is keyed by a hash of its input files, its parameters, the code it runs (with the module constants that code uses), and the keys of the stages it depends on, so changing any of these reruns the stage and everything downstream of it.
+
+import os
+import glob
+import json
+import types
+import hashlib
+import inspect
+import importlib
+from functools import partial
+import numpy as np
+import pandas as pd
+
+# Folder with this code. Only functions defined in modules here count as the code of a stage.
+
+CODE_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# Keyword arguments and module constants that change how a stage runs but not its result, so they are left out of its key (e.g., the number of workers, which differs between machines).
+
+IGNORED = ['workers', 'WORKERS', 'POOL', 'STAGE_LIMIT', 'CHUNKS_PER_WORKER', 'MIN_ROWS', 'PARALLEL_ROWS', 'CHUNKSIZE', 'ROWS_READ']
+
+# Name of the file (in the checkpoint folder) that remembers file hashes by size and modification time.
+
+FILE_HASHES = 'file_hashes.json'
+
+# file_hash()
+# This function takes in the path to an input file and a checkpoint folder. It returns a hash of the file's contents.
+# Hashing a bulk file takes a few seconds, so hashes are saved in the checkpoint folder and reused while the file's size and modification time stay the same.
+
+def file_hash(path, directory):
+
+    stats = os.stat(path)
+
+    saved_path = os.path.join(directory, FILE_HASHES)
+
+    saved = {}
+
+    if os.path.exists(saved_path):
+
+        with open(saved_path) as f:
+
+            saved = json.load(f)
+
+    key = os.path.abspath(path)
+
+    if key in saved and saved[key]['size'] == stats.st_size and saved[key]['mtime'] == stats.st_mtime:
+
+        return saved[key]['hash']
+
+    digest = hashlib.sha1()
+
+    with open(path, 'rb') as f:
+
+        for block in iter(lambda: f.read(1 << 20), b''):
+
+            digest.update(block)
+
+    saved[key] = {'size': stats.st_size, 'mtime': stats.st_mtime, 'hash': digest.hexdigest()}
+
+    os.makedirs(directory, exist_ok=True)
+
+    with open(saved_path, 'w') as f:
+
+        json.dump(saved, f, indent=1)
+
+    return saved[key]['hash']
+
+# value_sources()
+# This function takes in the value of a module constant used by a stage (e.g., SCHEMAS in read_fec.py or the code mappings in pipeline.py) and the functions already seen by code_sources(). It returns the value as a list of text.
+# Functions in it (e.g., the lambdas in a dictionary of text transforms) are replaced by their source code, and sets are sorted, so the text is the same on every run. Modules, classes, and anything without a stable text version (one that shows a memory address) are left out.
+
+def value_sources(value, seen):
+
+    if isinstance(value, (types.FunctionType, partial)):
+
+        return code_sources(value, seen)
+
+    if isinstance(value, (types.ModuleType, type)) or callable(value):
+
+        return []
+
+    # Containers are marked where they start and end, so moving an item between them changes the text.
+
+    if isinstance(value, dict):
+
+        return ['{'] + [part for key, item in value.items() for part in [repr(key) + ':'] + value_sources(item, seen)] + ['}']
+
+    if isinstance(value, (list, tuple)):
+
+        return ['['] + [part for item in value for part in value_sources(item, seen)] + [']']
+
+    if isinstance(value, (set, frozenset)):
+
+        return ['{'] + sorted(map(repr, value)) + ['}']
+
+    # Large arrays are shortened when printed, so hash every element instead.
+
+    if isinstance(value, np.ndarray):
+
+        return [repr(value.dtype) + repr(value.shape) + hashlib.sha1(value.tobytes()).hexdigest()]
+
+    text = repr(value)
+
+    return [] if ' at 0x' in text else [text]
+
+# code_sources()
+# This function takes in a function and returns the source code of it and of every function in this folder that it uses, directly or through other functions, by name, along with the values of the module constants they use.
+# This way, changing a helper such as clean_names() or a constant such as donors.NICKNAMES changes the key of every stage that uses it.
+
+def code_sources(func, seen=None):
+
+    seen = set() if seen is None else seen
+
+    if isinstance(func, partial):
+
+        return code_sources(func.func, seen)
+
+    if not isinstance(func, types.FunctionType) or func in seen:
+
+        return []
+
+    try:
+
+        if not os.path.abspath(inspect.getsourcefile(func)).startswith(CODE_PATH):
+
+            return []
+
+        sources = [inspect.getsource(func)]
+
+    except (OSError, TypeError):
+
+        return []
+
+    seen.add(func)
+
+    # Collect the global names used by the function and by any functions or lambdas defined inside it.
+
+    names = set()
+
+    code_objects = [func.__code__]
+
+    while code_objects:
+
+        code = code_objects.pop()
+
+        names.update(code.co_names)
+
+        code_objects.extend(const for const in code.co_consts if isinstance(const, types.CodeType))
+
+    # Modules of this folder that the function imports inside its body (to keep heavy dependencies out of startup) are searched for the rest of the names.
+
+    package = func.__globals__.get('__package__')
+
+    imported = [importlib.import_module('.' + name, package) for name in sorted(names) if package and os.path.exists(os.path.join(CODE_PATH, name + '.py'))]
+
+    # Default argument values (e.g., tolerance=TOLERANCE) are fixed when the function is defined, so they aren't among its names.
+
+    defaults = list(func.__defaults__ or ()) + list((func.__kwdefaults__ or {}).values())
+
+    sources.extend(part for value in defaults if value is not None for part in value_sources(value, seen))
+
+    for name in sorted(names):
+
+        if name in IGNORED:
+
+            continue
+
+        value = func.__globals__.get(name, next((getattr(module, name) for module in imported if hasattr(module, name)), None))
+
+        if isinstance(value, (types.FunctionType, partial)):
+
+            sources.extend(code_sources(value, seen))
+
+        elif value is not None:
+
+            constant = value_sources(value, seen)
+
+            if constant:
+
+                sources.extend([name + ' ='] + constant)
+
+    return sources
+
+# parameters()
+# This function takes in a stage function and returns a text version of the arguments given to it with functools.partial(), without the ones in IGNORED.
+
+def parameters(func):
+
+    if not isinstance(func, partial):
+
+        return ''
+
+    keywords = {key: value for key, value in func.keywords.items() if key not in IGNORED}
+
+    return repr(func.args) + repr(sorted(keywords.items())) + parameters(func.func)
+
+# stage_key()
+# This function takes in a stage function, a list of its input files, the keys of the stages it depends on (in order), and the checkpoint folder. It returns the stage's key.
+
+def stage_key(func, files, upstream, directory):
+
+    digest = hashlib.sha1()
+
+    for part in code_sources(func) + [parameters(func)] + [file_hash(path, directory) for path in files] + list(upstream):
+
+        digest.update(part.encode('utf-8'))
+
+        digest.update(b'\0')
+
+    return digest.hexdigest()[:16]
+
+# checkpoint_path()
+# This function takes in a checkpoint folder, a stage name, and a key. It returns the path of that stage's checkpoint.
+
+def checkpoint_path(directory, name, key):
+
+    return os.path.join(directory, name + '.' + key + '.pkl')
+
+# load_checkpoint()
+# This function takes in the path of a checkpoint and returns the saved result.
+
+def load_checkpoint(path):
+
+    return pd.read_pickle(path)
+
+# run_checkpointed()
+# This function takes in a stage function, the path of its checkpoint, and the stage's inputs. It runs the stage, saves its result, and deletes older checkpoints of the same stage.
+# The result is written to a temporary file first, so an interrupted run never leaves a partial checkpoint behind.
+
+def run_checkpointed(func, path, *args):
+
+    result = func(*args)
+
+    directory = os.path.dirname(path)
+
+    os.makedirs(directory, exist_ok=True)
+
+    pd.to_pickle(result, path + '.tmp')
+
+    os.replace(path + '.tmp', path)
+
+    name = os.path.basename(path).rsplit('.', 2)[0]
+
+    for old in glob.glob(os.path.join(glob.escape(directory), glob.escape(name) + '.' + '?' * 16 + '.pkl')):
+
+        if old != path:
+
+            os.remove(old)
+
+    return result
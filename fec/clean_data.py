@@ -0,0 +1,388 @@
+# This module holds the functions that clean the raw FEC data in process_data.py.
+# They have no side effects on import, so they can be run in worker processes (see parallel.py).
+
+import numpy as np
+import pandas as pd
+
+# Make some variable values more legible with full words.
+# All according to the chart here: https://www.fec.gov/campaign-finance-data/contributions-individuals-file-description/.
+
+amendments = {'N': 'New', 'A': 'Amendment', 'T': 'Termination'}
+elections = {'P': 'Primary', 'G': 'General', 'O': 'Other',
+             'C': 'Convention', 'R': 'Runoff', 'S': 'Special', 'E': 'Recount'}
+entities = {'CAN': 'Candidate', 'CCM': 'Candidate Committee', 'COM': 'Committee', 'IND': 'Individual',
+            'ORG': 'Organization', 'PAC': 'Political Action Committee', 'PTY': 'Party Organization'}
+
+# clean_names()
+# Get first, middle, and last names and assign them to new columns. This function takes in a column of names and returns an expanded version.
+# Donors give many times under the same name, so each distinct name is parsed only once (with string operations on the whole column of distinct names) and the results are copied back to every row.
+
+def clean_names(names):
+    
+    # Remove leading or trailing spaces.
+    
+    names = names.str.strip()
+    
+    # Fix names with a comma and no space after it or ampersand and no spaces.
+    
+    names = names.str.replace(',', ', ', regex=False).str.replace('&', ' & ', regex=False).str.replace('  ', ' ', regex=False)
+    
+    # Get the distinct names and the position of each row's name in that list. Missing names get a code of -1.
+    
+    codes, unique = pd.factorize(names)
+    
+    unique = pd.Series(np.asarray(unique, dtype='object'), dtype='object')
+    
+    # Split the names by space and title-case the full names.
+    
+    split_names = unique.str.split(' ')
+    
+    titled = unique.str.title()
+    
+    # A batch of one-word names has no second words at all, so fill the missing words before using string methods on them, as with the third word below.
+    
+    first_word = split_names.str[0].fillna('').astype('object').str.title()
+    
+    second_word = split_names.str[1].fillna('').astype('object').str.title()
+    
+    # Start with the edge cases that have no commas: the first word is the last name and the second word is the first name.
+    
+    result = pd.DataFrame({'name_full': titled,
+                           'first_last': second_word + ' ' + first_word,
+                           'first': second_word,
+                           'middle': '',
+                           'last': first_word})
+    
+    # Make a specific exception for Dr. Michel Anissa Powell, whose name is listed wrong.
+    
+    has_comma = unique.str.contains(',', regex=False)
+    
+    has_ampersand = unique.str.contains('&', regex=False)
+    
+    michel = ~has_comma & (split_names.str[0] == 'MICHEL')
+    
+    third_word = split_names.str[2].fillna('').str.title()
+    
+    result.loc[michel, 'first_last'] = (first_word + ' ' + third_word)[michel]
+    result.loc[michel, 'first'] = first_word[michel]
+    result.loc[michel, 'middle'] = second_word[michel]
+    result.loc[michel, 'last'] = third_word[michel]
+    
+    # If the name has a comma, everything before it is the last name and the word after it is the first name.
+    
+    commas = unique[has_comma].str.split(',', n=1)
+    
+    last = commas.str[0].str.title()
+    
+    after_comma = commas.str[1].str.split(' ')
+    
+    first = after_comma.str[1].str.title()
+    
+    # If there is an additional name that does not contain a period (e.g., Mrs., Dr., etc.), then save it as the middle. This leaves out some middle initials, but should be good enought to identify most individuals.
+    
+    middle = after_comma.str[2].fillna('').astype('object')
+    
+    middle = middle.where(middle.notna() & ~middle.str.contains('.', regex=False, na=False) & ~middle.str.contains('MR', regex=False, na=False) &
+                          ~middle.isin(['OTHER', 'Other']), '').str.title()
+    
+    result.loc[has_comma, 'name_full'] = first + ' ' + middle + ' ' + last
+    result.loc[has_comma, 'first_last'] = first + ' ' + last
+    result.loc[has_comma, 'first'] = first
+    result.loc[has_comma, 'middle'] = middle
+    result.loc[has_comma, 'last'] = last
+    
+    # If the name has a comma AND an ampersand, it's most likely a couple.
+    
+    couple = has_comma & has_ampersand
+    
+    couple_first = unique[couple].str.split(' ', n=1).str[1].str.title()
+    
+    result.loc[couple, 'name_full'] = couple_first + ' ' + first_word[couple]
+    result.loc[couple, 'first_last'] = couple_first + ' ' + first_word[couple]
+    result.loc[couple, 'first'] = couple_first
+    result.loc[couple, 'middle'] = ''
+    result.loc[couple, 'last'] = first_word[couple]
+    
+    # If the name has an ampersand in it and no comma, it's likely a law firm or business.
+    # If it has LLC or LP in the name, it's also a business.
+    
+    business = (has_ampersand & ~has_comma) | titled.str.contains(' LLC', regex=False) | titled.str.contains(' LP', regex=False)
+    
+    result.loc[business, 'name_full'] = titled[business]
+    result.loc[business, 'first_last'] = titled[business]
+    result.loc[business, ['first', 'middle', 'last']] = ''
+    
+    # If the name is only one word long, use that.
+    
+    single = split_names.str.len() == 1
+    
+    result.loc[single, 'name_full'] = titled[single]
+    result.loc[single, 'first_last'] = titled[single]
+    result.loc[single, 'first'] = titled[single]
+    result.loc[single, ['middle', 'last']] = ''
+    
+    # Clean up formatting a bit.
+    
+    result = result.assign(name_full=result.name_full.str.replace(',', '', regex=False).str.replace(' Ii', '', regex=False),
+                           first_last=result.first_last.str.replace(',', '', regex=False).str.replace(' Ii', '', regex=False),
+                           middle=result.middle.str.replace(',', '', regex=False),
+                           last=result['last'].str.replace(',', '', regex=False).str.replace(' Ii', '', regex=False))
+    
+    # Copy the parsed names back to every row. Missing names stay missing.
+    
+    result = result.reindex(codes)
+    
+    result.index = names.index
+    
+    return result
+
+
+# parse_dates()
+# This function takes in a column of dates in the formats that appear in the FEC data (MMDDYYYY as floats or strings, or MM/DD/YYYY in the expenditure data). It returns a datetime64 column, with NaT for missing or unreadable dates.
+# All rows are converted at once with string operations instead of one row at a time.
+
+def parse_dates(dates):
+
+    # Convert the floats to strings and drop the trailing '.0'. Missing values become 'nan', which matches neither format below.
+
+    dates = dates.astype('str').str.strip().str.replace(r'\.0$', '', regex=True)
+
+    # Pick out the dates written with slashes.
+
+    slashes = dates.str.extract(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+
+    # Pick out the dates written as six to eight digits. The year is always the last four digits.
+
+    digits = dates.where(dates.str.match(r'^\d{6,8}$'))
+
+    length = digits.str.len()
+
+    year = digits.str[-4:]
+
+    month_day = digits.str[:-4]
+
+    # Decide whether the month has one digit or two.
+    # Eight digits always have two digits for the month AND day, and six digits have one digit for each.
+    # Seven digits are ambiguous: the month has one digit if it starts with 2 or 3, the day starts with 3 or 0, or the first two digits cannot be a month.
+
+    one_digit_month = (month_day.str[0].isin(['2', '3']) | (month_day.str[1] == '3') | (month_day.str[2] == '0') |
+                       (pd.to_numeric(month_day.str[:2], errors='coerce') > 12))
+
+    two_digit_month = (length == 8) | ((length == 7) & ~one_digit_month)
+
+    month = month_day.str[:2].where(two_digit_month, month_day.str[:1])
+
+    day = month_day.str[2:].where(two_digit_month, month_day.str[1:])
+
+    # Combine the two formats and convert them all at once.
+
+    year = year.fillna(slashes[2])
+    month = month.fillna(slashes[0])
+    day = day.fillna(slashes[1])
+
+    result = pd.to_datetime(year + month.str.zfill(2) + day.str.zfill(2), format='%Y%m%d', errors='coerce')
+
+    return result
+
+# normalize_text()
+# This function takes in a column of text and either the name of a string method (e.g., 'title' or 'capitalize') or a function that takes and returns a column of text. It returns the transformed column as a categorical.
+# Text columns repeat the same few values many times, so only the distinct values are transformed and each row keeps a code pointing to its value. Values that become the same (e.g., 'BOSTON' and 'Boston') share one category.
+
+def normalize_text(values, transform):
+
+    codes, unique = pd.factorize(values)
+
+    unique = pd.Series(np.asarray(unique, dtype='object'), dtype='object')
+
+    if isinstance(transform, str):
+
+        normalized = getattr(unique.str, transform)()
+
+    else:
+
+        normalized = transform(unique)
+
+    # Merge the values that are the same after the transformation. Missing values (code -1) stay missing.
+
+    new_codes, categories = pd.factorize(normalized)
+
+    codes = np.where(codes >= 0, np.append(new_codes, -1)[codes], -1)
+
+    return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype='object')), index=values.index, name=values.name)
+
+# normalize_columns()
+# This function takes in a dataframe and a dictionary of its text columns and how to transform each one (see normalize_text()). It returns the dataframe with those columns normalized into categoricals.
+
+def normalize_columns(df, transforms):
+
+    return df.assign(**{column: normalize_text(df[column], transform) for column, transform in transforms.items()})
+
+# concat_categorical()
+# This function takes in an iterable of dataframes with the same columns (e.g., chunks of a file cleaned with normalize_columns()). It returns them as one dataframe, keeping each chunk's index.
+# Chunks normalized on their own have different categories, which pd.concat() would turn back into plain text for the whole file. Their categories are combined with union_categoricals() instead, so only one chunk's raw text is in memory at a time.
+
+def concat_categorical(frames):
+
+    frames = list(frames)
+
+    categorical = [column for column in frames[0].columns if isinstance(frames[0][column].dtype, pd.CategoricalDtype)]
+
+    result = pd.concat([frame.drop(columns=categorical) for frame in frames])
+
+    # union_categoricals() can change the type of the categories (e.g., from object to str), so they keep the type the chunks have.
+
+    for column in categorical:
+
+        values = pd.api.types.union_categoricals([frame[column] for frame in frames])
+
+        result[column] = pd.Categorical.from_codes(values.codes, categories=pd.Index(values.categories, dtype=frames[0][column].cat.categories.dtype))
+
+    return result[frames[0].columns]
+
+# split_zips()
+# This function takes in a column of zip codes and splits it into two (a main and extended one) to return a dataframe with both.
+
+def split_zips(zips):
+
+    # Make sure the list is of strings.
+
+    zips = zips.astype('str')
+
+    # Get only the valid numeric zip codes as a series. (I.e., only ones with repeating digits.) This ignores some cases that have invalid zip codes.
+    # .loc[:,0] is used here because str.extract returns a dataframe, not series.
+
+    zips = zips.str.extract(r'(\d+)').loc[:, 0]
+
+    # Make a separate list of just the extended zip codes.
+
+    zips_long = zips.dropna()[zips.dropna().str.len() > 5]
+
+    # Identify the main and secondary zip codes.
+
+    zip1 = zips.str.extract(r'(\d\d\d\d\d)')
+    zip2 = zips_long.str.extract(r'(\d\d\d\d$)')
+
+    # Join the two results together by index, since some do not have a secondary zip.
+
+    result = pd.concat([zip1, zip2], axis=1)
+
+    # Rename them for clarity.
+
+    result.columns = ['zip', 'zip2']
+
+    return result
+
+# remove_invalid()
+# This function takes in a dataframe and returns one without "invalid" transactions (i.e., ones that are negative OR are positive and correspond to a negative one).
+# This works for the df_individuals, df_expenditures, and df_cc dataframes. The committee argument is the column with the committee that reported the transaction (id_recipient for df_cc).
+# Each negative transaction is paired with one positive transaction for the same name, committee, and amount, so a donor can have any number of refunds.
+
+def remove_invalid(df, committee='id_committee'):
+
+    # Key every transaction by name, committee, and absolute amount.
+
+    keys = pd.DataFrame({'name_full': df.name_full, 'committee': df[committee],
+                         'amount': df.amount.abs(), 'negative': df.amount < 0})
+
+    key_columns = ['name_full', 'committee', 'amount']
+
+    # Count the negative transactions with each key.
+
+    refunds = keys.groupby(key_columns, dropna=False, sort=False, observed=True).negative.transform('sum')
+
+    # Number the positive transactions with each key in the order they appear.
+
+    order = keys.groupby(key_columns + ['negative'], dropna=False, sort=False, observed=True).cumcount()
+
+    # Invalid transactions are all the negatives plus, for each key, as many positives as there are negatives.
+
+    invalid = keys.negative | (order < refunds)
+
+    # Remove the invalid transactions.
+
+    result = df[~invalid.values]
+
+    return result
+
+# identify_party()
+# This function takes in a dataframe of unique PAC recipients listed in df_cc, a dataframe of transactions between PACs, and matches the party affiliation for each transaction using the party affiliation of candidates and PACs (in df_candidate and df_committee). It uses fuzzy string matching, so is accurate but not necessarily perfect.
+# The candidate and committee names are indexed once with build_index() so each recipient is only scored against a handful of similar names.
+# If a cache folder is given, matches from earlier runs are reused and only new recipients are matched (see extract_cached()).
+
+def identify_party(df, df_candidate, df_committee, cache=None):
+
+    # Names are only matched here, so the worker processes that clean names don't import fuzzywuzzy.
+
+    from .fuzzy_index import extract_cached
+    
+    recipients = df.recipient
+    
+    # Find a match to every recipient in the candidate list.
+    
+    match_candidate = extract_cached(recipients, df_candidate.committee, cache, 'candidate_committee_matches')
+    
+    # Save the candidate match if it's accurate enough.
+    
+    is_candidate = match_candidate.score >= 95
+    
+    # If the recipient is not likely a candidate, then find a match in the committee list.
+    
+    match_committee = extract_cached(recipients[~is_candidate], df_committee.committee, cache, 'committee_matches')
+    
+    # Get the party information from the candidate or committee dataframe using the location of the match in the full list.
+    
+    candidate_party = pd.Series(df_candidate.party_candidate.reindex(match_candidate.position[is_candidate]).values,
+                                index=match_candidate.index[is_candidate])
+    
+    committee_party = pd.Series(df_committee.party.reindex(match_committee.position).values,
+                                index=match_committee.index)
+    
+    # Save everything with the confidence levels.
+    
+    result = pd.DataFrame({'party': pd.concat([candidate_party, committee_party]),
+                           'recipient': recipients,
+                           'candidate_match': match_candidate.match[is_candidate],
+                           'candidate_confidence': match_candidate.score[is_candidate],
+                           'committee_match': match_committee.match,
+                           'committee_confidence': match_committee.score},
+                          index=recipients.index)
+    
+    # Send back the full result.
+    
+    return result
+
+# Improve look of employer, occupation, memo, and cities of individual contributions.
+
+individual_text = {'city': 'title', 'employer': 'title', 'occupation': 'title', 'memo_text': 'capitalize'}
+
+# clean_individuals()
+# This function takes in one chunk of individual contributions from read_fec() and the report and transaction type mappings (see fec_codes.py). It returns the chunk with categorical text columns, split zip codes, real dates, and full words instead of abbreviations.
+# Each chunk is cleaned on its own, so chunks can be cleaned in worker processes as they are read (see parallel_map()). Put the chunks together with concat_categorical().
+
+def clean_individuals(chunk, report_mapping, transaction_mapping):
+
+    # Normalize the free text columns (see normalize_text()).
+
+    chunk = normalize_columns(chunk, individual_text)
+
+    # Split the zip codes into primary and secondary ones.
+
+    chunk_zips = split_zips(chunk.zip)
+
+    del chunk['zip']
+
+    chunk = pd.concat([chunk, chunk_zips], axis=1)
+
+    # Replace the date column with parse_dates().
+
+    chunk = chunk.assign(date=parse_dates(chunk.date))
+
+    # Map all of the full words.
+
+    chunk['amendment'] = chunk['amendment'].map(amendments)
+    chunk['election'] = chunk['election'].map(elections)
+    chunk['entity'] = chunk['entity'].map(entities)
+    chunk['report'] = chunk['report'].map(report_mapping)
+    chunk['type'] = chunk['type'].map(transaction_mapping)
+
+    return chunk
@@ -0,0 +1,150 @@
+# This module saves and reads the finalized dataframes, which are kept in one folder per election cycle (e.g., cleaned_data/2020/df_individuals.parquet).
+# Only the cycles asked for are read, so working with one cycle doesn't cost the memory or time of loading the others.
+# The dataframes are saved as Parquet files, which store each column separately and keep the smallest and largest value of every column for each group of rows. Reading a few columns only reads those columns, and a filter (e.g., one committee) only reads the row groups that can have matching rows.
+
+import os
+import numpy as np
+import pandas as pd
+from .schema import concat
+
+# The zip code and state tables mapping.py makes for the maps, and the column with the shapes of each one that has shapes. They are the same for every cycle, so they are saved in the top folder.
+
+MAP_TABLES = {'zips': 'geometry', 'zip_points': 'center', 'zip_bounds': None, 'sf_states': 'geometry', 'state_abbreviations': None}
+
+# The columns each dataframe is sorted by before it is saved, so the rows of one committee are next to each other and fall in one or a few row groups.
+# The individual contributions are looked up by the committee they were for (see earmarks.py), and the committee-to-committee transactions by their sender (see map_pac()).
+
+SORT_COLUMNS = {'df_individuals': ['beneficiary', 'recipient'], 'df_cc': ['sender', 'recipient'], 'df_expenditures': ['committee']}
+
+# Rows in each row group. Smaller groups make filtered reads skip more rows, and larger ones compress better and read faster in full.
+
+ROW_GROUP_ROWS = 100000
+
+# partition_path()
+# This function takes in the folder with the finalized dataframes, an election cycle (e.g., 2020), and the name of a dataframe (e.g., 'df_individuals'). It returns the path of that dataframe for that cycle.
+
+def partition_path(directory, cycle, name):
+
+    return os.path.join(directory, str(cycle), name + '.parquet')
+
+# sort_rows()
+# This function takes in a dataframe and a list of its columns. It returns the dataframe sorted by those columns, with missing values last.
+# Categorical columns are sorted by their values rather than the order of their categories, so each row group covers a narrow range of values.
+
+def sort_rows(df, columns):
+
+    keys = []
+
+    for column in columns:
+
+        values = df[column]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+
+            # Rank the categories once and give each row the rank of its category.
+
+            ranks = np.argsort(np.argsort(np.asarray(values.cat.categories, dtype='str'), kind='stable'))
+
+            codes = values.cat.codes.values
+
+            keys.append(np.where(codes >= 0, np.append(ranks, -1)[codes], len(ranks)))
+
+        else:
+
+            codes, uniques = pd.factorize(values, sort=True)
+
+            keys.append(np.where(codes >= 0, codes, len(uniques)))
+
+    if not keys:
+
+        return df.reset_index(drop=True)
+
+    # np.lexsort() sorts by the last key first.
+
+    return df.iloc[np.lexsort(keys[::-1])].reset_index(drop=True)
+
+# save_data()
+# This function takes in a dataframe, the folder for the finalized dataframes, an election cycle, and the name of the dataframe. It saves the dataframe in that cycle's folder, sorted by its SORT_COLUMNS.
+
+def save_data(df, directory, cycle, name):
+
+    path = partition_path(directory, cycle, name)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    df = sort_rows(df, [column for column in SORT_COLUMNS.get(name, []) if column in df])
+
+    # Categorical columns without any values (e.g., a field no committee in a sample build filled in) are given text categories, or they would be read back as plain objects.
+
+    empty = {column: df[column].cat.set_categories(pd.Index([], dtype='str')) for column in df.columns
+             if isinstance(df[column].dtype, pd.CategoricalDtype) and df[column].cat.categories.empty}
+
+    df = df.assign(**empty)
+
+    df.to_parquet(path, index=False, row_group_size=ROW_GROUP_ROWS)
+
+    return path
+
+# read_data()
+# This function takes in the folder with the finalized dataframes, an election cycle, the name of a dataframe, and optionally the columns to read and filters on the rows, as in pd.read_parquet() (e.g., [('recipient', '==', 'Actblue')]). It returns that cycle's dataframe.
+
+def read_data(directory, cycle, name, columns=None, filters=None):
+
+    return pd.read_parquet(partition_path(directory, cycle, name), columns=None if columns is None else list(columns), filters=filters)
+
+# available_cycles()
+# This function takes in the folder with the finalized dataframes and the name of a dataframe. It returns the cycles that have it, from oldest to newest.
+
+def available_cycles(directory, name):
+
+    if not os.path.isdir(directory):
+
+        return []
+
+    cycles = [int(folder) for folder in os.listdir(directory) if folder.isdigit() and os.path.exists(partition_path(directory, folder, name))]
+
+    return sorted(cycles)
+
+# load_data()
+# This function takes in the folder with the finalized dataframes, the name of a dataframe, a list of election cycles, and optionally the columns to keep and filters on the rows (see read_data()). It returns the dataframe for just those cycles, with a cycle column.
+# Only the columns asked for are read from each file, and with a filter only the row groups that can match are read.
+
+def load_data(directory, name, cycles, columns=None, filters=None):
+
+    frames = [read_data(directory, cycle, name, columns, filters).assign(cycle=np.uint16(cycle)) for cycle in cycles]
+
+    return concat(frames)
+
+# save_map_data() and read_map_data()
+# These functions save and read one of the MAP_TABLES in the folder with the finalized dataframes (e.g., cleaned_data/zip_points.parquet).
+# Tables with shapes are saved as GeoParquet, which keeps the shapes and their coordinate system, and are read back as GeoDataFrames. geopandas is only imported for them, so the app and the pipeline don't need it to read the other tables.
+
+def map_path(directory, name):
+
+    return os.path.join(directory, name + '.parquet')
+
+def save_map_data(df, directory, name):
+
+    path = map_path(directory, name)
+
+    os.makedirs(directory, exist_ok=True)
+
+    if MAP_TABLES[name] is not None:
+
+        import geopandas as gpd
+
+        df = gpd.GeoDataFrame(df, geometry=MAP_TABLES[name])
+
+    df.to_parquet(path, index=False)
+
+    return path
+
+def read_map_data(directory, name):
+
+    if MAP_TABLES[name] is not None:
+
+        import geopandas as gpd
+
+        return gpd.read_parquet(map_path(directory, name))
+
+    return pd.read_parquet(map_path(directory, name))
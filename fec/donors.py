@@ -0,0 +1,217 @@
+# This module gives every individual contribution a donor_id, so all of one person's contributions (to any committee) can be found together.
+# Contributions are only compared within a block of the same zip code and last name, so each name is compared with a handful of others instead of every other donor.
+# Within a block, two names are the same donor if their first names agree (exactly, by nickname, or as an initial with a shared employer or occupation) and their middle initials don't conflict. Initials that could be more than one first name in the block aren't matched. Donors are the connected groups of matching names.
+
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Name suffixes and titles left out of the comparison.
+
+SUFFIXES = ['JR', 'SR', 'II', 'III', 'IV', 'V']
+
+TITLES = ['MR', 'MRS', 'MS', 'MISS', 'DR', 'REV', 'HON']
+
+# Common nicknames and the first name they are compared as.
+
+NICKNAMES = {'ALEX': 'ALEXANDER', 'ANDY': 'ANDREW', 'BEN': 'BENJAMIN', 'BETH': 'ELIZABETH', 'BILL': 'WILLIAM',
+             'BOB': 'ROBERT', 'CATHY': 'CATHERINE', 'CHRIS': 'CHRISTOPHER', 'CHUCK': 'CHARLES', 'DAN': 'DANIEL', 'DAVE': 'DAVID',
+             'DICK': 'RICHARD', 'DON': 'DONALD', 'ED': 'EDWARD', 'JIM': 'JAMES', 'JIMMY': 'JAMES', 'JOE': 'JOSEPH', 'JOHNNY': 'JOHN',
+             'KATE': 'KATHERINE', 'KATHY': 'KATHLEEN', 'LIZ': 'ELIZABETH', 'MATT': 'MATTHEW', 'MIKE': 'MICHAEL', 'NICK': 'NICHOLAS',
+             'PEGGY': 'MARGARET', 'RICH': 'RICHARD', 'RICK': 'RICHARD', 'ROB': 'ROBERT', 'SAM': 'SAMUEL',
+             'STEVE': 'STEVEN', 'SUE': 'SUSAN', 'TOM': 'THOMAS', 'TONY': 'ANTHONY', 'BOBBY': 'ROBERT', 'WILL': 'WILLIAM'}
+
+# Employers and occupations that don't help tell people apart.
+
+GENERIC = ['', 'NONE', 'N A', 'NA', 'RETIRED', 'SELF', 'SELF EMPLOYED', 'NOT EMPLOYED', 'UNEMPLOYED', 'HOMEMAKER',
+           'INFORMATION REQUESTED', 'INFORMATION REQUESTED PER BEST EFFORTS', 'REQUESTED']
+
+# Score for first names that are the same (after nicknames) and for a first name that is an initial or the start of the other.
+# A shared employer or occupation adds EVIDENCE, and names with a score of at least THRESHOLD are the same donor, so an initial needs a shared employer or occupation.
+
+SAME_FIRST = 1.0
+
+PREFIX_FIRST = 0.6
+
+EVIDENCE = 0.4
+
+THRESHOLD = 0.9
+
+# normalize()
+# This function takes in a column of names (or zip codes, employers, etc.) and optionally a function for more cleaning. It returns the column in upper case with only letters, digits, and single spaces, and blank where it was missing.
+# Each distinct value is only cleaned once.
+
+def normalize(values, transform=None):
+
+    codes, uniques = pd.factorize(values)
+
+    cleaned = pd.Series(uniques, dtype='object').astype('str').str.upper().str.replace(r'[^A-Z0-9]+', ' ', regex=True).str.strip()
+
+    if transform is not None:
+
+        cleaned = transform(cleaned)
+
+    return pd.Series(np.append(cleaned.values.astype('object'), '')[codes], index=values.index, dtype='object')
+
+# zip_code(), last_name(), and first_name()
+# These functions take in distinct normalized zip codes, last names, or first names and return the form that donors are matched on: five-digit zip codes, last names without suffixes or spaces, and first names without titles and with nicknames replaced.
+
+def zip_code(zips):
+
+    zips = zips.str.replace(' ', '')
+
+    return zips.str.zfill(5).str[:5].where(zips != '', '')
+
+def last_name(names):
+
+    return names.str.replace(r'\b(' + '|'.join(SUFFIXES) + r')\b', '', regex=True).str.replace(' ', '')
+
+def first_name(names):
+
+    words = names.str.split(' ')
+
+    first = words.str[0].where(~words.str[0].isin(TITLES), words.str[1]).fillna('')
+
+    return first.replace(NICKNAMES)
+
+# name_keys()
+# This function takes in individual contributions and returns a dataframe with the parts of each contributor's name and location that donors are matched on: zip, last, first, and middle (initial).
+
+def name_keys(df):
+
+    return pd.DataFrame({'zip': normalize(df.zip, zip_code),
+                         'last': normalize(df['last'], last_name),
+                         'first': normalize(df['first'], first_name),
+                         'middle': normalize(df.middle, lambda names: names.str[:1])}, index=df.index)
+
+# name_blocks()
+# This function takes in a dataframe of names from name_keys() and returns the block of each one: its zip code and last name.
+# Names without a zip code or last name get a block of their own name, so they only match contributions under exactly the same name.
+
+def name_blocks(names):
+
+    blocked = (names.zip != '') & (names['last'] != '')
+
+    return pd.Series(np.where(blocked, names.zip + '|' + names['last'], '|' + names['last'] + '|' + names['first'] + '|' + names.middle), index=names.index)
+
+# name_pairs()
+# This function takes in a dataframe of distinct names from name_keys() and the employers and occupations seen with each name (as name position and value pairs). It returns the positions of every pair of names in the same block that are the same donor.
+
+def name_pairs(names, evidence):
+
+    names = names.assign(position=np.arange(len(names)), initial=names['first'].str[:1])
+
+    # Names with a blank middle initial can only join names with a middle initial if there is just one middle initial for that first initial in the block, so a bare "John Smith" doesn't join "John A Smith" and "John B Smith" into one donor.
+
+    middles = names[names.middle != ''].groupby(['block', 'initial']).middle.nunique().rename('middles').reset_index()
+
+    names = pd.merge(names, middles, how='left', on=['block', 'initial']).fillna({'middles': 0})
+
+    pairs = pd.merge(names, names, on=['block', 'initial'], suffixes=('_a', '_b'))
+
+    pairs = pairs[pairs.position_a < pairs.position_b]
+
+    first_a = pairs.first_a.values
+
+    first_b = pairs.first_b.values
+
+    same = first_a == first_b
+
+    prefix = np.array([a.startswith(b) or b.startswith(a) for a, b in zip(first_a, first_b)], dtype='bool') & ~same
+
+    # A first name that is the start of more than one longer first name in the block (e.g., "J" for both "John" and "Jane") can't tell which it is, so it joins neither.
+
+    shorter = np.where(pairs.first_a.str.len().values <= pairs.first_b.str.len().values, first_a, first_b)
+
+    longer = np.where(shorter == first_a, first_b, first_a)
+
+    starts = pd.DataFrame({'block': pairs.block.values, 'shorter': shorter, 'longer': longer})
+
+    longers = starts[prefix].groupby(['block', 'shorter']).longer.nunique()
+
+    prefix = prefix & (longers.reindex(pd.MultiIndex.from_frame(starts[['block', 'shorter']])).values == 1)
+
+    score = np.where(same, SAME_FIRST, np.where(prefix, PREFIX_FIRST, 0))
+
+    # Add the evidence for pairs that share an employer or occupation.
+
+    shared = pd.merge(pd.merge(pairs[['position_a', 'position_b']], evidence, left_on='position_a', right_on='position'),
+                      evidence, left_on=['position_b', 'value'], right_on=['position', 'value'])
+
+    shared = pd.MultiIndex.from_frame(pairs[['position_a', 'position_b']]).isin(pd.MultiIndex.from_frame(shared[['position_a', 'position_b']]))
+
+    score = score + EVIDENCE * shared
+
+    middle_a = pairs.middle_a.values
+
+    middle_b = pairs.middle_b.values
+
+    compatible = (middle_a == middle_b) | (((middle_a == '') | (middle_b == '')) & (pairs.middles_a.values <= 1))
+
+    matched = compatible & (score >= THRESHOLD)
+
+    return pairs.position_a.values[matched], pairs.position_b.values[matched]
+
+# donor_hash()
+# This function takes in a donor's key (e.g., '02134|SMITH|JOHN|A') and returns a 64-bit ID from a hash of it.
+
+def donor_hash(key):
+
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+# assign_donors()
+# This function takes in individual contributions (with the zip, last, first, middle, employer, and occupation columns from clean_data.py) and returns them with a donor_id column.
+# Names are matched once per distinct name in each block, not once per contribution. The donor_id is a hash of the zip code, last name, longest first name, and middle initial in the donor's group, so it stays the same between runs and cycles, and adding a contribution under an initial or without a middle initial doesn't change it.
+# Blocks never overlap, so the donors of some blocks can be assigned again (e.g., in incremental.py) without changing any others.
+
+def assign_donors(df):
+
+    # Find the distinct names and their blocks. The codes and the names are both numbered in the order the names first appear.
+
+    keys = name_keys(df)
+
+    codes = keys.groupby(list(keys.columns), sort=False).ngroup().values
+
+    names = keys.drop_duplicates().reset_index(drop=True)
+
+    names = names.assign(block=name_blocks(names))
+
+    # Collect the distinct, informative employers and occupations under each name, as codes.
+
+    employer_codes, employers = pd.factorize(normalize(df.employer))
+
+    occupation_codes, occupations = pd.factorize(normalize(df.occupation))
+
+    evidence = pd.DataFrame({'position': np.concatenate([codes, codes]), 'value': np.concatenate([employer_codes, occupation_codes + len(employers)])})
+
+    informative = np.concatenate([~employers.isin(GENERIC), ~occupations.isin(GENERIC)])
+
+    evidence = evidence[informative[evidence.value.values]].drop_duplicates()
+
+    # Group the matching names into donors. scipy is only imported by the stages that need it, so importing this module stays quick.
+
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    a, b = name_pairs(names, evidence)
+
+    links = sparse.coo_matrix((np.ones(len(a), dtype='int8'), (a, b)), shape=(len(names), len(names)))
+
+    _, donors = connected_components(links, directed=False)
+
+    # Name each donor by its zip code, last name, longest first name, and middle initial (alphabetically first if there's a tie), preferring names with a middle initial.
+
+    names = names.assign(donor=donors, length=names['first'].str.len(), blank=names.middle == '', key=names.block + '|' + names['first'] + '|' + names.middle)
+
+    canonical = names.sort_values(['donor', 'length', 'blank', 'key'], ascending=[True, False, True, True]).drop_duplicates(subset='donor').key
+
+    donor_ids = np.array([donor_hash(key) for key in canonical.values], dtype='uint64')
+
+    return df.assign(donor_id=donor_ids[donors[codes]])
+
+# donor_blocks()
+# This function takes in individual contributions and returns the block of each one, so that incremental.py can find the blocks that new contributions fall in.
+
+def donor_blocks(df):
+
+    return name_blocks(name_keys(df))
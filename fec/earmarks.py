@@ -0,0 +1,120 @@
+# This module traces contributions made through conduit committees (e.g., ActBlue and WinRed) to the committees they were earmarked for.
+# A conduit reports every contribution it passes on, with a memo like "Earmarked for Friends of Bob Smith (C00000001)". The target is read from the memo, found by its FEC ID (or by name if there is none), and kept as each row's beneficiary, so maps and totals can be built for the committees that got the money.
+# The beneficiary often reports the same contribution itself ("Earmarked through ActBlue"), so the conduit's copy of those is marked, and counting the beneficiary's rows without the copies counts each contribution once.
+
+import re
+import numpy as np
+import pandas as pd
+from .resolve import MATCH_SCORE, encode_ids, lookup, take
+
+# The earmark target in a memo: the name after "earmarked for" (or "to"), and the FEC ID in parentheses after it, if there is one.
+# Memos like "Earmarked through ActBlue" name the conduit, not a target, so they don't match.
+
+EARMARK = re.compile(r'earmark(?:ed)?\s+(?:for|to)\b\s*:?\s*(?P<name>.*?)\s*(?:\(\s*(?P<id>[a-z][0-9a-z]{8})\s*\))?[\s.]*$', re.IGNORECASE)
+
+# The columns trace_earmarks() adds.
+
+COLUMNS = ['id_beneficiary', 'beneficiary', 'conduit_copy']
+
+# earmark_targets()
+# This function takes in a column of distinct memos and returns a dataframe with the name and ID of the target of each one (both missing for memos that aren't earmarks).
+
+def earmark_targets(memos):
+
+    targets = memos.astype('object').str.extract(EARMARK)
+
+    targets = targets.assign(id=targets['id'].str.upper(), name=targets.name.where(targets.name != ''))
+
+    return targets
+
+# resolve_targets()
+# This function takes in the targets from earmark_targets(), the committee and candidate dataframes, and a folder for caching fuzzy matches (or None). It returns the committee ID of each target, or missing if it can't be found.
+# A candidate ID in a memo stands for the candidate's principal campaign committee. Targets without a usable ID are matched to committee names, but only when the match is nearly exact.
+
+def resolve_targets(targets, df_committee, df_candidate, cache=None):
+
+    keys = encode_ids(targets['id'])
+
+    ids = pd.Series(take(df_committee.id_committee, lookup(keys, df_committee.id_committee)), dtype='object')
+
+    candidate_committees = take(df_candidate.id_committee, lookup(keys, df_candidate.id_candidate))
+
+    ids = ids.fillna(pd.Series(candidate_committees, dtype='object'))
+
+    unresolved = targets.name[ids.isna().values & targets.name.notna().values]
+
+    if not unresolved.empty:
+
+        from .fuzzy_index import extract_cached
+
+        matches = extract_cached(unresolved, df_committee.committee, cache, 'earmark_matches')
+
+        matches = matches[matches.score >= MATCH_SCORE]
+
+        ids[matches.index] = df_committee.id_committee.reindex(matches.position).values
+
+    return ids.values
+
+# trace_earmarks()
+# This function takes in the committee and candidate dataframes, the individual contributions (with donor IDs, see donors.py), and a folder for caching fuzzy matches. It returns the contributions with:
+#   id_beneficiary and beneficiary: the committee the contribution was earmarked for, or else the committee that reported it.
+#   conduit_copy: True for a conduit's copy of a contribution its beneficiary also reported, matched by donor, beneficiary, amount, and date.
+# Memos repeat a lot, so each distinct memo is only parsed and resolved once.
+# To trace only some of the contributions (e.g., the rows incremental.py updates), pass the rows already traced as reported: their beneficiaries' own rows count when looking for conduit copies.
+
+def trace_earmarks(df_committee, df_candidate, df_individuals, cache=None, reported=None):
+
+    codes, memos = pd.factorize(df_individuals.memo_text)
+
+    targets = earmark_targets(pd.Series(np.asarray(memos, dtype='object'), dtype='object'))
+
+    # Missing memos have the code -1, which picks the missing target at the end.
+
+    earmark = pd.Series(np.append(resolve_targets(targets, df_committee, df_candidate, cache), None)[codes], index=df_individuals.index, dtype='object')
+
+    id_committee = df_individuals.id_committee.astype('object')
+
+    conduit = earmark.notna() & (earmark != id_committee)
+
+    id_beneficiary = earmark.where(conduit, id_committee)
+
+    beneficiary_codes, beneficiaries = pd.factorize(id_beneficiary)
+
+    beneficiary = np.append(take(df_committee.committee, lookup(encode_ids(beneficiaries), df_committee.id_committee)), None)[beneficiary_codes]
+
+    # Find the conduit rows whose contribution also appears among the beneficiary's own rows.
+
+    keys = ['donor_id', 'id_beneficiary', 'amount', 'date']
+
+    rows = pd.DataFrame({'donor_id': df_individuals.donor_id, 'id_beneficiary': id_beneficiary, 'amount': df_individuals.amount, 'date': df_individuals.date})
+
+    own = rows[~conduit.values][keys]
+
+    if reported is not None:
+
+        reported = reported[reported.id_beneficiary.astype('object') == reported.id_committee.astype('object')]
+
+        own = pd.concat([own.astype('object'), reported[keys].astype('object')], ignore_index=True)
+
+    reported = pd.MultiIndex.from_frame(own)
+
+    conduit_copy = conduit.values & pd.MultiIndex.from_frame(rows[keys]).isin(reported)
+
+    return df_individuals.assign(id_beneficiary=id_beneficiary, beneficiary=pd.Series(beneficiary, index=df_individuals.index, dtype='object'),
+                                 conduit_copy=conduit_copy)
+
+# earmark_totals()
+# This function takes in the individual contributions after trace_earmarks() and returns one row for each conduit and beneficiary: their IDs and names, the number of contributions passed on, their total amount, and how many of them the beneficiary also reported.
+
+def earmark_totals(df_individuals):
+
+    conduit = df_individuals[df_individuals.id_beneficiary.astype('object') != df_individuals.id_committee.astype('object')]
+
+    columns = {'id_committee': conduit.id_committee.astype('object'), 'recipient': conduit.recipient.astype('object'),
+               'id_beneficiary': conduit.id_beneficiary.astype('object'), 'beneficiary': conduit.beneficiary.astype('object')}
+
+    totals = pd.DataFrame(columns).assign(amount=conduit.amount, conduit_copy=conduit.conduit_copy)
+
+    totals = totals.groupby(['id_committee', 'recipient', 'id_beneficiary', 'beneficiary'], dropna=False)
+
+    return totals.agg(contributions=('amount', 'size'), amount=('amount', 'sum'), copies=('conduit_copy', 'sum')).reset_index()
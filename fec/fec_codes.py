@@ -0,0 +1,110 @@
+# This module loads the tables that map FEC codes (committee types, parties, report types, and transaction types) to full words.
+# The tables are bundled in data/fec_codes.json, so the pipeline doesn't need network access and gives the same result every run.
+# To update the bundled tables from the FEC website, run: python -m fec.fec_codes
+
+import os
+import json
+import datetime
+from functools import lru_cache
+
+# Location of the bundled tables.
+
+CODES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fec_codes.json')
+
+# The FEC page each table is scraped from and the map_pairs() type for reading it.
+# Expenditure types come from the report type page, so the pipeline uses report_types for them.
+
+SOURCES = {'committee_types': ('https://www.fec.gov/campaign-finance-data/committee-type-code-descriptions/', 'types'),
+           'parties': ('https://www.fec.gov/campaign-finance-data/party-code-descriptions/', 'parties'),
+           'report_types': ('https://www.fec.gov/campaign-finance-data/report-type-code-descriptions/', 'report'),
+           'transaction_types': ('https://www.fec.gov/campaign-finance-data/transaction-type-code-descriptions/', 'transaction')}
+
+# map_pairs()
+# Scrape the FEC websites for more mapping pairs. This function takes in cleaned HTML tags and returns a dictionary of all the mapping pairs.
+
+def map_pairs(url, type):
+
+    # Only refreshing the tables needs network access, so requests and BeautifulSoup are imported here rather than for every pipeline run.
+
+    import requests
+    from bs4 import BeautifulSoup
+
+    raw = requests.get(url).text
+    soup = BeautifulSoup(raw)
+    clean_soup = soup.find_all('td')
+
+    # Check whether the type is a report or transaction for determining which lines to copy.
+
+    options = {'report': 3, 'types': 3, 'parties': 3,
+               'expenditures': 3, 'transaction': 2}
+    position = options.get(type)
+
+    # Initialize an empty dictionary to store values and a counter.
+
+    mapping = {}
+    counter = 0
+
+    for tag in clean_soup:
+
+        # Check if the element is in the right position in the text.
+
+        if counter > 2 and counter % position == 0:
+
+            # Clean the tag and get the next item in the list to use as the value.
+
+            key = str(tag).replace('</td>', '').replace('<td>', '')
+            val = str(clean_soup[counter + 1]
+                      ).replace('</td>', '').replace('<td>', '')
+
+            mapping.update({key: val})
+
+        counter += 1
+
+    return mapping
+
+# load_tables()
+# This function takes in the path to a tables file and returns its contents: a version (the date the tables were scraped) and a dictionary of tables.
+# The file is only read once per process.
+
+@lru_cache(maxsize=None)
+def load_tables(path=CODES_PATH):
+
+    with open(path) as f:
+
+        return json.load(f)
+
+# load_codes()
+# This function takes in the name of a table (a key of SOURCES) and returns it as a dictionary from code to full words, ready for Series.map().
+
+def load_codes(name, path=CODES_PATH):
+
+    return load_tables(path)['tables'][name]
+
+# codes_version()
+# This function returns the version of the bundled tables, so saved results can record which tables they were made with.
+
+def codes_version(path=CODES_PATH):
+
+    return load_tables(path)['version']
+
+# refresh()
+# This function scrapes every table in SOURCES from the FEC website and saves them, with today's date as the version, to the tables file.
+
+def refresh(path=CODES_PATH):
+
+    tables = {name: map_pairs(url, type) for name, (url, type) in SOURCES.items()}
+
+    with open(path, 'w') as f:
+
+        json.dump({'version': datetime.date.today().isoformat(), 'tables': tables}, f, indent=1)
+
+        f.write('\n')
+
+    load_tables.cache_clear()
+
+    return tables
+
+
+if __name__ == '__main__':
+
+    refresh()
@@ -0,0 +1,180 @@
+# This module finds the closest match for a name in a long list of committee or candidate names without scoring the name against every entry in the list.
+# The names are indexed once by their three-letter pieces (n-grams), and only the few entries that share the most pieces with a name are scored with fuzzywuzzy's token_sort_ratio.
+
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+from fuzzywuzzy import utils
+from .parallel import parallel_apply
+
+# Length of the pieces used to index names and the number of closest entries to score for each name.
+
+NGRAM = 3
+
+CANDIDATES = 25
+
+# Fewest distinct names worth matching in worker processes.
+
+PARALLEL_ROWS = 1000
+
+# sort_tokens()
+# This function takes in a name and returns it the way token_sort_ratio compares names: lowercase, punctuation removed, and words sorted alphabetically.
+
+def sort_tokens(name):
+
+    if not isinstance(name, str):
+
+        return ''
+
+    return ' '.join(sorted(utils.full_process(name, force_ascii=True).split()))
+
+# ngrams()
+# This function takes in a sorted name and returns the set of its NGRAM-letter pieces, with spaces marking the start and end of the name.
+
+def ngrams(key):
+
+    key = ' ' + key + ' '
+
+    return {key[n:n + NGRAM] for n in range(len(key) - NGRAM + 1)}
+
+# build_index()
+# This function takes in a column of names (e.g., df_committee.committee) and returns an index for searching them with extract_bulk().
+# The index keeps the original labels of the column so that matches can be used to look up other columns of the same dataframe.
+
+def build_index(choices):
+
+    choices = choices.dropna()
+
+    keys = np.array([sort_tokens(choice) for choice in choices], dtype='object')
+
+    # List the pieces of every name, then group the positions of the names by piece.
+
+    pieces = pd.Series([list(ngrams(key)) for key in keys], dtype='object').explode().dropna()
+
+    postings = pd.Series(pieces.index.values, index=pieces.values).groupby(level=0).apply(lambda x: x.values).to_dict()
+
+    return {'choices': choices,
+            'keys': keys,
+            'lengths': np.array([len(ngrams(key)) for key in keys]),
+            'postings': postings}
+
+# extract_one()
+# This function takes in a name and an index from build_index(). It returns the best (match, score, position) triple, like fuzzywuzzy's process.extract(..., limit=1)[0], where position is the label of the match in the indexed column.
+# If the name shares no pieces with any indexed name, it returns (None, 0, None).
+
+def extract_one(query, index, candidates=CANDIDATES):
+
+    key = sort_tokens(query)
+
+    query_pieces = ngrams(key) if key else set()
+
+    postings = [index['postings'][piece] for piece in query_pieces if piece in index['postings']]
+
+    if not postings:
+
+        return (None, 0, None)
+
+    # Count the pieces each indexed name shares with the query and scale by the sizes of both names, so long names don't crowd out short exact matches.
+
+    shared = np.bincount(np.concatenate(postings), minlength=len(index['keys']))
+
+    similarity = shared / (len(query_pieces) + index['lengths'])
+
+    # Score only the most similar names.
+
+    if len(similarity) > candidates:
+
+        closest = np.argpartition(-similarity, candidates)[:candidates]
+
+    else:
+
+        closest = np.arange(len(similarity))
+
+    closest = np.sort(closest[shared[closest] > 0])
+
+    scores = [fuzz.ratio(key, index['keys'][n]) for n in closest]
+
+    # Take the highest score, and the earliest name if there is a tie.
+
+    best = closest[int(np.argmax(scores))]
+
+    return (index['choices'].iloc[best], max(scores), index['choices'].index[best])
+
+# extract_bulk()
+# This function takes in a column of names and an index from build_index(). It returns a dataframe with the match, score, and position of the best match for every name, in the same order as the names.
+# Each distinct name is only searched once.
+
+def extract_bulk(queries, index, candidates=CANDIDATES):
+
+    unique = queries.drop_duplicates()
+
+    matches = pd.DataFrame([extract_one(query, index, candidates) for query in unique],
+                           columns=['match', 'score', 'position'], index=unique.values)
+
+    result = matches.reindex(queries.values)
+
+    result.index = queries.index
+
+    return result
+
+# table_version()
+# This function takes in a column of names to match against. It returns a hash of the names and their labels, which changes whenever the reference table (cm.txt or cn.txt) changes.
+
+def table_version(choices):
+
+    return hashlib.sha1(pd.util.hash_pandas_object(choices, index=True).values.tobytes()).hexdigest()
+
+# extract_cached()
+# This function works like extract_bulk() but takes in the column of names to match against instead of an index, plus a folder for caching matches between runs and a name for the cache file (e.g., 'committee_matches').
+# Matches are saved on disk by the name as token_sort_ratio sees it (sort_tokens()) and by table_version(), so later runs only search for names that are new. Matches made against an older version of the table are dropped.
+# Without a cache folder, every name is searched. Either way, the names that need searching are split across worker processes with parallel_apply().
+
+def extract_cached(queries, choices, cache=None, name='matches', candidates=CANDIDATES):
+
+    if cache is None:
+
+        return parallel_apply(extract_bulk, queries, min_rows=PARALLEL_ROWS, index=build_index(choices), candidates=candidates)
+
+    path = os.path.join(cache, name)
+
+    version = table_version(choices)
+
+    keys = queries.map(sort_tokens, na_action='ignore')
+
+    # Load the matches that are still valid for this version of the table.
+
+    columns = ['version', 'match', 'score', 'position']
+
+    stored = pd.read_pickle(path) if os.path.exists(path) else pd.DataFrame(columns=columns)
+
+    stored = stored[stored.version == version]
+
+    # Search for the names that are not in the cache yet and save them with the rest.
+
+    missing = keys.dropna()[~keys.dropna().isin(stored.index)].drop_duplicates()
+
+    if not missing.empty:
+
+        matches = parallel_apply(extract_bulk, missing, min_rows=PARALLEL_ROWS, index=build_index(choices), candidates=candidates)
+
+        matches = matches.assign(version=version)
+
+        matches.index = missing.values
+
+        stored = matches[columns] if stored.empty else pd.concat([stored, matches[columns]])
+
+        os.makedirs(cache, exist_ok=True)
+
+        stored.to_pickle(path)
+
+    # Missing names get a score of 0, as in extract_bulk().
+
+    result = stored[['match', 'score', 'position']].reindex(keys.values)
+
+    result = result.assign(score=result.score.fillna(0))
+
+    result.index = queries.index
+
+    return result
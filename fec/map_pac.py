@@ -2,13 +2,15 @@
 
 import numpy as np
 import pandas as pd
-import folium
-from folium.plugins import MarkerCluster
 import json
 
 # This function plots aggregate donations and transactions by zip codes.
 
 def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbreviations, df_cc):
+
+    # folium is only imported when a map is drawn, so the app starts without it.
+
+    import folium
     
     ###############
     # PAC DONATIONS
@@ -19,9 +21,13 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
     
     df = df_individuals[df_individuals.recipient == pac][['first_last', 'city', 'state', 'zip', 'amount', 'date']].dropna(axis='rows')
     
+    # Amounts are saved in cents (see schema.py), so convert them back to dollars.
+    
+    df = df.assign(amount=df.amount / 100)
+    
     # Aggregate donations by zip code.
     
-    df_zips = df.groupby('zip').sum().reset_index()
+    df_zips = df.groupby('zip')[['amount']].sum().reset_index()
     
     # Count donations by zip code.
     
@@ -29,7 +35,7 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
     
     for zip_code in df_zips.zip:
         
-        counts.append(len(df[df.zip == str(zip_code)]))
+        counts.append(len(df[df.zip == zip_code]))
         
     df_zips = df_zips.assign(count=pd.Series(counts))
     
@@ -45,6 +51,10 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
     
     pac_zip_points = zip_points[zip_points.zip.astype('int').isin(list(df_zips.zip.values.astype('int')))].dropna(axis='rows')[['zip', 'center']]
     
+    # Zip codes are saved as integers, so match the shapefile zip codes to them.
+    
+    pac_zip_points = pac_zip_points.assign(zip=pac_zip_points.zip.astype('int').astype(df_zips.zip.dtype))
+    
     states = df_individuals[df_individuals.recipient == pac].state.drop_duplicates().dropna(axis='rows')
     
     # Merge the full donation data with the zip code center points.
@@ -71,7 +81,7 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
         
     # Sum donations by state for creating a choropleth.
     
-    df_state_totals = df.groupby('state').sum().reset_index()[['state', 'amount']]
+    df_state_totals = df.groupby('state', observed=True)[['amount']].sum().reset_index()[['state', 'amount']]
     
     # Also get state polygons for the relevant transactions.
     
@@ -170,7 +180,7 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
         
         state = state_mapping[df_zips.state.iloc[n]]
         
-        zip_code = str(df_zips.zip.iloc[n])
+        zip_code = str(df_zips.zip.iloc[n]).zfill(5)
                 
         # Add singular/plural to the count.
         
@@ -207,6 +217,10 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
     
     df_transfers = df_transfers.dropna(axis='rows')
     
+    # Convert the amounts from cents to dollars.
+    
+    df_transfers = df_transfers.assign(amount=df_transfers.amount / 100)
+    
     # If there are transactions, proceed.
     
     if not df_transfers.empty:
@@ -218,6 +232,8 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
         # Find zips where funds were transfered to.
         
         pac_zip_transfers = zip_bounds[zip_bounds.zip.astype('int').isin(list(df_transfers.zip.values.astype('int')))]
+        
+        pac_zip_transfers = pac_zip_transfers.assign(zip=pac_zip_transfers.zip.astype('int').astype(df_transfers.zip.dtype))
 
         # Add the center point to the information about the received transaction.
         
@@ -304,7 +320,7 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
             
             amount = df_transfers.amount.iloc[n]
             
-            date = str(df_transfers.date.iloc[n])
+            date = pd.Timestamp(df_transfers.date.iloc[n]).strftime('%Y-%m-%d')
             
             recipient = df_transfers.recipient.iloc[n]
             
@@ -312,7 +328,7 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
             
             state = state_mapping[df_transfers.state.iloc[n]]
             
-            zip_code = str(df_transfers.zip.iloc[n])
+            zip_code = str(df_transfers.zip.iloc[n]).zfill(5)
                     
             link = '<a href=\"https://docquery.fec.gov/cgi-bin/fecimg/?' + str(df_transfers.image.iloc[n]) + '\" target=\"_blank\">Transfer record</a>'
             
@@ -346,6 +362,8 @@ def map_pac(pac, df_individuals, zip_bounds, zip_points, sf_states, state_abbrev
 # This function plots INDIVIDUAL donations and transactions. That means many points on the map.
 
 def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbreviations, df_cc):
+
+    import folium
     
     ###############
     # PAC DONATIONS
@@ -355,11 +373,19 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
     # Also delete any null values.
     
     df = df_individuals[df_individuals.recipient == pac][['first_last', 'city', 'state', 'zip', 'amount', 'date', 'image']].dropna(axis='rows')
+    
+    # Amounts are saved in cents (see schema.py), so convert them back to dollars.
+    
+    df = df.assign(amount=df.amount / 100)
      
     # Get the zip codes and states from which individuals have contributed OR where the PAC has sent funds.
     
     pac_zip_points = zip_bounds[zip_bounds.zip.astype('int').isin(list(df.zip.values.astype('int')))].dropna(axis='rows')[['zip', 'bounds']]
     
+    # Zip codes are saved as integers, so match the shapefile zip codes to them.
+    
+    pac_zip_points = pac_zip_points.assign(zip=pac_zip_points.zip.astype('int').astype(df.zip.dtype))
+    
     states = df_individuals[df_individuals.recipient == pac].state.drop_duplicates().dropna(axis='rows')
     
     # Merge the full donation data with the zip code center points.
@@ -386,7 +412,7 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
         
     # Sum donations by state for creating a choropleth.
     
-    df_state_totals = df.groupby('state').sum().reset_index()[['state', 'amount']]
+    df_state_totals = df.groupby('state', observed=True)[['amount']].sum().reset_index()[['state', 'amount']]
     
     # Also get state polygons for the relevant transactions.
     
@@ -501,7 +527,7 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
         
         amount = df.amount.iloc[n]
         
-        date = str(df.date.iloc[n])
+        date = pd.Timestamp(df.date.iloc[n]).strftime('%Y-%m-%d')
         
         name = df.first_last.iloc[n]
         
@@ -509,7 +535,7 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
         
         state = state_mapping[df.state.iloc[n]]
         
-        zip_code = str(df.zip.iloc[n])
+        zip_code = str(df.zip.iloc[n]).zfill(5)
         
         link = '<a href=\"https://docquery.fec.gov/cgi-bin/fecimg/?' + str(df.image.iloc[n]) + '\" target=\"_blank\">Donation record</a>'
         
@@ -543,6 +569,10 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
     
     df_transfers = df_transfers.dropna(axis='rows')
     
+    # Convert the amounts from cents to dollars.
+    
+    df_transfers = df_transfers.assign(amount=df_transfers.amount / 100)
+    
     # If there are transactions, proceed.
     
     if not df_transfers.empty:
@@ -561,6 +591,8 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
         # Find zips where funds were transfered to.
         
         pac_zip_transfers = zip_bounds[zip_bounds.zip.astype('int').isin(list(df_transfers.zip.values.astype('int')))]
+        
+        pac_zip_transfers = pac_zip_transfers.assign(zip=pac_zip_transfers.zip.astype('int').astype(df_transfers.zip.dtype))
 
         # Add the center point to the information about the received transaction.
         
@@ -647,7 +679,7 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
             
             amount = df_transfers.amount.iloc[n]
             
-            date = str(df_transfers.date.iloc[n])
+            date = pd.Timestamp(df_transfers.date.iloc[n]).strftime('%Y-%m-%d')
             
             recipient = df_transfers.recipient.iloc[n]
             
@@ -655,7 +687,7 @@ def map_pac_individuals(pac, df_individuals, zip_bounds, sf_states, state_abbrev
             
             state = state_mapping[df_transfers.state.iloc[n]]
             
-            zip_code = str(df_transfers.zip.iloc[n])
+            zip_code = str(df_transfers.zip.iloc[n]).zfill(5)
                     
             link = '<a href=\"https://docquery.fec.gov/cgi-bin/fecimg/?' + str(df_transfers.image.iloc[n]) + '\" target=\"_blank\">Transfer record</a>'
             
@@ -0,0 +1,82 @@
+# This module measures the time and memory each pipeline stage takes (see run_stages() in scheduler.py) for the run report written by process_data.py.
+
+import os
+import sys
+import time
+from .read_fec import ROWS_READ
+
+# Use the resource module for peak memory on Linux and macOS. On Windows, use psutil if it is installed. Otherwise, peak memory isn't reported.
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# peak_rss()
+# This function takes in whether to measure this process or its finished worker processes. It returns the peak resident memory in bytes (the largest of any single worker process for children), or None if it can't be measured here.
+
+def peak_rss(children=False):
+
+    if resource is not None:
+
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+
+        # Linux reports kilobytes and macOS reports bytes.
+
+        return usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+    if psutil is not None and not children:
+
+        return psutil.Process().memory_info().peak_wset
+
+    return None
+
+# cpu_time()
+# This function returns the CPU time (user and system) in seconds used so far by this process and by the worker processes it has finished with.
+# The workers of parallel_apply() and parallel_map() are finished with when their pool closes, which is before the stage that started them returns.
+
+def cpu_time():
+
+    times = os.times()
+
+    return times.user + times.system + times.children_user + times.children_system
+
+# count_rows()
+# This function takes in a stage's input or result and returns its number of rows, or None if it isn't a dataframe or series.
+
+def count_rows(value):
+
+    return len(value) if hasattr(value, 'shape') and len(value.shape) > 0 else None
+
+# measure()
+# This function takes in a stage function and its inputs. It runs the stage and returns its result along with a dictionary of the wall time and CPU time (in seconds), the rows in and out, and the peak memory (in bytes) of the process that ran it and of its worker processes.
+# The rows in are the rows of the dataframes the stage takes in plus the raw rows it reads from bulk files with read_fec() (all of them, even in a sample build).
+# run_stages() runs each measured stage in a fresh process, so the peak memory is the stage's own rather than that of earlier stages in the same process.
+
+def measure(func, *args):
+
+    start_wall = time.perf_counter()
+
+    start_cpu = cpu_time()
+
+    start_read = ROWS_READ['rows']
+
+    result = func(*args)
+
+    rows_in = [rows for rows in map(count_rows, args) if rows is not None]
+
+    if ROWS_READ['rows'] > start_read:
+
+        rows_in.append(ROWS_READ['rows'] - start_read)
+
+    return result, {'wall_time': round(time.perf_counter() - start_wall, 3),
+                    'cpu_time': round(cpu_time() - start_cpu, 3),
+                    'rows_in': sum(rows_in) if rows_in else None,
+                    'rows_out': count_rows(result),
+                    'peak_rss': peak_rss(),
+                    'peak_rss_workers': peak_rss(children=True)}
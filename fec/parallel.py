@@ -0,0 +1,186 @@
+# This module runs the row-by-row cleaning functions (clean_names(), split_zips(), parse_dates(), etc.) across several processes.
+# A column or dataframe is split into contiguous chunks (or a file is read in chunks), each chunk goes to a worker process, and the results are put back together in the original order.
+# Starting worker processes takes a while, so a stage opens one pool with worker_pool() and every call inside it shares that pool.
+
+import os
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+import pandas as pd
+
+# Number of worker processes to use. Set the FEC_WORKERS environment variable to override the number of cores.
+
+WORKERS = int(os.environ.get('FEC_WORKERS', os.cpu_count() or 1))
+
+# Most stages to run at the same time when neither the number of stages nor of workers is given (see split_workers()).
+
+STAGE_LIMIT = 4
+
+# Number of chunks per worker (more chunks even out slow and fast chunks) and the fewest rows worth sending to other processes.
+# Functions that are slow for each row (e.g., fuzzy matching) can pass a lower min_rows.
+
+CHUNKS_PER_WORKER = 4
+
+MIN_ROWS = 50000
+
+# The pool shared by the calls inside worker_pool(): its number of workers and the pool itself once something needs it.
+
+POOL = {}
+
+# split_chunks()
+# This function takes in a column or dataframe and a number of chunks. It returns a list of contiguous slices of it in order.
+
+def split_chunks(data, chunks):
+
+    bounds = np.linspace(0, len(data), chunks + 1).astype('int')
+
+    return [data.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+# split_workers()
+# This function takes in the number of stages to run at the same time and the number of workers for each stage (either can be None). It returns both, picking the missing ones so that all the stages' workers together use about WORKERS cores.
+# Without either, up to STAGE_LIMIT stages share the cores. Numbers that are given are kept as they are.
+
+def split_workers(processes=None, workers=None):
+
+    if processes is None:
+
+        processes = max(1, WORKERS // workers) if workers else min(STAGE_LIMIT, WORKERS)
+
+    if workers is None:
+
+        workers = max(1, WORKERS // processes)
+
+    return processes, workers
+
+# worker_pool()
+# This function takes in a number of workers and is used in a with statement around a stage (see run_pooled()). Every parallel_apply() and parallel_map() inside it with the same number of workers (or none given) uses one pool of worker processes.
+# The pool is only started when a call needs it and is shut down when the with statement ends, so a stage's workers are finished with before the stage returns (see cpu_time() in metrics.py).
+# Inside another worker_pool(), it keeps using the outer pool.
+
+@contextmanager
+def worker_pool(workers=None):
+
+    if POOL:
+
+        yield
+
+        return
+
+    POOL['workers'] = workers or WORKERS
+
+    try:
+
+        yield
+
+    finally:
+
+        pool = POOL.pop('pool', None)
+
+        POOL.clear()
+
+        if pool is not None:
+
+            pool.shutdown()
+
+# run_pooled()
+# This function takes in a number of workers, a function, and its arguments. It returns the result of the function, run inside worker_pool(workers).
+
+def run_pooled(workers, func, *args):
+
+    with worker_pool(workers):
+
+        return func(*args)
+
+# get_pool()
+# This function takes in a number of workers. It returns the pool of worker_pool() if one is open with that many workers, starting it if needed, or None otherwise.
+
+def get_pool(workers):
+
+    if POOL.get('workers') != workers:
+
+        return None
+
+    if 'pool' not in POOL:
+
+        POOL['pool'] = ProcessPoolExecutor(max_workers=workers)
+
+    return POOL['pool']
+
+# open_pool()
+# This function takes in a number of workers. It is used in a with statement and gives the shared pool from get_pool(), or a new pool that is shut down when the with statement ends.
+
+@contextmanager
+def open_pool(workers):
+
+    pool = get_pool(workers)
+
+    if pool is not None:
+
+        yield pool
+
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        yield pool
+
+# parallel_apply()
+# This function takes in a function, a column or dataframe to run it on, and any other keyword arguments for the function (workers, chunks, and min_rows are used here and not passed on). It returns the same result as func(data, **kwargs), computed in chunks across worker processes.
+# The function must be importable from a module (not defined in a script) and must return a column or dataframe with the same index as its input.
+# The chunks are always split the same way and put back together in order, so the result doesn't depend on which worker finishes first.
+
+def parallel_apply(func, data, workers=None, chunks=None, min_rows=MIN_ROWS, **kwargs):
+
+    workers = workers or POOL.get('workers') or WORKERS
+
+    # Small inputs are faster to run here than to send to other processes.
+
+    if workers <= 1 or len(data) < min_rows:
+
+        return func(data, **kwargs)
+
+    pieces = split_chunks(data, chunks or workers * CHUNKS_PER_WORKER)
+
+    with open_pool(workers) as pool:
+
+        results = list(pool.map(partial(func, **kwargs), pieces))
+
+    return pd.concat(results)
+
+# parallel_map()
+# This function takes in a function, an iterable of inputs (e.g., the chunks from read_fec()), and any other keyword arguments for the function. It yields func(item, **kwargs) for every item, in the same order as the items.
+# At most two items per worker are sent out at a time, so a long file read in chunks is never all in memory at once.
+
+def parallel_map(func, items, workers=None, **kwargs):
+
+    workers = workers or POOL.get('workers') or WORKERS
+
+    func = partial(func, **kwargs)
+
+    if workers <= 1:
+
+        for item in items:
+
+            yield func(item)
+
+        return
+
+    with open_pool(workers) as pool:
+
+        pending = deque()
+
+        for item in items:
+
+            pending.append(pool.submit(func, item))
+
+            # Wait for the oldest item once enough are in progress.
+
+            if len(pending) >= workers * 2:
+
+                yield pending.popleft().result()
+
+        while pending:
+
+            yield pending.popleft().result()
@@ -0,0 +1,89 @@
+# This module labels the party of committee-to-committee recipients whose names make it obvious (e.g., the National Republican Congressional Committee), when it couldn't be found from the FEC data.
+# The rules are kept in data/party_rules.json, in order: each has a name, a regular expression for recipient names (case is ignored), the party it gives, and the parties it replaces (e.g., "Unknown").
+# The first rule that matches a name is the one that fires, so put more specific rules first (e.g., Democratic-Farmer-Labor before Democratic).
+
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'party_rules.json')
+
+# load_rules()
+# This function takes in the path to a rules file and returns the list of rules in it.
+# The file is read on every call, so edited rules are used by the next run without restarting anything.
+
+def load_rules(path=RULES_PATH):
+
+    with open(path) as f:
+
+        return json.load(f)['rules']
+
+# compile_rules()
+# This function takes in a list of rules and returns a single regular expression that matches a name with the first rule that applies to it.
+# Each rule is a group (r0, r1, etc.) tried in order at the start of the name, and each can match anywhere after it, so an earlier rule always wins over a later one no matter where in the name they match.
+# Those group names tell which rule matched, so a rule's own pattern can't name its groups. Use (...) or (?:...) instead.
+
+def compile_rules(rules):
+
+    for rule in rules:
+
+        if re.compile(rule['pattern']).groupindex:
+
+            raise ValueError('The pattern of party rule ' + repr(rule['name']) + ' has a named group. Use (...) or (?:...) instead of (?P<name>...).')
+
+    groups = ['(?P<r{}>.*?(?:{}))'.format(n, rule['pattern']) for n, rule in enumerate(rules)]
+
+    return re.compile('^(?:' + '|'.join(groups) + ')', re.IGNORECASE | re.DOTALL)
+
+# match_rules()
+# This function takes in a list of distinct names and a pattern from compile_rules(). It returns an array with the position of the rule that fires for each name, or -1 if none does.
+# Without any rules, the pattern matches every name with no group at all, so no rule fires.
+
+def match_rules(names, pattern):
+
+    fired = np.full(len(names), -1, dtype='int64')
+
+    if not pattern.groupindex:
+
+        return fired
+
+    for n, name in enumerate(names):
+
+        match = pattern.match(str(name))
+
+        if match is not None:
+
+            fired[n] = int(match.lastgroup[1:])
+
+    return fired
+
+# label_parties()
+# This function takes in a dataframe with a party column, a list of rules (by default, those in RULES_PATH), and the column with the names to match. It returns the dataframe with the parties the rules give and a party_rule column with the name of the rule that set each party (blank if none did).
+# The rules are only run once for each distinct name, and whether a rule replaces a party is only checked once for each distinct party. Both are joined back to the rows by their codes.
+
+def label_parties(df, rules=None, column='recipient'):
+
+    rules = load_rules() if rules is None else rules
+
+    # Missing names and parties have the code -1, which picks the last entry of each lookup below: no rule, and a missing party (which counts as "Unknown").
+
+    codes, names = pd.factorize(df[column])
+
+    fired = np.append(match_rules(names, compile_rules(rules)), -1)[codes]
+
+    party_codes, parties = pd.factorize(df.party)
+
+    replaces = np.array([[party in rule['replace'] for party in list(parties) + ['Unknown']] for rule in rules] +
+                        [[False] * (len(parties) + 1)], dtype='bool').reshape(len(rules) + 1, len(parties) + 1)
+
+    labeled = replaces[fired, party_codes]
+
+    labels = np.array([rule['party'] for rule in rules] + [None], dtype='object')
+
+    party = np.where(labeled, labels[fired], df.party.astype('object').values)
+
+    applied = pd.Categorical.from_codes(np.where(labeled, fired, -1), categories=[rule['name'] for rule in rules])
+
+    return df.assign(party=pd.Series(party, index=df.index, dtype='object'), party_rule=pd.Series(applied, index=df.index))
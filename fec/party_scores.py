@@ -0,0 +1,133 @@
+# This module scores the party affiliation of every committee from where its money goes in the committee-to-committee transactions.
+# The transactions are a graph of dollars from senders to recipients, stored as a sparse matrix. Committees with a known party (candidate committees, party committees, and recipients labeled by party_rules.py) keep that party.
+# Every other committee's score is the share of its dollars that goes to each party, counting money sent to other unlabeled committees by their own scores, so affiliations spread through chains of PACs.
+
+import numpy as np
+import pandas as pd
+from .resolve import resolve_party
+
+# The parties that get their own score. Every other party counts as a third party.
+
+PARTY_GROUPS = {'Democratic Party': 'democratic', 'Democratic-Farmer-Labor': 'democratic', 'Republican Party': 'republican'}
+
+SCORES = ['democratic', 'republican', 'third_party']
+
+# Party values that don't say anything about affiliation, so they aren't used as known parties.
+
+NOT_PARTIES = ['Unknown', 'None', 'Other', 'No Party Affiliation', 'No Party Preference', 'Nonpartisan', 'Non-Party', 'Unaffiliated', 'Write-In']
+
+# Stop when no score changes by more than TOLERANCE, or after MAX_ITERATIONS.
+
+TOLERANCE = 1e-6
+
+MAX_ITERATIONS = 200
+
+# known_parties()
+# This function takes in the committee and candidate dataframes, the committee-to-committee transactions after assign_parties(), and a list of committee IDs. It returns the known party of each committee (missing if there isn't one).
+# Parties come from the FEC IDs (see resolve_party()) and from the party rules. Parties from fuzzy name matching are left out, since they are guesses.
+
+def known_parties(df_committee, df_candidate, df_cc, ids):
+
+    party = pd.Series(resolve_party(pd.DataFrame({'id_recipient': ids}), df_committee, df_candidate).values, index=ids, dtype='object')
+
+    party = party.where(~party.isin(NOT_PARTIES))
+
+    labeled = df_cc[df_cc.party_rule.notna()].drop_duplicates(subset='id_recipient')
+
+    return party.fillna(pd.Series(labeled.party.astype('object').values, index=labeled.id_recipient.astype('object').values).reindex(ids))
+
+# transfer_matrix()
+# This function takes in the committee-to-committee transactions and a list of committee IDs. It returns a sparse matrix with the total dollars each committee (row) sent to each committee (column).
+# Transactions with an unknown sender or recipient and transfers to the same committee are left out.
+
+def transfer_matrix(df_cc, ids):
+
+    # scipy is only imported when scores are computed, so importing this module stays quick.
+
+    from scipy import sparse
+
+    senders = pd.Index(ids).get_indexer(df_cc.id_sender.astype('object'))
+
+    recipients = pd.Index(ids).get_indexer(df_cc.id_recipient.astype('object'))
+
+    amounts = df_cc.amount.astype('float64').fillna(0).values
+
+    valid = (senders >= 0) & (recipients >= 0) & (senders != recipients) & (amounts > 0)
+
+    # Duplicate (sender, recipient) entries are summed when the matrix is converted.
+
+    return sparse.coo_matrix((amounts[valid], (senders[valid], recipients[valid])), shape=(len(ids), len(ids))).tocsr()
+
+# propagate()
+# This function takes in a transfer matrix and a matrix of known party shares (one row per committee, one column per score, all zeros for unknown committees). It returns the score matrix and the number of iterations it took.
+# Each unknown committee's scores are the dollar-weighted average of its recipients' scores, repeated until they stop changing. Known committees keep their shares.
+# Starting from zero, the scores only grow, so they converge even when unknown committees send money to each other in a loop.
+
+def propagate(transfers, known, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+
+    from scipy import sparse
+
+    dollars = np.asarray(transfers.sum(axis=1)).ravel()
+
+    # Divide each row by the committee's total dollars sent, so each row holds the share of its money that went to each recipient.
+
+    shares = sparse.diags(np.divide(1, dollars, out=np.zeros_like(dollars), where=dollars > 0)) @ transfers
+
+    is_known = known.any(axis=1)
+
+    scores = known.copy()
+
+    for iteration in range(1, max_iterations + 1):
+
+        updated = np.where(is_known[:, None], known, shares @ scores)
+
+        change = np.abs(updated - scores).max(initial=0)
+
+        scores = updated
+
+        if change < tolerance:
+
+            break
+
+    return scores, iteration
+
+# party_scores()
+# This function takes in the committee and candidate dataframes and the committee-to-committee transactions after assign_parties(). It returns a dataframe with one row per committee: its ID, name, known party (if any), the dollars it sent to other committees, and its democratic, republican, third_party, and unknown scores, which add up to 1 for committees with a known party or any dollars sent.
+
+def party_scores(df_committee, df_candidate, df_cc):
+
+    ids = pd.Index(pd.concat([df_committee.id_committee.astype('object'), df_cc.id_sender.astype('object'), df_cc.id_recipient.astype('object')]).dropna().unique())
+
+    party = known_parties(df_committee, df_candidate, df_cc, ids)
+
+    groups = party.map(lambda value: PARTY_GROUPS.get(value, 'third_party') if isinstance(value, str) else None)
+
+    known = np.column_stack([(groups == score).values for score in SCORES]).astype('float64')
+
+    transfers = transfer_matrix(df_cc, ids)
+
+    scores, iterations = propagate(transfers, known)
+
+    dollars = np.asarray(transfers.sum(axis=1)).ravel()
+
+    # Committees without a known party that sent no money have no scores.
+
+    reached = known.any(axis=1) | (dollars > 0)
+
+    df_scores = pd.DataFrame(np.where(reached[:, None], scores, np.nan), columns=SCORES)
+
+    df_scores = df_scores.assign(unknown=(1 - df_scores.sum(axis=1, min_count=1)).clip(lower=0))
+
+    names = df_committee.drop_duplicates(subset='id_committee').set_index('id_committee').committee
+
+    df_scores.insert(0, 'id_committee', ids)
+
+    df_scores.insert(1, 'committee', names.reindex(ids).values)
+
+    df_scores.insert(2, 'party', party.values)
+
+    df_scores.insert(3, 'dollars', dollars)
+
+    df_scores.attrs['iterations'] = iterations
+
+    return df_scores
@@ -0,0 +1,604 @@
+#####################
+# RAW DATA PROCESSING
+#####################
+# The stages that clean the FEC bulk data into the finalized dataframes, and main() to run them. process_data.py runs it from the command line.
+# Importing this module runs nothing, so the cleaning functions can be used on their own, and worker processes can import them.
+
+import os
+import json
+from datetime import datetime
+from functools import partial
+import pandas as pd
+from .read_fec import read_fec, archive_path
+from .resolve import resolve_cc, resolve_party
+from .clean_data import (clean_names, normalize_text, normalize_columns, concat_categorical, parse_dates, split_zips, remove_invalid, identify_party, clean_individuals,
+                         amendments, elections, entities)
+from .parallel import parallel_apply, parallel_map, split_workers
+from .fec_codes import load_codes
+from .schema import compact
+from .scheduler import run_stages, stage_parts
+from .metrics import peak_rss
+from .sampling import sample_rows, sample_cc
+from .party_rules import RULES_PATH, load_rules, label_parties
+from .party_scores import party_scores
+from .donors import assign_donors
+from .canonical import ALIASES_PATH, canonicalize
+from .earmarks import trace_earmarks, earmark_totals
+from .datasets import save_data
+
+# Set the folder with the zip archives downloaded from https://www.fec.gov/data/browse-data/?tab=bulk-data and the election cycles to process (by the year they end in).
+# The archives are read directly, so there is no need to extract them. Each cycle has its own archives (e.g., indiv16.zip and indiv20.zip).
+
+FEC_PATH = 'C:/Users/Gabriel/Desktop/FEC/'
+
+CYCLES = [2016, 2018, 2020, 2022]
+
+# Set a folder for saving fuzzy name matches between runs, so each run only matches names it hasn't seen before.
+# Each cycle keeps its matches in its own subfolder (see cycle_cache()), since the committees and candidates to match against differ by cycle.
+
+CACHE_PATH = FEC_PATH + 'cache/'
+
+# Set the folder for the finalized dataframes. Each cycle's dataframes are saved in their own subfolder (e.g., cleaned_data/2020/df_individuals), so they can be loaded one cycle at a time (see datasets.py).
+
+OUTPUT_PATH = FEC_PATH + 'cleaned_data/'
+
+# Set the number of worker processes each stage uses for the cleaning functions (see parallel.py) and the number of stages to run at the same time (see scheduler.py).
+# None splits the cores (or the FEC_WORKERS environment variable, if it is set) between them with split_workers(): up to four stages at a time, each with an equal share of workers. A stage process of 1 runs the stages one after another in this process.
+# Peak memory grows with the number of stages running at the same time, since each holds its own dataframes (several cycles of individual contributions at once take several times the memory of one). Lower STAGE_PROCESSES if memory runs out.
+
+WORKERS = None
+
+STAGE_PROCESSES = None
+
+# Set a folder for saving the result of every stage (see checkpoint.py). A rerun loads the stages whose input files, parameters, and code haven't changed and only reruns the rest, so a crash late in the pipeline doesn't mean cleaning the names again.
+# Set it to None to run every stage every time.
+
+CHECKPOINT_PATH = FEC_PATH + 'checkpoints/'
+
+# The stages whose results are saved for each cycle.
+
+OUTPUTS = ['df_committee', 'df_individuals', 'df_expenditures', 'df_candidate', 'df_cc', 'df_scores', 'df_earmarks']
+
+# cycle_cache()
+# This function takes in an election cycle and the folder for fuzzy name matches. It returns the subfolder for that cycle's matches.
+
+def cycle_cache(cycle, cache_path=CACHE_PATH):
+
+    return os.path.join(cache_path, str(cycle), '')
+
+
+##########
+# MAPPINGS
+##########
+# Load the FEC code descriptions for mapping abbreviations to full words.
+# These are bundled with the code (see fec_codes.py), so a run needs no network access. Run fec_codes.py to update them from the FEC website.
+
+def load_mappings():
+
+    return {'types': load_codes('committee_types'),
+            'parties': load_codes('parties'),
+            'report': load_codes('report_types'),
+            'transaction': load_codes('transaction_types'),
+            'expenditures': load_codes('report_types')}
+
+
+############
+# COMMITTEES
+############
+# Import and clean all of the committee data.
+
+# Create mappings to match abbreviations to full words to improve legibility. All according to https://www.fec.gov/campaign-finance-data/committee-master-file-description/.
+
+designations = {'A': 'Authorized by a candidate', 'B': 'Lobbyist/Registrant PAC', 'D': 'Leadership PAC',
+                'J': 'Joint fundraiser', 'P': 'Principal campaign committee', 'U': 'Unauthorized'}
+frequencies = {'A': 'Administratively terminated', 'D': 'Debt',
+               'M': 'Monthly filer', 'T': 'Terminated', 'W': 'Waived'}
+categories = {'C': 'Corporation', 'L': 'Labor organization', 'M': 'Membership organization',
+              'T': 'Trade organization', 'V': 'Cooperative', 'W': 'Corporation without capital stock'}
+
+# Improve the capitalizations of a few of the variables.
+# normalize_text() only changes each distinct value once and keeps the columns categorical.
+
+committee_text = {'committee': lambda names: names.str.title().str.replace('\'S', '\'s'), 'connection': 'title', 'treasurer': 'title',
+                  'street1': 'title', 'street2': 'title', 'city': 'title'}
+
+def process_committees(mappings, path, workers=None):
+
+    # Read in the data from a saved location.
+    # Download the original archive (cm20.zip) from https://www.fec.gov/data/browse-data/?tab=bulk-data.
+    # read_fec() names the columns based on https://www.fec.gov/campaign-finance-data/committee-master-file-description/ and puts them in an order that is more convenient for reading.
+    # The text of each chunk is normalized as it is read, and the chunks are put together with concat_categorical(), so the raw text is never all in memory.
+
+    df_committee = concat_categorical(normalize_columns(chunk, committee_text) for chunk in read_fec(path, 'committees'))
+
+    # Apply all of the mapping schemes to the committee dataframe, including the committee type and party information from the FEC website.
+
+    df_committee['designation'] = df_committee['designation'].map(designations)
+    df_committee['type'] = df_committee['type'].map(mappings['types'])
+    df_committee['party'] = df_committee['party'].map(mappings['parties'])
+    df_committee['frequency'] = df_committee['frequency'].map(frequencies)
+    df_committee['category'] = df_committee['category'].map(categories)
+
+    # Split the zip codes with split_zips() and add them to the dataframe.
+
+    committee_zips = parallel_apply(split_zips, df_committee.zip, workers=workers)
+
+    del df_committee['zip']
+
+    df_committee = pd.concat([df_committee, committee_zips], axis=1)
+
+    # Drop any committees without names.
+
+    df_committee = df_committee[df_committee.committee.notna()]
+
+    # Fill all party affiliations with "Unknown" if the field is blank.
+
+    df_committee = df_committee.assign(party=df_committee.party.fillna(value='Unknown'))
+
+    return df_committee
+
+##########################
+# INDIVIDUAL CONTRIBUTIONS
+##########################
+# Import and clean all of the data on individual contributions.
+
+def process_individuals(mappings, path, workers=None, sample=None):
+
+    # Read the individual contribution data (indiv20.zip) in chunks and clean each chunk with clean_individuals() as it comes in, so the full raw file is never in memory.
+    # read_fec() keeps only the variables of interest and names them based on https://www.fec.gov/campaign-finance-data/contributions-individuals-file-description/.
+    # The chunks are cleaned in worker processes while the next ones are read, and come back in the order they were read.
+
+    chunks = read_fec(path, 'individuals')
+
+    # For a sample build, keep only the contributions to the sampled committees (see sampling.py).
+
+    if sample is not None:
+
+        chunks = (sample_rows(chunk, 'id_committee', sample) for chunk in chunks)
+
+    return clean_individual_rows(chunks, mappings, workers)
+
+# clean_individual_rows()
+# This function takes in raw individual contributions as an iterable of dataframes from read_fec() (e.g., the chunks of a whole file or a list of just the new rows), the code mappings, and a number of workers. It returns the cleaned contributions without invalid transactions.
+# incremental.py uses it to clean only the contributions to committees with new or amended filings.
+
+def clean_individual_rows(chunks, mappings, workers=None):
+
+    # Each chunk's text columns are normalized by clean_individuals(), and concat_categorical() combines their categories so each column has one set.
+
+    df_individuals = concat_categorical(parallel_map(clean_individuals, chunks, workers=workers,
+                                                     report_mapping=mappings['report'], transaction_mapping=mappings['transaction']))
+
+    # Remove invalid transactions that are either negative or positive AND correspond to a negative transaction. Use remove_invalid() from clean_data.py.
+
+    df_individuals = remove_invalid(df_individuals)
+
+    # Clean up and expand the formatting of the names with clean_names().
+    # Then add it to the original dataframe and delete the name column.
+    # Each distinct name is only parsed once per worker, so this takes seconds even for all the individual donations (1.5M+ names).
+
+    individual_names = parallel_apply(clean_names, df_individuals.name_full, workers=workers)
+
+    # Rename the original name column to 'name' to avoid confusing it with the cleaned names.
+
+    df_individuals = df_individuals.rename(columns={'name_full': 'name'})
+
+    df_individuals = pd.concat([df_individuals, individual_names], axis=1)
+
+    del df_individuals['name']
+
+    return df_individuals
+
+
+##############
+# CANDIDATES
+##############
+
+# Use mappings to expand a few of the variables into full words.
+# Find the corresponding info here: https://www.fec.gov/campaign-finance-data/candidate-master-file-description/
+
+race_mapping = {'H': 'House', 'P': 'President', 'S': 'Senate'}
+incumbent_mapping = {'I': 'Incumbent', 'C': 'Challenger', 'O': 'Open seat'}
+status_mapping = {'C': 'Statutory candidate', 'F': 'Statutory candidate for future election',
+                  'N': 'Not yet a statutory candidate', 'P': 'Statutory candidate in prior cycle'}
+
+# Clean up districts, years, streets, cities, and zip codes. These are all read as strings, and missing values stay missing.
+# Don't fix zip codes because many here are not the standard five-digit ones, but three-digit (or less) abbreviations.
+
+candidate_text = {'district': lambda districts: districts.str.replace('.0', '', regex=False), 'election_year': 'strip',
+                  'zip': lambda zips: zips.str.replace('.0', '', regex=False), 'street': 'title', 'street2': 'title', 'city': 'title'}
+
+def process_candidates(mappings, path, workers=None):
+
+    # All candidate data from: https://www.fec.gov/data/browse-data/?tab=bulk-data
+    # Normalize the text of each chunk as it is read (see process_committees()).
+
+    raw_candidate = concat_categorical(normalize_columns(chunk, candidate_text) for chunk in read_fec(path, 'candidates'))
+
+    # Create a separate copy of it.
+
+    df_candidate = raw_candidate[:]
+
+    # Expand and improve the look of candidate names using clean_names().
+
+    candidate_names = parallel_apply(clean_names, raw_candidate.candidate, workers=workers)
+
+    df_candidate = pd.concat([df_candidate, candidate_names], axis=1, )
+
+    del df_candidate['candidate']
+
+    df_candidate['party_candidate'] = df_candidate['party_candidate'].map(
+        mappings['parties'])
+    df_candidate['race'] = df_candidate['race'].map(race_mapping)
+    df_candidate['incumbent'] = df_candidate['incumbent'].map(incumbent_mapping)
+    df_candidate['status'] = df_candidate['status'].map(status_mapping)
+
+    # Fill all party affiliations with "Unknown" if the field is blank.
+
+    df_candidate = df_candidate.assign(party_candidate=df_candidate.party_candidate.fillna(value='Unknown'))
+
+    return df_candidate
+
+
+########################
+# COMMITTEE EXPENDITURES
+########################
+# Data on all expenditures by each committee.
+
+# Clean up the formatting of name, purpose, city, and memo.
+
+expenditure_text = {'name_full': 'title', 'purpose': 'capitalize', 'city': 'title', 'memo_text': 'capitalize'}
+
+def process_expenditures(mappings, path, workers=None, sample=None):
+
+    # Load the data, downloaded from the FEC bulk data site (as above), with only the variables of interest for display and merging with other datasets.
+    # For a sample build, keep only the expenditures of the sampled committees.
+
+    chunks = read_fec(path, 'expenditures')
+
+    if sample is not None:
+
+        chunks = (sample_rows(chunk, 'id_committee', sample) for chunk in chunks)
+
+    return clean_expenditure_rows(chunks, mappings, workers)
+
+# clean_expenditure_rows()
+# This function takes in raw expenditures as an iterable of dataframes from read_fec() (e.g., the chunks of a whole file or a list of just the new rows), the code mappings, and a number of workers. It returns the cleaned expenditures without invalid transactions.
+
+def clean_expenditure_rows(chunks, mappings, workers=None):
+
+    # Normalize the text of each chunk as it is read (see process_committees()).
+
+    df_expenditures = concat_categorical(normalize_columns(chunk, expenditure_text) for chunk in chunks)
+
+    # Split the zip code into primary and secondary.
+
+    expenditure_zips = parallel_apply(split_zips, df_expenditures.zip, workers=workers)
+
+    del df_expenditures['zip']
+
+    df_expenditures = pd.concat([df_expenditures, expenditure_zips], axis=1)
+
+    # Turn abbreviations into full words for improved legibility, using the report types from the FEC site for the expenditure types.
+
+    df_expenditures['amendment'] = df_expenditures['amendment'].map(amendments)
+    df_expenditures['entity'] = df_expenditures['entity'].map(entities)
+    df_expenditures['election'] = df_expenditures['election'].map(elections)
+    df_expenditures['type'] = df_expenditures['type'].map(mappings['expenditures'])
+
+    # Convert the date strings to real dates with parse_dates().
+
+    df_expenditures = df_expenditures.assign(date=parallel_apply(parse_dates, df_expenditures.date, workers=workers))
+
+    # Remove invalid transactions that are either negative or positive AND correspond to a negative transaction. Use remove_invalid() from clean_data.py.
+
+    df_expenditures = remove_invalid(df_expenditures)
+
+    return df_expenditures
+
+
+#####################################
+# COMMITTEE-TO-COMMITTEE TRANSACTIONS
+#####################################
+# Data that tracks all committee-to-committee transactions.
+
+# Clean up the formatting of city, employer, and memo.
+
+cc_text = {'city': 'title', 'employer': 'title', 'memo_text': 'capitalize'}
+
+def process_cc(mappings, path, workers=None, sample=None):
+
+    # Read in the downloaded file with only the variables of interest for display and merging with other datasets.
+    # Keep the FEC ID of the other committee or candidate (id_other) for resolving the sender below.
+    # Column names are from: https://www.fec.gov/campaign-finance-data/any-transaction-one-committee-another-file-description/.
+
+    chunks = read_fec(path, 'cc')
+
+    # For a sample build, keep only the transactions to and from the sampled committees.
+    # A transaction from a sampled committee is kept with every transaction from the same sender name, which may be in another chunk, so a sample is picked from the whole file.
+
+    if sample is not None:
+
+        chunks = [sample_cc(pd.concat(chunks), sample)]
+
+    return clean_cc_rows(chunks, mappings, workers)
+
+# clean_cc_rows()
+# This function takes in raw committee-to-committee transactions as an iterable of dataframes from read_fec() (e.g., the chunks of a whole file or a list of just the new rows), the code mappings, and a number of workers. It returns the cleaned transactions without invalid ones.
+
+def clean_cc_rows(chunks, mappings, workers=None):
+
+    # Clean up the formatting of city, employer, and memo. Normalize the text of each chunk as it is read (see process_committees()).
+
+    df_cc = concat_categorical(normalize_columns(chunk, cc_text) for chunk in chunks)
+
+    df_cc = df_cc.assign(zip=df_cc.zip.astype('str'))
+
+    # Split the zip code into primary and secondary.
+
+    cc_zips = parallel_apply(split_zips, df_cc.zip, workers=workers)
+
+    del df_cc['zip']
+
+    df_cc = pd.concat([df_cc, cc_zips], axis=1)
+
+    # Turn abbreviations into full words for improved legibility.
+
+    df_cc['amendment'] = df_cc['amendment'].map(amendments)
+    df_cc['entity'] = df_cc['entity'].map(entities)
+    df_cc['election'] = df_cc['election'].map(elections)
+    df_cc['report'] = df_cc['report'].map(mappings['report'])
+
+    # Replace the date with real dates.
+
+    df_cc = df_cc.assign(date=parallel_apply(parse_dates, df_cc.date, workers=workers))
+
+    # Remove invalid transactions that are either negative or positive AND correspond to a negative transaction. Use remove_invalid() from clean_data.py.
+
+    df_cc = remove_invalid(df_cc, committee='id_recipient')
+
+    # Rename the 'name_full' column to 'recipient' (since only the former works in remove_invalid()).
+
+    df_cc = df_cc.rename(columns={'name_full': 'sender'})
+
+    df_cc = df_cc.assign(sender=normalize_text(df_cc.sender, 'title'))
+
+    # Turn candidate and individual names in the 'sender' column into a usable format.
+
+    cc_people = df_cc[df_cc.entity.isin(['Individual', 'Candidate'])]
+
+    # Filter out one listing that's for a PAC, not for an individual (Donald J. Trump For President, Inc.).
+
+    cc_people = cc_people[~cc_people.sender.str.contains('Inc\.', na=False)]
+
+    # Clean the names of the candidate and individual entities in the candidate transaction list.
+
+    cc_names = parallel_apply(clean_names, cc_people.sender, workers=workers)
+
+    df_cc = pd.merge(df_cc, cc_names, how='left', left_index=True, right_index=True)
+
+    # Drop any transactions without a sender name.
+
+    df_cc = df_cc[df_cc.sender.notna()]
+
+    return df_cc
+
+###########################
+# DATA CLEANING AND MERGING
+###########################
+
+# Each dataframe is merged in its own stage, so each one can start as soon as the committees and its own data are ready (see pipeline_stages()).
+# Merge in the committee and individual names instead of using just ids.
+
+def merge_cc(df_committee, df_candidate, df_cc, cache=CACHE_PATH):
+
+    # Add in the name of the recipient committee, the id of the sending committee, and the candidate id for transactions from candidates.
+    # These all come from the FEC ids with resolve_cc(), which only matches names for senders that have no id.
+
+    return resolve_cc(df_cc, df_committee, df_candidate, cache=cache)
+
+def merge_individuals(df_committee, df_individuals):
+
+    # Add in the recipient committee name to the individual donations.
+
+    committees = df_committee[['id_committee', 'committee']]
+
+    df_individuals = pd.merge(df_individuals, committees, how='left', on='id_committee')
+
+    return df_individuals.rename(columns={'committee': 'recipient'})
+
+def merge_expenditures(df_committee, df_expenditures):
+
+    # Add in the committee name to the expenditures.
+
+    return pd.merge(df_expenditures, df_committee[['id_committee', 'committee']], how='left', on='id_committee')
+
+def merge_candidates(df_committee, df_candidate):
+
+    # Add the corresponding committee name to the candidate list.
+
+    return pd.merge(df_candidate, df_committee[['id_committee', 'committee']], how='left', on='id_committee')
+
+
+###################
+# PARTY AFFILIATION
+###################
+# Determine the party affiliation of committee-to-committee transactions (based on candidate names or PAC affiliations).
+# Determine PAC affiliation "scores" based on the dollars sent to committees of each party, spread through the whole transfer graph (see party_scores.py).
+
+# find_parties()
+# This function takes in the committee and candidate dataframes, the merged committee-to-committee transactions, and the folder for fuzzy name matches. It returns the transactions with the party of each recipient.
+# incremental.py uses it for just the new or amended transactions.
+
+def find_parties(df_committee, df_candidate, df_cc, cache=CACHE_PATH):
+
+    # Blank party affiliations were already filled with "Unknown" in process_committees() and process_candidates().
+    # Determine the party affiliations of specific transfers from the recipient committee's id with resolve_party().
+
+    df_cc = df_cc.assign(party=resolve_party(df_cc, df_committee, df_candidate))
+
+    # Fall back on fuzzy matching the names of any recipients whose party could not be found by id.
+    # identify_party() matches the names in worker processes when there are many of them (see extract_cached()).
+
+    unresolved = df_cc[df_cc.party.isna() & df_cc.recipient.notna()]
+
+    if not unresolved.empty:
+
+        party_recipients = identify_party(unresolved.drop_duplicates(subset='recipient'), df_candidate, df_committee, cache=cache)
+
+        parties = party_recipients.set_index('recipient').party
+
+        df_cc = df_cc.assign(party=df_cc.party.fillna(df_cc.recipient.map(parties)))
+
+    # Turn no party listed into 'Unknown,' just for consistency.
+
+    df_cc['party'] = df_cc['party'].replace(to_replace='None', value='Unknown')
+
+    return df_cc
+
+# assign_parties()
+# This function takes in the committee-to-committee transactions with parties from find_parties() and the path to the party rules. It returns them with manual labels for the recipients whose names make the party obvious (e.g., 'Republican' or 'Democratic'), and the rule that set each one (see party_rules.py).
+# The rules only run once for each distinct recipient name. They are in their own stage, so editing the rules file only reruns this stage and the ones after it.
+
+def assign_parties(df_cc, rules_path=RULES_PATH):
+
+    return label_parties(df_cc, load_rules(rules_path))
+
+
+##########################################################
+### Test function to see the results of the party mapping.
+##########################################################
+
+# get_pac() returns the transfers sent by one randomly chosen PAC. Check its parties with df.party.value_counts().
+
+def get_pac(df_cc):
+    
+    # get a pac
+    
+    pac = df_cc[df_cc.entity != 'Individual']
+    
+    pac = pac.drop_duplicates(subset='sender').sender.sample(1).iloc[0]
+    
+    # filter for the pac
+    
+    return df_cc[df_cc.sender == pac]
+
+
+########
+# STAGES
+########
+# The pipeline for one cycle as a dependency graph for run_stages() in scheduler.py: each stage is a function, the stages whose results it takes (in order), and, for the source stages, the bulk file it reads from the input folder.
+# The five source files are cleaned at the same time, and each merge starts as soon as its inputs are ready, so a full run takes about as long as the slowest branch (the individual contributions).
+# The party stage runs after merge_cc, so the two never write the same fuzzy match cache at the same time. The canonical and earmarks stages keep their matches in files of their own.
+# If sample is a fraction (e.g., 0.01), only the transactions of that fraction of committees are cleaned (see sampling.py). The committee and candidate lists are small and are kept whole, so every counterparty and committee name match is the same as in a full build. The donors, canonical values, conduit copies, and party scores are only approximate (see sampling.py).
+
+def cycle_stages(mappings, cycle, workers=None, input_path=FEC_PATH, cache_path=CACHE_PATH, sample=None):
+
+    paths = {source: archive_path(input_path, source, cycle) for source in ['committees', 'individuals', 'candidates', 'expenditures', 'cc']}
+
+    cache = cycle_cache(cycle, cache_path)
+
+    return {
+        'committees': (partial(process_committees, mappings, paths['committees'], workers=workers), [], [paths['committees']]),
+        'individuals': (partial(process_individuals, mappings, paths['individuals'], workers=workers, sample=sample), [], [paths['individuals']]),
+        'candidates': (partial(process_candidates, mappings, paths['candidates'], workers=workers), [], [paths['candidates']]),
+        'expenditures': (partial(process_expenditures, mappings, paths['expenditures'], workers=workers, sample=sample), [], [paths['expenditures']]),
+        'cc': (partial(process_cc, mappings, paths['cc'], workers=workers, sample=sample), [], [paths['cc']]),
+        'merge_cc': (partial(merge_cc, cache=cache), ['committees', 'candidates', 'cc']),
+        'merge_individuals': (merge_individuals, ['committees', 'individuals']),
+        'merge_expenditures': (merge_expenditures, ['committees', 'expenditures']),
+        'merge_candidates': (merge_candidates, ['committees', 'candidates']),
+        'parties': (partial(find_parties, cache=cache), ['committees', 'merge_candidates', 'merge_cc']),
+        'party_rules': (partial(assign_parties, rules_path=RULES_PATH), ['parties'], [RULES_PATH]),
+        'scores': (party_scores, ['committees', 'merge_candidates', 'party_rules']),
+        'donors': (assign_donors, ['merge_individuals']),
+        'canonical': (partial(canonicalize, cache=cache), ['donors'], [ALIASES_PATH]),
+        'earmarks': (partial(trace_earmarks, cache=cache), ['committees', 'merge_candidates', 'canonical']),
+        'earmark_totals': (earmark_totals, ['earmarks']),
+
+        # Convert the dataframes to the compact schema in schema.py (amounts in cents, categorical codes, etc.) so they take less memory wherever they are loaded.
+        # The candidate zip codes are often abbreviated, so they stay as text.
+
+        'df_committee': (compact, ['committees']),
+        'df_individuals': (compact, ['earmarks']),
+        'df_expenditures': (compact, ['merge_expenditures']),
+        'df_candidate': (partial(compact, text=['zip']), ['merge_candidates']),
+        'df_cc': (compact, ['party_rules']),
+        'df_scores': (compact, ['scores']),
+        'df_earmarks': (compact, ['earmark_totals'])}
+
+# stage_name()
+# This function takes in the name of a stage in cycle_stages() and an election cycle. It returns the name of that stage for that cycle in pipeline_stages() (e.g., 'df_cc_2020').
+
+def stage_name(name, cycle):
+
+    return name + '_' + str(cycle)
+
+# pipeline_stages()
+# This function takes in the code mappings, a list of election cycles, a number of workers, the folder with the bulk archives, the folder for fuzzy name matches, and the fraction of committees to sample (or None). It returns the stages of every cycle in one graph, so the cycles are cleaned at the same time.
+# The cycles share no stages, and each has its own fuzzy match cache, so adding a cycle never changes the checkpoints of the others.
+
+def pipeline_stages(mappings, cycles, workers=None, input_path=FEC_PATH, cache_path=CACHE_PATH, sample=None):
+
+    stages = {}
+
+    for cycle in cycles:
+
+        for name, stage in cycle_stages(mappings, cycle, workers, input_path, cache_path, sample).items():
+
+            func, needs, files = stage_parts(stage)
+
+            stages[stage_name(name, cycle)] = (func, [stage_name(need, cycle) for need in needs], files)
+
+    return stages
+
+
+######
+# MAIN
+######
+# Run the stages with run_stages() and save the finalized dataframes of each cycle in its own folder.
+# The run report lists the wall time, CPU time, rows in and out, and peak memory of every stage (see metrics.py), so slow or memory-hungry stages and regressions between runs are easy to spot.
+
+# main()
+# This function takes in the names of the stages to run (from cycle_stages()), the election cycles, the folders for the bulk archives, the finalized dataframes, the fuzzy name matches, and the checkpoints (or None), the numbers of workers and stage processes, the path for the run report (or None), and the fraction of committees to sample (or None). It saves the result of each named stage for each cycle and returns the report.
+
+def main(names=OUTPUTS, cycles=CYCLES, input_path=FEC_PATH, output_path=OUTPUT_PATH, cache_path=CACHE_PATH, checkpoint_path=CHECKPOINT_PATH,
+         workers=WORKERS, processes=STAGE_PROCESSES, report_path=None, sample=None):
+
+    started = datetime.now()
+
+    stats = {}
+
+    mappings = load_mappings()
+
+    outputs = [stage_name(name, cycle) for cycle in cycles for name in names]
+
+    # Split the cores between the stages that run at the same time and their workers.
+
+    processes, workers = split_workers(processes, workers)
+
+    results = run_stages(pipeline_stages(mappings, cycles, workers, input_path, cache_path, sample), processes, workers, checkpoints=checkpoint_path, outputs=outputs, stats=stats)
+
+    # Save the named dataframes of each cycle.
+
+    for cycle in cycles:
+
+        for name in names:
+
+            save_data(results.pop(stage_name(name, cycle)), output_path, cycle, name)
+
+    report = {'started': started.isoformat(timespec='seconds'),
+              'wall_time': round((datetime.now() - started).total_seconds(), 3),
+              'peak_rss': peak_rss(),
+              'cycles': list(cycles),
+              'sample': sample,
+              'outputs': outputs,
+              'stages': stats}
+
+    if report_path is not None:
+
+        with open(report_path, 'w') as f:
+
+            json.dump(report, f, indent=1)
+
+    return report
@@ -0,0 +1,123 @@
+# This module reads the raw FEC bulk data files in bounded-size chunks, straight from the zip archives the FEC publishes.
+
+import os
+import zipfile
+from contextlib import contextmanager
+import pandas as pd
+
+# Number of rows to read from a bulk file at a time. At this size one chunk of individual contributions takes roughly 100 MB.
+
+CHUNKSIZE = 500000
+
+# Count the raw rows read_fec() has read in this process, so measure() in metrics.py can report the rows each stage read from its bulk file.
+
+ROWS_READ = {'rows': 0}
+
+# Declare the schema of each bulk file: the archive it is published in (by two-digit cycle year), the file name, every column in the file (they have no header), and only the columns the pipeline uses with their types.
+# Column descriptions are here: https://www.fec.gov/campaign-finance-data/committee-master-file-description/, https://www.fec.gov/campaign-finance-data/contributions-individuals-file-description/, etc.
+# Everything that is a code, ID, or zip code is read as a string so that leading zeros are kept and pandas does not have to guess the types.
+# The transaction files keep each row's transaction ID (id_transaction) and unique FEC record number (fec_record, SUB_ID in the FEC's descriptions) for updating stored data with new filings (see incremental.py).
+
+SCHEMAS = {
+    'committees': {
+        'archive': 'cm{}.zip',
+        'file': 'cm.txt',
+        'columns': ['id_committee', 'committee', 'treasurer', 'street1', 'street2', 'city', 'state',
+                    'zip', 'designation', 'type', 'party', 'frequency', 'category', 'connection', 'id_candidate'],
+        'dtypes': {'id_committee': 'str', 'committee': 'str', 'designation': 'str', 'type': 'str', 'party': 'str', 'category': 'str',
+                   'frequency': 'str', 'connection': 'str', 'id_candidate': 'str', 'treasurer': 'str', 'street1': 'str', 'street2': 'str',
+                   'city': 'str', 'state': 'str', 'zip': 'str'}},
+    'individuals': {
+        'archive': 'indiv{}.zip',
+        'file': 'itcont.txt',
+        'columns': ['id_committee', 'amendment', 'report', 'election', 'image', 'type', 'entity', 'name_full', 'city', 'state', 'zip', 'employer',
+                    'occupation', 'date', 'amount', 'id_other', 'id_transaction', 'id_report', 'memo_code', 'memo_text', 'fec_record'],
+        'dtypes': {'name_full': 'str', 'amount': 'float64', 'city': 'str', 'state': 'str', 'zip': 'str', 'date': 'str', 'employer': 'str',
+                   'occupation': 'str', 'id_committee': 'str', 'amendment': 'str', 'report': 'str', 'election': 'str', 'type': 'str',
+                   'entity': 'str', 'memo_text': 'str', 'image': 'str', 'id_transaction': 'str', 'fec_record': 'str'}},
+    'candidates': {
+        'archive': 'cn{}.zip',
+        'file': 'cn.txt',
+        'columns': ['id_candidate', 'candidate', 'party_candidate', 'election_year', 'election_state',
+                    'race', 'district', 'incumbent', 'status', 'id_committee', 'street', 'street2', 'city', 'state', 'zip'],
+        'dtypes': {'id_candidate': 'str', 'candidate': 'str', 'party_candidate': 'str', 'election_year': 'str', 'election_state': 'str',
+                   'race': 'str', 'district': 'str', 'incumbent': 'str', 'status': 'str', 'id_committee': 'str', 'street': 'str',
+                   'street2': 'str', 'city': 'str', 'state': 'str', 'zip': 'str'}},
+    'expenditures': {
+        'archive': 'oppexp{}.zip',
+        'file': 'oppexp.txt',
+        'columns': ['id_committee', 'amendment', 'year', 'type', 'image', 'line', 'form', 'schedule', 'name_full', 'city', 'state', 'zip', 'date', 'amount',
+                    'election', 'purpose', 'category', 'category_description', 'memo', 'memo_text', 'entity', 'fec_record', 'file', 'id_transaction', 'transaction_backref', 'empty'],
+        'dtypes': {'id_committee': 'str', 'name_full': 'str', 'entity': 'str', 'date': 'str', 'amount': 'float64', 'purpose': 'str',
+                   'category_description': 'str', 'city': 'str', 'state': 'str', 'zip': 'str', 'type': 'str', 'election': 'str',
+                   'memo_text': 'str', 'image': 'str', 'amendment': 'str', 'id_transaction': 'str', 'fec_record': 'str'}},
+    'cc': {
+        'archive': 'oth{}.zip',
+        'file': 'itoth.txt',
+        'columns': ['id_recipient', 'amendment', 'report', 'election', 'image', 'transaction', 'entity', 'name_full', 'city', 'state',
+                    'zip', 'employer', 'occupation', 'date', 'amount', 'id_other', 'id_transaction', 'file', 'memo', 'memo_text', 'fec_record'],
+        'dtypes': {'id_recipient': 'str', 'id_other': 'str', 'name_full': 'str', 'entity': 'str', 'date': 'str', 'amount': 'float64', 'city': 'str',
+                   'state': 'str', 'zip': 'str', 'employer': 'str', 'election': 'str', 'report': 'str', 'memo_text': 'str', 'image': 'str',
+                   'amendment': 'str', 'id_transaction': 'str', 'fec_record': 'str'}}
+}
+
+# archive_path()
+# This function takes in the folder with the downloaded FEC archives, the name of a schema, and an election cycle (e.g., 2020). It returns the path to the archive for that cycle (e.g., indiv20.zip).
+
+def archive_path(directory, source, cycle):
+
+    return os.path.join(directory, SCHEMAS[source]['archive'].format(str(cycle)[-2:]))
+
+# open_fec()
+# This function takes in the path to either an extracted bulk file or a downloaded zip archive and the name of its schema. It is used in a with statement and gives a binary file object for the bulk file.
+# Archives are decompressed as they are read, so nothing is extracted to disk. Both the bulk file and the archive it is in are closed when the with statement ends.
+
+@contextmanager
+def open_fec(path, source):
+
+    if not zipfile.is_zipfile(path):
+
+        with open(path, 'rb') as f:
+
+            yield f
+
+        return
+
+    with zipfile.ZipFile(path) as archive:
+
+        # Some archives (e.g., indiv20.zip) also hold the same data split into smaller files, so use the top-level copy of the bulk file.
+
+        members = [name for name in archive.namelist() if os.path.basename(name) == SCHEMAS[source]['file']]
+
+        members = sorted(members, key=lambda name: name.count('/'))
+
+        if not members:
+
+            raise FileNotFoundError(SCHEMAS[source]['file'] + ' is not in ' + str(path))
+
+        with archive.open(members[0]) as f:
+
+            yield f
+
+# read_fec()
+# This function takes in the path to an FEC bulk file (or the zip archive it comes in) and the name of its schema (a key of SCHEMAS). It yields dataframes of at most chunksize rows with only the columns in the schema, in the schema's order.
+# Only one chunk of the raw file is held in memory at a time, so the caller can clean each chunk and keep just the result.
+
+def read_fec(path, source, chunksize=CHUNKSIZE):
+
+    schema = SCHEMAS[source]
+
+    columns = list(schema['dtypes'])
+
+    with open_fec(path, source) as f:
+
+        with pd.read_csv(f, header=None, sep='|', names=schema['columns'], usecols=columns,
+                         dtype=schema['dtypes'], chunksize=chunksize) as reader:
+
+            for chunk in reader:
+
+                ROWS_READ['rows'] += len(chunk)
+
+                # Put the columns back in the schema's order, since usecols ignores it.
+
+                yield chunk[columns]
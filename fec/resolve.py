@@ -0,0 +1,148 @@
+# This module resolves the senders, recipients, candidates, and parties of committee-to-committee transactions by their FEC IDs instead of by name.
+# IDs are turned into integers so that every lookup is a hash join on one integer column. Fuzzy name matching is only used for rows without a usable ID.
+
+import numpy as np
+import pandas as pd
+
+# Minimum fuzzy match score for a name to be used in place of a missing ID.
+
+MATCH_SCORE = 95
+
+# Entity types (after mapping to full words) that are people rather than committees.
+
+PEOPLE = ['Individual', 'Candidate']
+
+# Lookup table from the characters in an FEC ID to base-36 digits. Any other character is marked invalid with -1.
+
+DIGITS = np.full(256, -1, dtype='int64')
+DIGITS[np.frombuffer(b'0123456789', dtype='uint8')] = np.arange(10)
+DIGITS[np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', dtype='uint8')] = np.arange(10, 36)
+
+# encode_ids()
+# This function takes in a column of 9-character FEC IDs (e.g., C00000059 for a committee or H8CA05035 for a candidate). It returns an array of integers, one per ID, with -1 for missing or malformed IDs.
+# Every character is read as a base-36 digit, so the integers are unique and fit in 64 bits.
+
+def encode_ids(ids):
+
+    ids = pd.Series(ids, dtype='object').str.upper()
+
+    valid = ids.str.fullmatch(r'[A-Z0-9]{9}').fillna(False).astype('bool').values
+
+    # Read the IDs as a matrix of characters, one row per ID, and convert each character to its digit.
+
+    characters = np.array(ids.where(valid, '000000000').tolist(), dtype='S9').view('uint8').reshape(-1, 9)
+
+    result = DIGITS[characters].dot(36 ** np.arange(8, -1, -1, dtype='int64'))
+
+    return np.where(valid, result, -1)
+
+# lookup()
+# This function takes in an array of encoded IDs to look up and a column of IDs to search (e.g., df_committee.id_committee). It returns the position of each ID in that column, or -1 if it isn't there.
+# If an ID appears more than once in the column, the first one is used.
+
+def lookup(keys, ids):
+
+    table = encode_ids(ids)
+
+    first = (table >= 0) & ~pd.Series(table).duplicated().values
+
+    positions = pd.Index(table[first]).get_indexer(keys)
+
+    return np.where((positions >= 0) & (keys >= 0), np.flatnonzero(first)[positions], -1)
+
+# take()
+# This function takes in a column and an array of positions from lookup(). It returns the values at those positions, with missing values where the position is -1.
+
+def take(column, positions):
+
+    return column.reset_index(drop=True).reindex(positions).values
+
+# resolve_cc()
+# This function takes in the committee-to-committee transactions (df_cc) and the committee and candidate dataframes. It returns df_cc with the recipient committee name, the sender committee ID, and the ID of a candidate sender, all found through FEC IDs.
+# Every ID join keeps the first row for each ID, so no transactions are duplicated. Senders without a usable ID are matched by name with fuzzy_index, but only when the match is nearly exact.
+# If a cache folder is given, name matches are kept there between runs (see extract_cached()).
+
+def resolve_cc(df_cc, df_committee, df_candidate, cache=None):
+
+    recipient_keys = encode_ids(df_cc.id_recipient)
+
+    other_keys = encode_ids(df_cc.id_other)
+
+    # The recipient is the committee that filed the transaction.
+
+    recipient = take(df_committee.committee, lookup(recipient_keys, df_committee.id_committee))
+
+    # The other ID is either a committee or a candidate.
+
+    sender_position = lookup(other_keys, df_committee.id_committee)
+
+    candidate_position = lookup(other_keys, df_candidate.id_candidate)
+
+    id_sender = take(df_committee.id_committee, sender_position)
+
+    id_candidate = take(df_candidate.id_candidate, candidate_position)
+
+    result = df_cc.assign(recipient=recipient, id_sender=id_sender, id_candidate=id_candidate)
+
+    # Fall back on fuzzy matching the sender name for committees and candidates that have no usable ID.
+
+    no_id = result.id_sender.isna() & result.id_candidate.isna() & result.sender.notna()
+
+    # fuzzywuzzy is only needed here, so it isn't imported with the ID lookups (e.g., by party_scores.py).
+
+    from .fuzzy_index import extract_cached
+
+    committee_senders = result[no_id & ~result.entity.isin(PEOPLE)].sender
+
+    if not committee_senders.empty:
+
+        matches = extract_cached(committee_senders, df_committee.committee, cache, 'committee_matches')
+
+        matches = matches[matches.score >= MATCH_SCORE]
+
+        result.loc[matches.index, 'id_sender'] = df_committee.id_committee.reindex(matches.position).values
+
+    candidate_senders = result[no_id & (result.entity == 'Candidate')]
+
+    if not candidate_senders.empty and 'first_last' in result:
+
+        matches = extract_cached(candidate_senders.first_last, df_candidate.first_last, cache, 'candidate_name_matches')
+
+        matches = matches[matches.score >= MATCH_SCORE]
+
+        result.loc[matches.index, 'id_candidate'] = df_candidate.id_candidate.reindex(matches.position).values
+
+    return result
+
+# resolve_party()
+# This function takes in df_cc after resolve_cc() and the committee and candidate dataframes. It returns the party of each transaction's recipient, found through IDs:
+# the party of the candidate whose principal campaign committee is the recipient, else the party of the candidate the recipient committee is registered to, else the party of the recipient committee itself. A candidate party of "Unknown" counts as no party.
+
+def resolve_party(df_cc, df_committee, df_candidate):
+
+    recipient_keys = encode_ids(df_cc.id_recipient)
+
+    committee_position = lookup(recipient_keys, df_committee.id_committee)
+
+    # Candidates by their principal campaign committee. If a committee is listed for more than one candidate, the first is used.
+
+    principal_party = take(df_candidate.party_candidate, lookup(recipient_keys, df_candidate.id_committee))
+
+    # Candidates by the candidate ID in the committee file.
+
+    registered_keys = encode_ids(take(df_committee.id_candidate, committee_position))
+
+    registered_party = take(df_candidate.party_candidate, lookup(registered_keys, df_candidate.id_candidate))
+
+    committee_party = take(df_committee.party, committee_position)
+
+    # The party columns are categorical in the saved dataframes (see schema.py), with different categories, so combine them as plain values.
+    # Blank candidate parties were filled with "Unknown" in process_candidates(), so treat them as missing and let the next source fill them.
+
+    party = pd.Series(principal_party, index=df_cc.index, dtype='object').replace('Unknown', np.nan)
+
+    party = party.fillna(pd.Series(registered_party, index=df_cc.index, dtype='object').replace('Unknown', np.nan))
+
+    party = party.fillna(pd.Series(committee_party, index=df_cc.index, dtype='object'))
+
+    return party
@@ -0,0 +1,54 @@
+# This module picks a consistent subset of committees for quick test builds of the pipeline (see the --sample option of process_data.py).
+# Committees are picked by a hash of their FEC ID, so the same fraction always picks the same committees, on any machine and for any cycle, and a smaller fraction picks a subset of a larger one.
+# Every transaction a picked committee reported is kept, so refunds are matched exactly as in a full build (see remove_invalid()), and the cleaned and merged columns of those committees' rows are the same as the full build's, along with each contribution's beneficiary (id_beneficiary and beneficiary).
+# The columns that compare rows across committees are only approximate, since the rows of the other committees are left out:
+#   donor_id: names are matched within blocks of zip code and last name, and the names of other committees' donors can join or split a donor (see donors.py).
+#   employer_canonical and occupation_canonical: which values are common is counted over the sampled rows only (see canonical.py).
+#   conduit_copy and df_earmarks: a conduit's copy is only found if its beneficiary was sampled too (see earmarks.py).
+#   df_scores: the scores only spread through the sampled transactions (see party_scores.py).
+
+import hashlib
+import numpy as np
+import pandas as pd
+
+# id_hash()
+# This function takes in an FEC ID and returns a number between 0 and 1 from a hash of it.
+
+def id_hash(fec_id):
+
+    return int.from_bytes(hashlib.md5(str(fec_id).encode('utf-8')).digest()[:8], 'big') / 2 ** 64
+
+# in_sample()
+# This function takes in a column of committee IDs and a fraction of committees to keep (e.g., 0.01). It returns a boolean array that is True for the rows of the picked committees.
+# Each distinct ID is hashed only once. Missing IDs are never picked.
+
+def in_sample(ids, fraction):
+
+    codes, uniques = pd.factorize(ids)
+
+    picked = np.array([id_hash(fec_id) < fraction for fec_id in uniques] + [False], dtype='bool')
+
+    # Missing IDs have the code -1, which picks the False at the end.
+
+    return picked[codes]
+
+# sample_rows()
+# This function takes in a dataframe of raw transactions, the column with the committee that reported each one, and a fraction of committees to keep. It returns the transactions reported by the picked committees.
+
+def sample_rows(df, committee, fraction):
+
+    return df[in_sample(df[committee], fraction)]
+
+# sample_cc()
+# This function takes in a dataframe of raw committee-to-committee transactions and a fraction of committees to keep. It returns the transactions to the picked committees and the transactions from them.
+# Refunds are matched by recipient, sender name, and amount, so a transaction from a picked committee is kept along with every other transaction from the same sender name to the same recipient. That way each of its refunds is kept with it, even if the refund doesn't list the sender's ID.
+
+def sample_cc(df_cc, fraction):
+
+    received = in_sample(df_cc.id_recipient, fraction)
+
+    pairs = pd.MultiIndex.from_frame(df_cc[['id_recipient', 'name_full']])
+
+    sent = pairs.isin(pairs[in_sample(df_cc.id_other, fraction)])
+
+    return df_cc[received | sent]
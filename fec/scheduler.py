@@ -0,0 +1,198 @@
+# This module runs the stages of the pipeline in process_data.py as a dependency graph.
+# Each stage runs in a worker process as soon as the stages it depends on are done and a process is free, so independent stages (e.g., the five FEC source files) run at the same time.
+
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .checkpoint import stage_key, checkpoint_path, load_checkpoint, run_checkpointed
+from .metrics import measure
+from .parallel import run_pooled, split_workers
+
+# stage_parts()
+# This function takes in a stage, which is a (function, list of stage names) pair or a (function, list of stage names, list of input files) triple. It returns all three parts.
+
+def stage_parts(stage):
+
+    func, needs, files = (tuple(stage) + ([],))[:3]
+
+    return func, needs, files
+
+# check_stages()
+# This function takes in a dictionary of stages (see run_stages()) and returns the stage names in an order where every stage comes after the stages it depends on.
+# It raises a ValueError if a stage depends on a stage that doesn't exist or if the dependencies form a cycle.
+
+def check_stages(stages):
+
+    order = []
+
+    remaining = {name: stage_parts(stage)[1] for name, stage in stages.items()}
+
+    while remaining:
+
+        ready = [name for name, needs in remaining.items() if all(need in order for need in needs)]
+
+        if not ready:
+
+            missing = sorted({need for needs in remaining.values() for need in needs if need not in stages})
+
+            raise ValueError('Stages with missing dependencies ' + str(missing) + ' or a dependency cycle: ' + str(sorted(remaining)))
+
+        for name in ready:
+
+            order.append(name)
+
+            del remaining[name]
+
+    return order
+
+# run_stages()
+# This function takes in a dictionary of stages, a number of processes, and a number of workers for each stage. Each stage is a (function, list of stage names) pair, and the function is called with the results of those stages as arguments, in that order. A stage can also list the files it reads as a third item, for its checkpoint.
+# It returns a dictionary of the results of the stages in outputs (or every stage) by stage name. Each stage only depends on its inputs, so the results are the same no matter which stage finishes first.
+# Use functools.partial() to give a stage any other arguments. The functions must be importable (not defined inside another function) so they can be sent to worker processes.
+# If processes is 1, the stages run one after another in this process, in the order from check_stages().
+# Each stage runs inside worker_pool(workers) (see parallel.py), so all of its parallel_apply() and parallel_map() calls share one pool of worker processes.
+# If processes or workers is None, split_workers() picks it so that the stages running at the same time and their workers don't use more than the cores there are.
+# Peak memory grows with the number of stages running at the same time: each holds its inputs and result (e.g., a cycle's individual contributions), plus a pickled copy of them while they are sent to and from its process.
+# With 1 process, nothing is pickled and only one stage's dataframes are being built at a time.
+# If a checkpoint folder is given, each stage's result is saved there (see checkpoint.py). A stage with a checkpoint for its current key is loaded instead of run, and only when its result is needed.
+# The result of a stage that isn't in outputs is dropped as soon as every stage that needs it has started, so a graph of several cycles never holds every intermediate dataframe at once.
+# If a stats dictionary is given, it is filled with the wall time, CPU time, rows, and peak memory of every stage that runs (see measure() in metrics.py), and stages loaded from a checkpoint are marked as such.
+# Measured stages each run in a fresh worker process so their peak memory is their own. With 1 process, the peak memory is that of this process so far.
+
+def run_stages(stages, processes=None, workers=None, checkpoints=None, outputs=None, stats=None):
+
+    order = check_stages(stages)
+
+    processes, workers = split_workers(processes, workers)
+
+    outputs = list(order if outputs is None else outputs)
+
+    # Find the stages that already have a valid checkpoint.
+
+    paths = {}
+
+    keys = {}
+
+    for name in order:
+
+        func, needs, files = stage_parts(stages[name])
+
+        if checkpoints is not None:
+
+            keys[name] = stage_key(func, files, [keys[need] for need in needs], checkpoints)
+
+            paths[name] = checkpoint_path(checkpoints, name, keys[name])
+
+    saved = {name for name, path in paths.items() if os.path.exists(path)}
+
+    # Only run the stages that are needed for the outputs and don't have a checkpoint. Work backwards from the outputs.
+
+    needed = set(outputs)
+
+    for name in reversed(order):
+
+        if name in needed and name not in saved:
+
+            needed.update(stage_parts(stages[name])[1])
+
+    to_run = [name for name in order if name in needed and name not in saved]
+
+    results = {}
+
+    dependents = {name: [other for other in to_run if name in stage_parts(stages[other])[1]] for name in order}
+
+    def release(started):
+
+        for name in list(results):
+
+            if name not in outputs and all(other in started for other in dependents[name]):
+
+                del results[name]
+
+    def inputs(name):
+
+        for need in stage_parts(stages[name])[1]:
+
+            if need not in results:
+
+                results[need] = load_checkpoint(paths[need])
+
+        return [results[need] for need in stage_parts(stages[name])[1]]
+
+    def task(name):
+
+        func = partial(run_pooled, workers, stage_parts(stages[name])[0])
+
+        func = partial(run_checkpointed, func, paths[name]) if checkpoints is not None else func
+
+        return partial(measure, func) if stats is not None else func
+
+    def finish(name, result):
+
+        if stats is not None:
+
+            result, stats[name] = result
+
+        results[name] = result
+
+    if stats is not None:
+
+        stats.update({name: {'checkpoint': True} for name in order if name in saved and name in needed})
+
+    if processes == 1:
+
+        for position, name in enumerate(to_run):
+
+            finish(name, task(name)(*inputs(name)))
+
+            release(to_run[:position + 1])
+
+    elif to_run:
+
+        with ProcessPoolExecutor(max_workers=min(processes, len(to_run)), max_tasks_per_child=1 if stats is not None else None) as pool:
+
+            running = {}
+
+            finished = set(saved)
+
+            while not set(to_run) <= finished:
+
+                # Start the stages whose inputs are ready, in the order from check_stages(), while there are free processes. Stages wait here rather than in the pool, so their inputs aren't pickled until they start.
+
+                started = set(running.values())
+
+                for name in to_run:
+
+                    needs = stage_parts(stages[name])[1]
+
+                    if len(running) < processes and name not in finished and name not in started and all(need in finished for need in needs):
+
+                        running[pool.submit(task(name), *inputs(name))] = name
+
+                release(finished | set(running.values()))
+
+                # Wait for at least one stage to finish. An error in a stage is raised here, after the stages that already finished have saved their checkpoints.
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+
+                    name = running.pop(future)
+
+                    finish(name, future.result())
+
+                    finished.add(name)
+
+    # List the stats in the order from check_stages().
+
+    if stats is not None:
+
+        stats.update({name: stats.pop(name) for name in order if name in stats})
+
+    for name in outputs:
+
+        if name not in results:
+
+            results[name] = load_checkpoint(paths[name])
+
+    return {name: results[name] for name in order if name in outputs}
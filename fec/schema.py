@@ -0,0 +1,105 @@
+# This module defines the compact in-memory schema of the five cleaned dataframes (df_committee, df_individuals, df_candidate, df_expenditures, and df_cc).
+# Columns with few distinct values are categorical, amounts are whole cents, zip codes and image numbers are unsigned integers, and free text is stored as Arrow strings when pyarrow is installed.
+
+import pandas as pd
+
+# Use Arrow-backed strings for free text if pyarrow is installed. Otherwise, keep plain Python strings.
+
+try:
+    import pyarrow
+    TEXT = 'string[pyarrow]'
+except ImportError:
+    TEXT = 'object'
+
+# Columns that are codes mapped to full words (see fec_codes.py), states, or IDs and names that repeat across many transactions.
+
+CATEGORIES = ['designation', 'type', 'party', 'category', 'frequency', 'amendment', 'report', 'election', 'entity',
+              'party_candidate', 'election_year', 'election_state', 'race', 'district', 'incumbent', 'status',
+              'state', 'id_committee', 'id_recipient', 'id_candidate', 'id_sender', 'recipient', 'party_rule',
+              'employer_canonical', 'occupation_canonical', 'id_beneficiary', 'beneficiary']
+
+# Columns of digits and the smallest unsigned integer type that holds them. Missing or malformed values become <NA>.
+# Zip codes lose their leading zeros, so use str(zip).zfill(5) to display them.
+
+UNSIGNED = {'zip': 'UInt32', 'zip2': 'UInt16', 'image': 'UInt64', 'fec_record': 'UInt64'}
+
+# to_unsigned()
+# This function takes in a column of digits (as strings or numbers) and a nullable unsigned integer type. It returns the column as that type, with <NA> for anything that isn't a whole number.
+# The digits are converted directly rather than through floats, so 18-digit image numbers keep every digit.
+
+def to_unsigned(values, dtype):
+
+    values = values.astype('str').str.strip().str.replace(r'\.0$', '', regex=True)
+
+    valid = values.str.fullmatch(r'\d+').fillna(False).astype('bool')
+
+    result = pd.Series(pd.NA, index=values.index, dtype=dtype)
+
+    result[valid] = values[valid].astype('uint64').values
+
+    return result
+
+# to_cents()
+# This function takes in a column of dollar amounts and returns them as whole cents in a nullable integer column.
+
+def to_cents(amounts):
+
+    return (amounts.astype('float64') * 100).round().astype('Int64')
+
+# compact()
+# This function takes in one of the cleaned dataframes and returns it with the compact schema above. Any other text column becomes a TEXT column.
+# Columns listed in text are kept as text (e.g., the candidate zip codes, which are often abbreviated to three digits or fewer).
+
+def compact(df, text=()):
+
+    columns = {}
+
+    for column in df.columns:
+
+        values = df[column]
+
+        if column in text:
+
+            columns[column] = values.astype(TEXT)
+
+        elif column in CATEGORIES:
+
+            columns[column] = values.astype('category')
+
+        elif column in UNSIGNED:
+
+            columns[column] = to_unsigned(values, UNSIGNED[column])
+
+        elif column == 'amount':
+
+            columns[column] = to_cents(values)
+
+        elif column == 'date':
+
+            columns[column] = pd.to_datetime(values, errors='coerce')
+
+        elif values.dtype == 'object' or pd.api.types.is_string_dtype(values.dtype):
+
+            columns[column] = values.astype(TEXT)
+
+    return df.assign(**columns)
+
+# concat()
+# This function takes in a list of dataframes with the compact schema (e.g., stored data and newly cleaned rows) and returns them as one dataframe with a new index.
+# pd.concat() turns categorical columns with different categories into plain objects, so the categories are combined first to keep every categorical column categorical.
+
+def concat(frames):
+
+    frames = list(frames)
+
+    for column in frames[0].columns:
+
+        if any(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames if column in frame):
+
+            categories = pd.Index(pd.concat([pd.Series(frame[column].dropna().unique(), dtype='object') for frame in frames if column in frame])).unique()
+
+            dtype = pd.CategoricalDtype(categories)
+
+            frames = [frame.assign(**{column: frame[column].astype('object').astype(dtype)}) if column in frame else frame for frame in frames]
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,219 @@
+# This module updates the finalized individual contribution, expenditure, and committee-to-committee dataframes with new FEC filings instead of rebuilding them from scratch.
+# The raw rows behind each dataframe are stored, new rows are matched to them by FEC record number (fec_record) and transaction ID (id_transaction), and only the committees with changes are cleaned again.
+# Refunds are matched within a committee (see remove_invalid()), so cleaning the affected committees again gives the same result as a full rebuild.
+#
+# Each election cycle is updated separately, in its own folder (see datasets.py). The latest cycle in CYCLES is used unless --cycle is given.
+#
+# Usage, after a full run of process_data.py:
+#     python incremental.py individuals --seed                  (once: store the rows of the current bulk file)
+#     python incremental.py individuals new_filings.txt         (add new and amended rows)
+#     python incremental.py individuals indiv20.zip --full      (compare a newer complete bulk file with the stored rows, which also removes deleted rows)
+#     python incremental.py cc new_filings.txt --cycle 2018     (add new and amended rows to an earlier cycle)
+#     python incremental.py individuals --seed --input D:/fec    (use the same folders as process_data.py --input D:/fec)
+
+import os
+import argparse
+import pandas as pd
+from fec.read_fec import read_fec, archive_path
+from fec.schema import compact, concat
+from fec.datasets import partition_path, save_data, read_data
+from fec.parallel import run_pooled
+from fec.party_scores import party_scores
+from fec.donors import assign_donors, donor_blocks
+from fec.canonical import COLUMNS as CANONICAL_COLUMNS, canonicalize
+from fec.earmarks import COLUMNS as EARMARK_COLUMNS, trace_earmarks, earmark_totals
+from fec.pipeline import (FEC_PATH, CYCLES, OUTPUT_PATH, CACHE_PATH, WORKERS, load_mappings, cycle_cache, clean_individual_rows, clean_expenditure_rows, clean_cc_rows,
+                          merge_individuals, merge_expenditures, merge_cc, find_parties, assign_parties)
+
+# Set the default folder for the stored raw rows. Each cycle's rows are stored in their own subfolder.
+
+RAW_PATH = FEC_PATH + 'raw_rows/'
+
+# The dataframe each source file updates and the column with the committee that reported each transaction.
+
+DATASETS = {'individuals': {'output': 'df_individuals', 'committee': 'id_committee'},
+            'expenditures': {'output': 'df_expenditures', 'committee': 'id_committee'},
+            'cc': {'output': 'df_cc', 'committee': 'id_recipient'}}
+
+# read_rows()
+# This function takes in the path to a bulk file (or its zip archive) and the name of its schema. It returns all of its rows, with each FEC record only once.
+
+def read_rows(path, source):
+
+    rows = pd.concat(read_fec(path, source), ignore_index=True)
+
+    return rows.drop_duplicates(subset='fec_record', keep='last')
+
+# seed()
+# This function takes in the name of a source, an election cycle, the path to its bulk file (by default, the archive for that cycle in the input folder), and the folders with the archives and for the stored raw rows. It stores the file's rows as the starting point for later updates.
+# Run it with the same file the finalized dataframes were built from.
+
+def seed(source, cycle, path=None, input_path=FEC_PATH, raw_path=RAW_PATH):
+
+    rows = read_rows(path or archive_path(input_path, source, cycle), source)
+
+    save_data(rows, raw_path, cycle, source)
+
+    return len(rows)
+
+# find_changes()
+# This function takes in the stored raw rows, the new raw rows, the name of the committee column, and whether the new rows are a complete bulk file. It returns the updated raw rows, the rows that were added, and the rows that were replaced or removed.
+# For a file of new filings, a row replaces any stored row with the same FEC record number, and an amended or terminating row (amendment 'A' or 'T') also replaces stored rows from the same committee with the same transaction ID.
+# For a complete bulk file, the file is the new set of rows: records that aren't stored yet were added, and stored records that are no longer in the file were amended away or removed.
+
+def find_changes(stored, new, committee, full=False):
+
+    if full:
+
+        added = new[~new.fec_record.isin(stored.fec_record)]
+
+        removed = stored[~stored.fec_record.isin(new.fec_record)]
+
+        return new, added, removed
+
+    amended = new[new.amendment.isin(['A', 'T'])]
+
+    same_transaction = (pd.MultiIndex.from_frame(stored[[committee, 'id_transaction']])
+                        .isin(pd.MultiIndex.from_frame(amended[[committee, 'id_transaction']])) & stored.id_transaction.notna().values)
+
+    replaced = stored.fec_record.isin(new.fec_record).values | same_transaction
+
+    rows = pd.concat([stored[~replaced], new], ignore_index=True)
+
+    return rows, new, stored[replaced]
+
+# clean_rows()
+# This function takes in the name of a source, its raw rows, the code mappings, the committee and candidate dataframes, the folder for fuzzy name matches, and a number of workers. It returns the rows cleaned and merged exactly as process_data.py does.
+
+def clean_rows(source, rows, mappings, df_committee, df_candidate, cache, workers=None):
+
+    if source == 'individuals':
+
+        return merge_individuals(df_committee, clean_individual_rows([rows], mappings, workers))
+
+    if source == 'expenditures':
+
+        return merge_expenditures(df_committee, clean_expenditure_rows([rows], mappings, workers))
+
+    df_cc = merge_cc(df_committee, df_candidate, clean_cc_rows([rows], mappings, workers), cache)
+
+    return assign_parties(find_parties(df_committee, df_candidate, df_cc, cache))
+
+# update()
+# This function takes in the name of a source, the path to a file of new rows, its election cycle, whether it is a complete bulk file, a number of workers, and the folders with the finalized dataframes, the stored raw rows, and the fuzzy name matches. It updates that cycle's stored raw rows and finalized dataframe, and returns a summary of the changes.
+# Only the committees with added, amended, or removed rows are cleaned, refund-matched, and merged again. Every other committee's rows are kept as they are.
+# For individual contributions, the donors, canonical values, and earmarks are also only found again for the rows they could change, and the rest are merged back as they are.
+# The party scores depend on the whole committee-to-committee graph, so they are recomputed after any change to it (which takes seconds).
+
+def update(source, path, cycle, full=False, workers=WORKERS, output_path=OUTPUT_PATH, raw_path=RAW_PATH, cache_path=CACHE_PATH):
+
+    committee = DATASETS[source]['committee']
+
+    if not os.path.exists(partition_path(raw_path, cycle, source)):
+
+        raise FileNotFoundError('No stored rows for ' + source + ' in ' + str(cycle) + '. Run: python incremental.py ' + source + ' --seed --cycle ' + str(cycle))
+
+    rows, added, removed = find_changes(read_data(raw_path, cycle, source), read_rows(path, source), committee, full)
+
+    affected = pd.Index(pd.concat([added[committee], removed[committee]]).dropna().unique())
+
+    summary = {'source': source, 'cycle': cycle, 'added': len(added), 'removed': len(removed), 'committees': len(affected)}
+
+    if affected.empty:
+
+        return summary
+
+    # Clean every row of the affected committees again, with one pool of worker processes, and replace their rows in the finalized dataframe.
+
+    cache = cycle_cache(cycle, cache_path)
+
+    df_committee = read_data(output_path, cycle, 'df_committee')
+
+    df_candidate = read_data(output_path, cycle, 'df_candidate')
+
+    cleaned = run_pooled(workers, clean_rows, source, rows[rows[committee].isin(affected)], load_mappings(), df_committee, df_candidate, cache, workers)
+
+    stored = read_data(output_path, cycle, DATASETS[source]['output'])
+
+    changed = stored[committee].isin(affected)
+
+    if source == 'individuals':
+
+        # Donors are matched within blocks of zip code and last name (see donors.py), so only the blocks that had rows added or removed are matched again.
+
+        blocks = pd.concat([donor_blocks(stored[changed]), donor_blocks(cleaned)]).unique()
+
+        kept = stored[~changed]
+
+        regroup = donor_blocks(kept).isin(blocks).values
+
+        regrouped = assign_donors(concat([kept[regroup].drop(columns='donor_id'), compact(cleaned)]))
+
+        # A conduit's copy is matched to a row its beneficiary reported, so the copies earmarked for an affected committee are traced again along with the regrouped rows.
+
+        untouched = kept[~regroup]
+
+        retrace = untouched.id_beneficiary.isin(affected).values
+
+        rest = untouched[~retrace]
+
+        updated = concat([untouched[retrace], regrouped]).drop(columns=list(CANONICAL_COLUMNS.values()) + EARMARK_COLUMNS)
+
+        # The other rows still count toward which employers and occupations are common (see canonical.py), and their beneficiaries' own rows toward the conduit copies. Fuzzy matches are reused from the cache.
+
+        updated = canonicalize(updated, cache=cache, others=rest)
+
+        updated = trace_earmarks(df_committee, df_candidate, updated, cache, reported=rest)
+
+        stored = concat([rest, updated.astype({'id_beneficiary': 'category', 'beneficiary': 'category'})])
+
+    else:
+
+        stored = concat([stored[~changed], compact(cleaned)])
+
+    # Save the finalized dataframe before the raw rows, so an interrupted update can be run again with the same file.
+
+    save_data(stored, output_path, cycle, DATASETS[source]['output'])
+
+    if source == 'individuals':
+
+        save_data(compact(earmark_totals(stored.assign(amount=stored.amount / 100))), output_path, cycle, 'df_earmarks')
+
+    if source == 'cc':
+
+        # The stored amounts are in cents (see schema.py).
+
+        df_scores = party_scores(df_committee, df_candidate, stored.assign(amount=stored.amount / 100))
+
+        save_data(compact(df_scores), output_path, cycle, 'df_scores')
+
+    save_data(rows, raw_path, cycle, source)
+
+    return summary
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Update the finalized FEC dataframes with new filings.')
+    parser.add_argument('source', choices=list(DATASETS))
+    parser.add_argument('path', nargs='?', help='bulk file or zip archive with the new rows (default: the archive for the cycle in the input folder)')
+    parser.add_argument('--cycle', type=int, default=CYCLES[-1], help='election cycle to update (default: the latest in CYCLES)')
+    parser.add_argument('--full', action='store_true', help='the file is a complete bulk file, so stored rows missing from it are removed')
+    parser.add_argument('--seed', action='store_true', help='store the rows of the file as the starting point for updates')
+    parser.add_argument('--input', default=FEC_PATH, help='folder with the bulk data zip archives')
+    parser.add_argument('--output', help='folder with the finalized dataframes (default: cleaned_data/ in the input folder)')
+    parser.add_argument('--cache', help='folder for the fuzzy name matches (default: cache/ in the input folder)')
+    parser.add_argument('--raw', help='folder for the stored raw rows (default: raw_rows/ in the input folder)')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='worker processes for cleaning the affected committees (default: all the cores, or FEC_WORKERS if it is set)')
+    args = parser.parse_args()
+
+    raw_path = args.raw or os.path.join(args.input, 'raw_rows')
+
+    if args.seed:
+
+        print(seed(args.source, args.cycle, args.path, args.input, raw_path), 'rows stored')
+
+    else:
+
+        print(update(args.source, args.path or archive_path(args.input, args.source, args.cycle), args.cycle, args.full, args.workers,
+                     output_path=args.output or os.path.join(args.input, 'cleaned_data'), raw_path=raw_path, cache_path=args.cache or os.path.join(args.input, 'cache')))
@@ -16,24 +16,28 @@ from folium.plugins import MarkerCluster
 from folium.features import DivIcon
 import os
 import webbrowser
+from fec.pipeline import CYCLES, OUTPUT_PATH
+from fec.datasets import read_data, read_map_data, save_map_data
 # from bokeh.plotting import figure, show, output_file
 # from bokeh.tile_providers import get_provider, Vendors
 
 pd.set_option('expand_frame_repr', False)
 pd.set_option('display.max_columns', 40)
 
-# Read in the pickled dataframes from process_data.py.
+# Read in one cycle of the finalized dataframes from process_data.py (see datasets.py), and the map data saved by an earlier run of this script.
 
-df_committee = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_committee')
-df_individuals = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_individuals')
-df_expenditures = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_expenditures')
-df_candidate = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_candidate')
-df_cc = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/df_cc')
-# zips = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zips')
-zip_points = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zip_points')
-zip_bounds = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zip_bounds')
-state_abbreviations = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/state_abbreviations')
-sf_states = pd.read_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/sf_states')
+CYCLE = CYCLES[-1]
+
+df_committee = read_data(OUTPUT_PATH, CYCLE, 'df_committee')
+df_individuals = read_data(OUTPUT_PATH, CYCLE, 'df_individuals')
+df_expenditures = read_data(OUTPUT_PATH, CYCLE, 'df_expenditures')
+df_candidate = read_data(OUTPUT_PATH, CYCLE, 'df_candidate')
+df_cc = read_data(OUTPUT_PATH, CYCLE, 'df_cc')
+# zips = read_map_data(OUTPUT_PATH, 'zips')
+zip_points = read_map_data(OUTPUT_PATH, 'zip_points')
+zip_bounds = read_map_data(OUTPUT_PATH, 'zip_bounds')
+state_abbreviations = read_map_data(OUTPUT_PATH, 'state_abbreviations')
+sf_states = read_map_data(OUTPUT_PATH, 'sf_states')
 
 ############
 # SHAPEFILES
@@ -61,7 +65,7 @@ sf_states = sf_states[['name', 'geometry']]
 sf_states = sf_states[~sf_states.name.isin(['United States Virgin Islands', 'Commonwealth of the Northern Mariana Islands', 'Guam', 'American Samoa', 'Puerto Rico'])]
 
 # Save the state shape files.
-# sf_states.to_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/sf_states')
+# save_map_data(sf_states, OUTPUT_PATH, 'sf_states')
 
 # Scrape the list of state abbreviations from the web.
 
@@ -95,7 +99,7 @@ for n in range(len(state_abbvs.values)):
 
 state_abbreviations = state_abbreviations.dropna()
 
-# state_abbreviations.to_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/state_abbreviations')
+# save_map_data(state_abbreviations, OUTPUT_PATH, 'state_abbreviations')
 
 state_mapping = dict(zip(state_abbreviations.abbreviation, state_abbreviations.state))
 
@@ -133,7 +137,7 @@ for n in range(len(zips.zip)):
 
 # Save the state shapes.
 
-sf_states.to_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/sf_states')
+save_map_data(sf_states, OUTPUT_PATH, 'sf_states')
 
 ###########
 # ZIP CODES
@@ -225,13 +229,13 @@ zips = zips.assign(bounds=zips.apply(lambda x: x['geometry'].bounds, axis='colum
 
 zip_bounds = zips[['zip', 'state', 'city', 'bounds']]
 
-# Save the zip shapefiles along with the cleaned data.
+# Save the zip shapefiles along with the cleaned data. The bounds of each zip code are saved as a list of four numbers.
 
-zips.to_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zips')
+save_map_data(zips, OUTPUT_PATH, 'zips')
 
-zip_bounds.to_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zip_bounds')
+save_map_data(zip_bounds, OUTPUT_PATH, 'zip_bounds')
 
-zip_points.to_pickle('C:/Users/Gabriel/Desktop/FEC/cleaned_data/zip_points')
+save_map_data(zip_points, OUTPUT_PATH, 'zip_points')
 
 ###########################
 # TEST PLOTTING WITH FOLIUM
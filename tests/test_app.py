@@ -0,0 +1,63 @@
+# Tests for how app.py loads one cycle and one PAC from the finalized dataframes.
+
+import pandas as pd
+import pytest
+from fec.datasets import save_data
+
+pytest.importorskip('dash')
+pytest.importorskip('dash_bootstrap_components')
+
+import app
+
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+
+    df_individuals = pd.DataFrame({'beneficiary': pd.Categorical(['Pac A', 'Pac B', 'Pac B']), 'conduit_copy': [False, True, False],
+                                   'first_last': ['John Smith', 'Jane Doe', 'Bob Roe'], 'city': ['Boston'] * 3, 'state': ['MA'] * 3,
+                                   'zip': ['02134'] * 3, 'amount': [10.0, 20.0, 30.0], 'date': pd.to_datetime(['2020-01-01'] * 3), 'employer': ['Acme'] * 3})
+
+    df_cc = pd.DataFrame({'sender': pd.Categorical(['Pac A', 'Pac B']), 'recipient': pd.Categorical(['Pac B', 'Pac A']), 'city': ['Boston'] * 2, 'state': ['MA'] * 2,
+                          'zip': ['02134'] * 2, 'amount': [5.0, 6.0], 'date': pd.to_datetime(['2020-01-01'] * 2), 'image': ['1', '2']})
+
+    save_data(df_individuals, str(tmp_path), 2020, 'df_individuals')
+
+    save_data(df_cc, str(tmp_path), 2020, 'df_cc')
+
+    monkeypatch.setattr(app, 'DATA_PATH', str(tmp_path))
+
+    app.pac_choices.cache_clear()
+
+    app.pac_data.cache_clear()
+
+    yield str(tmp_path)
+
+    app.pac_choices.cache_clear()
+
+    app.pac_data.cache_clear()
+
+# pac_choices()
+
+def test_pac_choices(data_path):
+
+    assert app.pac_choices(2020) == [{'label': 'Pac A', 'value': 'Pac A'}, {'label': 'Pac B', 'value': 'Pac B'}]
+
+# pac_data()
+
+def test_pac_data_reads_one_pac(data_path):
+
+    df_individuals, df_cc = app.pac_data('Pac B', 2020)
+
+    # Only the PAC's rows and the columns map_pac() uses are read, and the conduit's copies are left out.
+
+    assert list(df_individuals.amount) == [30.0]
+
+    assert 'employer' not in df_individuals and 'recipient' in df_individuals
+
+    assert list(df_cc.recipient.astype('object')) == ['Pac A']
+
+# update_pac_choices()
+
+def test_no_cycle_loads_nothing(data_path):
+
+    assert app.update_pac_choices(None) == []
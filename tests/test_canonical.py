@@ -0,0 +1,65 @@
+# Tests for the canonical employers and occupations in fec/canonical.py.
+
+import pandas as pd
+from fec.canonical import canonical_values, canonicalize, value_keys
+
+
+# value_keys()
+
+def test_value_keys():
+
+    keys = value_keys(pd.Series(['Acme, Inc.', 'The Acme Company', 'AT&T', 'The Company']), 'employer')
+
+    assert list(keys) == ['ACME', 'ACME', 'AT AND T', 'THE COMPANY']
+
+    # Legal words are only left out of employers.
+
+    assert value_keys(pd.Series(['Co-Owner']), 'occupation')[0] == 'CO OWNER'
+
+# canonical_values()
+
+def test_canonical_values_fuzzy_fallback():
+
+    values = pd.Series(['Google'] * 3 + ['GOOGLE INC'] * 2 + ['Gogle', 'Zebra Farms', None])
+
+    canonical = canonical_values(values, 'employer', {})
+
+    # Google is common, so it is named by its most common spelling. The misspelling is rare and close enough to join it, and the unrelated rare employer keeps its own name.
+
+    assert list(canonical[:6]) == ['Google'] * 6
+
+    assert canonical[6] == 'Zebra Farms'
+
+    assert pd.isna(canonical[7])
+
+def test_canonical_values_aliases_come_first():
+
+    values = pd.Series(['Self'] * 5 + ['Self Employed', 'self-employed', 'Selfe'])
+
+    canonical = canonical_values(values, 'employer', {'SELF': 'Self-Employed', 'SELF EMPLOYED': 'Self-Employed'})
+
+    # Aliased keys get their canonical name however rare they are, and are never matched to (or matched by) other keys.
+
+    assert list(canonical[:7]) == ['Self-Employed'] * 7
+
+    assert canonical[7] == 'Selfe'
+
+def test_canonical_values_others_count():
+
+    values = pd.Series(['Microsft', 'Microsoft'])
+
+    # Alone, both are rare and keep their spelling. Rows that aren't canonicalized here can make a key common.
+
+    assert list(canonical_values(values, 'employer', {})) == ['Microsft', 'Microsoft']
+
+    assert list(canonical_values(values, 'employer', {}, others=pd.Series(['MICROSOFT'] * 5, dtype='category'))) == ['MICROSOFT', 'MICROSOFT']
+
+# canonicalize()
+
+def test_canonicalize_alias_table():
+
+    df = canonicalize(pd.DataFrame({'employer': ['SELF EMPLOYED', 'Retd'], 'occupation': ['Retired', 'RETIREE']}))
+
+    assert list(df.employer_canonical) == ['Self-Employed', 'Retired']
+
+    assert list(df.occupation_canonical) == ['Retired', 'Retired']
@@ -0,0 +1,97 @@
+# Tests for the stage keys in fec/checkpoint.py.
+
+import importlib.util
+from functools import partial
+import pytest
+from fec import checkpoint
+from fec.checkpoint import stage_key
+
+
+# load_stage()
+# Write a module of stage code to a new file in the folder that counts as the code of a stage, and return its stage() function.
+
+@pytest.fixture
+def load_stage(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(checkpoint, 'CODE_PATH', str(tmp_path))
+
+    modules = []
+
+    def load(text):
+
+        path = tmp_path / ('stage_' + str(len(modules)) + '.py')
+
+        path.write_text(text)
+
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+
+        module = importlib.util.module_from_spec(spec)
+
+        spec.loader.exec_module(module)
+
+        modules.append(module)
+
+        return module.stage
+
+    return load
+
+def key(func, tmp_path, files=(), upstream=()):
+
+    return stage_key(func, list(files), list(upstream), str(tmp_path / 'checkpoints'))
+
+STAGE = '''
+LIMIT = {'a': [1, 2]}
+
+def helper(x):
+
+    return x + 1
+
+def stage(x, scale=2):
+
+    return helper(x) * scale + len(LIMIT)
+'''
+
+def test_same_code_same_key(load_stage, tmp_path):
+
+    assert key(load_stage(STAGE), tmp_path) == key(load_stage(STAGE), tmp_path)
+
+@pytest.mark.parametrize('old, new', [('return x + 1', 'return x + 2'),
+                                      ('* scale +', '* scale -'),
+                                      ("[1, 2]}", "[1, 3]}"),
+                                      ("{'a': [1, 2]}", "{'a': [1], 2: []}"),
+                                      ('scale=2', 'scale=3')])
+def test_code_changes_key(load_stage, tmp_path, old, new):
+
+    # Changing the stage, a helper it calls, a module constant it uses, or a default argument each changes the key.
+
+    assert key(load_stage(STAGE), tmp_path) != key(load_stage(STAGE.replace(old, new)), tmp_path)
+
+def test_arguments_change_key(load_stage, tmp_path):
+
+    stage = load_stage(STAGE)
+
+    assert key(partial(stage, 1), tmp_path) != key(partial(stage, 2), tmp_path)
+
+    assert key(partial(stage, 1, scale=3), tmp_path) != key(partial(stage, 1), tmp_path)
+
+    # The number of workers doesn't change a stage's result.
+
+    assert key(partial(stage, 1, workers=4), tmp_path) == key(partial(stage, 1, workers=8), tmp_path)
+
+def test_inputs_change_key(load_stage, tmp_path):
+
+    stage = load_stage(STAGE)
+
+    path = tmp_path / 'input.txt'
+
+    path.write_text('one')
+
+    first = key(stage, tmp_path, [str(path)])
+
+    assert key(stage, tmp_path, [str(path)]) == first
+
+    path.write_text('three')
+
+    assert key(stage, tmp_path, [str(path)]) != first
+
+    assert key(stage, tmp_path, upstream=['a']) != key(stage, tmp_path, upstream=['b'])
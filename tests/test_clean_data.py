@@ -0,0 +1,150 @@
+# Tests for the cleaning functions in fec/clean_data.py.
+
+import pandas as pd
+from fec.clean_data import clean_names, parse_dates, remove_invalid, normalize_text, normalize_columns, concat_categorical
+
+
+# clean_names()
+
+def test_clean_names_without_middle_names():
+
+    # No name has a middle name, so the third word after the comma is missing in every row. This used to raise.
+
+    names = clean_names(pd.Series(['SMITH, JOHN', 'DOE,JANE', 'SMITH, JOHN']))
+
+    assert list(names['first']) == ['John', 'Jane', 'John']
+
+    assert list(names['last']) == ['Smith', 'Doe', 'Smith']
+
+    assert list(names['middle']) == ['', '', '']
+
+def test_clean_names_middle_and_missing():
+
+    names = clean_names(pd.Series(['SMITH, JOHN A', 'SMITH, JOHN MR.', None], index=[10, 20, 30]))
+
+    assert list(names.index) == [10, 20, 30]
+
+    assert list(names['middle'][:2]) == ['A', '']
+
+    assert list(names['first_last'][:2]) == ['John Smith', 'John Smith']
+
+    assert names.loc[30].isna().all()
+
+def test_clean_names_one_word_names():
+
+    # Every name is one word, so no name has a second word. This used to raise (e.g., for a committee whose contributors are all organizations).
+
+    names = clean_names(pd.Series(['ACTBLUE', 'WINRED', 'ACTBLUE']))
+
+    assert list(names['name_full']) == ['Actblue', 'Winred', 'Actblue']
+
+    assert list(names['first']) == ['Actblue', 'Winred', 'Actblue']
+
+    assert list(names['last']) == ['', '', '']
+
+# parse_dates()
+
+def test_parse_dates_digit_lengths():
+
+    # Eight digits are MMDDYYYY, six are MDYYYY, and floats lose their trailing '.0'.
+
+    dates = parse_dates(pd.Series(['01152020', 11152020.0, '152020']))
+
+    assert list(dates) == [pd.Timestamp('2020-01-15'), pd.Timestamp('2020-11-15'), pd.Timestamp('2020-01-05')]
+
+def test_parse_dates_seven_digits():
+
+    # Seven digits have a one-digit month when the first digit is 2 or 3, the day starts with 3 or 0, or the first two digits are not a month.
+
+    dates = parse_dates(pd.Series(['2152020', '1312020', '1052020', '1112020', '1012020']))
+
+    assert list(dates) == [pd.Timestamp('2020-02-15'), pd.Timestamp('2020-01-31'), pd.Timestamp('2020-10-05'),
+                           pd.Timestamp('2020-11-01'), pd.Timestamp('2020-10-01')]
+
+def test_parse_dates_slashes():
+
+    # The expenditure dates are MM/DD/YYYY. They used to be parsed with %M (minutes), which put every one of them in January.
+
+    dates = parse_dates(pd.Series(['12/25/2019', '3/5/2020', '07/04/2020']))
+
+    assert list(dates) == [pd.Timestamp('2019-12-25'), pd.Timestamp('2020-03-05'), pd.Timestamp('2020-07-04')]
+
+    assert (dates.dt.month != 1).all()
+
+def test_parse_dates_missing():
+
+    dates = parse_dates(pd.Series([None, float('nan'), 'garbage', '13/45/2020', '12345']))
+
+    assert dates.isna().all()
+
+    assert str(dates.dtype).startswith('datetime64')
+
+# normalize_text() and concat_categorical()
+
+def test_normalize_text_merges_values():
+
+    city = normalize_text(pd.Series(['BOSTON', 'boston', None, 'SALEM'], index=[5, 6, 7, 8]), 'title')
+
+    assert list(city.cat.categories) == ['Boston', 'Salem']
+
+    assert list(city.astype('object')[[5, 6, 8]]) == ['Boston', 'Boston', 'Salem']
+
+    assert pd.isna(city[7]) and list(city.index) == [5, 6, 7, 8]
+
+def test_concat_categorical_chunks():
+
+    raw = pd.DataFrame({'city': ['BOSTON', 'SALEM', 'boston', 'LOWELL', None], 'amount': [1.0, 2.0, 3.0, 4.0, 5.0]})
+
+    chunks = [normalize_columns(raw.iloc[:2], {'city': 'title'}), normalize_columns(raw.iloc[2:], {'city': 'title'})]
+
+    combined = concat_categorical(chunks)
+
+    # Normalizing chunk by chunk gives the same values and categories as normalizing the whole column.
+
+    pd.testing.assert_frame_equal(combined, normalize_columns(raw, {'city': 'title'}))
+
+    assert list(combined.city.cat.categories) == ['Boston', 'Salem', 'Lowell']
+
+# remove_invalid()
+
+def transactions(rows, committee='id_committee'):
+
+    return pd.DataFrame(rows, columns=['name_full', committee, 'amount'])
+
+def test_remove_invalid_one_refund():
+
+    df = transactions([('A', 'C1', 100.0), ('A', 'C1', 100.0), ('A', 'C1', -100.0), ('B', 'C1', 50.0)])
+
+    # The refund removes one of the two matching contributions, the first in file order.
+
+    assert list(remove_invalid(df).index) == [1, 3]
+
+def test_remove_invalid_duplicate_refunds():
+
+    df = transactions([('A', 'C1', 100.0), ('A', 'C1', -100.0), ('A', 'C1', 100.0), ('A', 'C1', -100.0), ('A', 'C1', 100.0)])
+
+    # Two refunds remove two contributions, not every one with the same amount.
+
+    assert list(remove_invalid(df).index) == [4]
+
+def test_remove_invalid_partial_refund():
+
+    df = transactions([('A', 'C1', 100.0), ('A', 'C1', -40.0)])
+
+    # A refund of part of a contribution has no matching amount, so only the refund itself is removed.
+
+    assert list(remove_invalid(df).index) == [0]
+
+def test_remove_invalid_other_committee():
+
+    df = transactions([('A', 'C1', 100.0), ('A', 'C2', -100.0), ('B', 'C2', 100.0)], committee='id_recipient')
+
+    # A refund from another committee, or to another donor, doesn't pair with the contribution.
+
+    assert list(remove_invalid(df, committee='id_recipient').index) == [0, 2]
+
+def test_remove_invalid_categorical_keys():
+
+    df = transactions([('A', 'C1', 100.0), ('A', 'C1', -100.0), ('B', 'C2', 10.0)]).astype({'name_full': 'category', 'id_committee': 'category'})
+
+    assert list(remove_invalid(df).index) == [2]
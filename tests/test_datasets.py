@@ -0,0 +1,102 @@
+# Tests for saving and reading the finalized dataframes in fec/datasets.py, the way process_data.py saves them and app.py reads them.
+
+import numpy as np
+import pandas as pd
+import pytest
+from fec.datasets import save_data, read_data, load_data, available_cycles, save_map_data, read_map_data
+
+
+def contributions():
+
+    return pd.DataFrame({'beneficiary': pd.Categorical(['Pac B', 'Pac A', None, 'Pac B']), 'recipient': pd.Categorical(['Actblue', 'Pac A', 'Pac C', 'Pac B']),
+                         'amount': [10.0, 20.0, 30.0, 40.0], 'conduit_copy': [True, False, False, False]})
+
+# save_data() and read_data()
+
+def test_save_data_sorts_rows(tmp_path):
+
+    save_data(contributions(), str(tmp_path), 2020, 'df_individuals')
+
+    df = read_data(str(tmp_path), 2020, 'df_individuals')
+
+    # Sorted by beneficiary and then recipient, with missing values last. Categorical columns stay categorical.
+
+    assert list(df.beneficiary.astype('object').fillna('')) == ['Pac A', 'Pac B', 'Pac B', '']
+
+    assert list(df.amount) == [20.0, 10.0, 40.0, 30.0]
+
+    assert isinstance(df.beneficiary.dtype, pd.CategoricalDtype)
+
+def test_read_data_columns_and_filters(tmp_path):
+
+    save_data(contributions(), str(tmp_path), 2020, 'df_individuals')
+
+    # The app reads only the PAC names for its dropdown, and only one PAC's rows for its map.
+
+    names = read_data(str(tmp_path), 2020, 'df_individuals', columns=['beneficiary'])
+
+    assert list(names.columns) == ['beneficiary']
+
+    df = read_data(str(tmp_path), 2020, 'df_individuals', columns=['beneficiary', 'amount'], filters=[('beneficiary', '==', 'Pac B')])
+
+    assert list(df.columns) == ['beneficiary', 'amount']
+
+    assert list(df.amount) == [10.0, 40.0]
+
+# load_data() and available_cycles()
+
+def test_load_data_cycles(tmp_path):
+
+    save_data(contributions(), str(tmp_path), 2018, 'df_individuals')
+
+    save_data(contributions().iloc[:1], str(tmp_path), 2020, 'df_individuals')
+
+    save_data(contributions(), str(tmp_path), 2020, 'df_cc')
+
+    assert available_cycles(str(tmp_path), 'df_individuals') == [2018, 2020]
+
+    assert available_cycles(str(tmp_path / 'missing'), 'df_individuals') == []
+
+    df = load_data(str(tmp_path), 'df_individuals', [2018, 2020], columns=['beneficiary', 'amount'], filters=[('beneficiary', '==', 'Pac B')])
+
+    assert list(df.cycle) == [2018, 2018, 2020]
+
+    assert list(df.amount) == [10.0, 40.0, 10.0]
+
+# save_map_data() and read_map_data()
+
+def test_map_data_without_shapes(tmp_path):
+
+    zip_bounds = pd.DataFrame({'zip': ['02134', '90210'], 'state': ['Massachusetts', 'California'], 'city': ['Boston', None],
+                               'bounds': [(-71.1, 42.3, -71.0, 42.4), (-118.4, 34.0, -118.3, 34.1)]})
+
+    save_map_data(zip_bounds, str(tmp_path), 'zip_bounds')
+
+    df = read_map_data(str(tmp_path), 'zip_bounds')
+
+    # The bounds come back as arrays that unpack like the tuples they were saved from.
+
+    x_min, y_min, x_max, y_max = df.bounds[0]
+
+    assert (x_min, y_min, x_max, y_max) == (-71.1, 42.3, -71.0, 42.4)
+
+    assert df.drop(columns='bounds').equals(zip_bounds.drop(columns='bounds'))
+
+def test_map_data_with_shapes(tmp_path):
+
+    gpd = pytest.importorskip('geopandas')
+
+    from shapely.geometry import Point
+
+    zip_points = pd.DataFrame({'zip': ['02134', '90210'], 'state': ['Massachusetts', 'California'], 'city': ['Boston', 'Beverly Hills'],
+                               'center': gpd.GeoSeries([Point(-71.1, 42.3), Point(-118.4, 34.1)], crs='EPSG:4269')})
+
+    save_map_data(zip_points, str(tmp_path), 'zip_points')
+
+    df = read_map_data(str(tmp_path), 'zip_points')
+
+    assert isinstance(df, gpd.GeoDataFrame)
+
+    assert df.crs == zip_points.center.crs
+
+    assert np.isclose(df.center[1].x, -118.4)
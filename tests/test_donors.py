@@ -0,0 +1,78 @@
+# Tests for matching contributions to donors in fec/donors.py.
+
+import pandas as pd
+from fec.donors import assign_donors, donor_blocks
+
+
+def contributions(names, zips=None, employers=None, occupations=None):
+
+    first, middle, last = zip(*names)
+
+    return pd.DataFrame({'first': first, 'middle': middle, 'last': last,
+                         'zip': zips or ['021341234'] * len(names),
+                         'employer': employers or [''] * len(names),
+                         'occupation': occupations or [''] * len(names)})
+
+# assign_donors()
+
+def test_assign_donors_nicknames():
+
+    df = contributions([('Bob', '', 'Smith'), ('Robert', '', 'Smith'), ('ROBERT', '', 'SMITH JR'), ('Bob', '', 'Smith')], zips=['02134', '021341234', '02134', '90210'])
+
+    donors = assign_donors(df).donor_id
+
+    # A nickname, a suffix, and the zip+4 don't matter, but a different zip code is a different block.
+
+    assert donors[0] == donors[1] == donors[2]
+
+    assert donors[3] != donors[0]
+
+def test_assign_donors_initials_need_evidence():
+
+    df = contributions([('John', 'A', 'Smith'), ('J', '', 'Smith'), ('John', 'A', 'Smith'), ('J', 'A', 'Smith')], zips=['02134', '02134', '90210', '90210'],
+                       employers=['Acme', 'Acme', 'Acme', 'Other'], occupations=['Engineer', 'Retired', 'Retired', 'Retired'])
+
+    donors = assign_donors(df).donor_id
+
+    # An initial joins a full first name only with a shared employer or occupation. Retired doesn't count.
+
+    assert donors[0] == donors[1]
+
+    assert donors[2] != donors[3]
+
+def test_assign_donors_ambiguous_initials_and_middles():
+
+    df = contributions([('John', '', 'Smith'), ('Jane', '', 'Smith'), ('J', '', 'Smith'), ('Mary', 'A', 'Jones'), ('Mary', 'B', 'Jones'), ('Mary', '', 'Jones')],
+                       employers=['Acme'] * 6)
+
+    donors = assign_donors(df).donor_id
+
+    # "J" could be John or Jane, so it joins neither. A bare "Mary Jones" could be either Mary A or Mary B, which never match each other.
+
+    assert len({donors[0], donors[1], donors[2]}) == 3
+
+    assert len({donors[3], donors[4], donors[5]}) == 3
+
+def test_assign_donors_ids_are_stable():
+
+    df = contributions([('Bob', '', 'Smith'), ('Robert', 'Q', 'Smith')])
+
+    # The ID comes from the longest first name and the middle initial, so it doesn't depend on the order or on the other blocks.
+
+    donors = assign_donors(df).donor_id
+
+    reordered = assign_donors(pd.concat([contributions([('Jane', '', 'Doe')]), df.iloc[::-1]], ignore_index=True)).donor_id
+
+    assert donors[0] == donors[1] == reordered[1] == reordered[2]
+
+# donor_blocks()
+
+def test_donor_blocks():
+
+    blocks = donor_blocks(contributions([('Bob', '', 'Smith'), ('Bob', '', 'Smith')], zips=['02134', None]))
+
+    assert blocks[0] == '02134|SMITH'
+
+    # Without a zip code, the block is the whole name.
+
+    assert blocks[1] == '|SMITH|ROBERT|'
@@ -0,0 +1,84 @@
+# Tests for tracing earmarked contributions in fec/earmarks.py.
+
+import pandas as pd
+from fec.earmarks import earmark_targets, trace_earmarks, earmark_totals
+
+
+# earmark_targets()
+
+def test_earmark_targets():
+
+    memos = pd.Series(['EARMARKED FOR FRIENDS OF BOB SMITH (C00000001)', 'Earmark to: Doe for Congress (h8ca05035).', 'EARMARKED FOR JANE DOE FOR SENATE',
+                       'EARMARKED THROUGH ACTBLUE', '* EARMARKED CONTRIBUTION: SEE BELOW', 'EARMARKED FOR', None])
+
+    targets = earmark_targets(memos)
+
+    assert list(targets.name[:3]) == ['FRIENDS OF BOB SMITH', 'Doe for Congress', 'JANE DOE FOR SENATE']
+
+    # IDs are upper case, and memos that name the conduit, or no target at all, have none.
+
+    assert list(targets['id'][:2]) == ['C00000001', 'H8CA05035']
+
+    assert targets['id'][2:].isna().all()
+
+    assert targets.name[3:].isna().all()
+
+# trace_earmarks() and earmark_totals()
+
+def committees():
+
+    df_committee = pd.DataFrame({'id_committee': ['C00000001', 'C00000002', 'C00000003'], 'committee': ['Friends of Bob Smith', 'ActBlue', 'Doe for Congress']})
+
+    df_candidate = pd.DataFrame({'id_candidate': ['H8CA05035'], 'id_committee': ['C00000003']})
+
+    return df_committee, df_candidate
+
+def contributions():
+
+    date = pd.Timestamp('2020-01-15')
+
+    return pd.DataFrame({'id_committee': ['C00000002', 'C00000001', 'C00000002', 'C00000002', 'C00000002'],
+                         'recipient': ['ActBlue', 'Friends of Bob Smith', 'ActBlue', 'ActBlue', 'ActBlue'],
+                         'memo_text': ['EARMARKED FOR FRIENDS OF BOB SMITH (C00000001)', 'EARMARKED THROUGH ACTBLUE', 'EARMARKED FOR FRIENDS OF BOB SMITH',
+                                       'EARMARKED FOR DOE FOR CONGRESS (H8CA05035)', None],
+                         'donor_id': [1, 1, 2, 1, 3], 'amount': [25.0, 25.0, 10.0, 25.0, 5.0], 'date': [date] * 5})
+
+def test_trace_earmarks():
+
+    df = trace_earmarks(*committees(), contributions())
+
+    # Targets are found by committee ID, by candidate ID (the principal campaign committee), or by name. Rows that aren't earmarked keep their own committee.
+
+    assert list(df.id_beneficiary) == ['C00000001', 'C00000001', 'C00000001', 'C00000003', 'C00000002']
+
+    assert list(df.beneficiary) == ['Friends of Bob Smith', 'Friends of Bob Smith', 'Friends of Bob Smith', 'Doe for Congress', 'ActBlue']
+
+    # Only the conduit's copy of the contribution the beneficiary also reported is a copy, not the beneficiary's own row.
+
+    assert list(df.conduit_copy) == [True, False, False, False, False]
+
+def test_trace_earmarks_with_reported_rows():
+
+    df = trace_earmarks(*committees(), contributions())
+
+    # Tracing the conduit's rows alone finds the same copies, given the rows already traced.
+
+    conduit = trace_earmarks(*committees(), contributions().drop(index=1), reported=df.loc[[1]])
+
+    assert list(conduit.conduit_copy) == list(df.conduit_copy.drop(index=1))
+
+def test_earmark_totals():
+
+    totals = earmark_totals(trace_earmarks(*committees(), contributions())).set_index('id_beneficiary')
+
+    # Only the conduit's earmarked rows are counted, one row for each beneficiary.
+
+    assert list(totals.index) == ['C00000001', 'C00000003']
+
+    assert list(totals.contributions) == [2, 1]
+
+    assert list(totals.amount) == [35.0, 25.0]
+
+    assert list(totals.copies) == [1, 0]
+
+    assert (totals.id_committee == 'C00000002').all()
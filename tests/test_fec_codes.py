@@ -0,0 +1,62 @@
+# Tests for the bundled FEC code tables in fec/fec_codes.py.
+
+import sys
+import json
+from fec import fec_codes
+from fec.fec_codes import SOURCES, load_codes, load_tables, codes_version, refresh
+from fec.pipeline import load_mappings
+
+
+# load_codes()
+
+def test_load_codes_offline(monkeypatch):
+
+    # The tables are read from the bundled file, so loading them never imports requests.
+
+    monkeypatch.setitem(sys.modules, 'requests', None)
+
+    load_tables.cache_clear()
+
+    for name in SOURCES:
+
+        codes = load_codes(name)
+
+        assert codes and all(isinstance(key, str) and isinstance(value, str) for key, value in codes.items())
+
+    assert load_codes('committee_types')['H'] == 'House'
+
+    assert load_codes('parties')['AIP'] == 'American Independent Party'
+
+    assert codes_version() == '2019-10-16'
+
+def test_load_mappings_uses_report_types_for_expenditures():
+
+    mappings = load_mappings()
+
+    assert mappings['expenditures'] == mappings['report'] == load_codes('report_types')
+
+    assert mappings['types'] == load_codes('committee_types')
+
+# refresh()
+
+def test_refresh_saves_and_reloads(tmp_path, monkeypatch):
+
+    path = str(tmp_path / 'fec_codes.json')
+
+    monkeypatch.setattr(fec_codes, 'map_pairs', lambda url, type: {'X': type})
+
+    # Read the file once before refreshing, so the cached contents have to be dropped.
+
+    with open(path, 'w') as f:
+
+        json.dump({'version': '2000-01-01', 'tables': {}}, f)
+
+    assert codes_version(path) == '2000-01-01'
+
+    tables = refresh(path)
+
+    assert tables == {name: {'X': type} for name, (url, type) in SOURCES.items()}
+
+    assert load_codes('transaction_types', path) == {'X': 'transaction'}
+
+    assert codes_version(path) != '2000-01-01'
@@ -0,0 +1,95 @@
+# Tests for the n-gram fuzzy matcher in fec/fuzzy_index.py.
+
+import pandas as pd
+from fuzzywuzzy import fuzz, process
+from fec import fuzzy_index
+from fec.fuzzy_index import build_index, extract_one, extract_bulk
+
+
+COMMITTEES = pd.Series(['Friends Of Bob Smith', 'Smith For Senate', 'Republican National Committee', 'Democratic National Committee',
+                        'Committee To Elect Jane Doe', 'National Rifle Association', 'Actblue', 'Winred'], index=[10, 11, 12, 13, 14, 15, 16, 17])
+
+QUERIES = ['Bob Smith Friends', 'SMITH 4 SENATE', 'Republican Natl Committee', 'democratic national comm', 'Elect Jane Doe Committee', 'act blue', 'Zzyzx']
+
+
+# extract_one() and extract_bulk()
+
+def test_extract_one_matches_extract_one_of_fuzzywuzzy():
+
+    index = build_index(COMMITTEES)
+
+    # The table is smaller than the number of candidates, so every name that shares a piece with the query is scored, as fuzzywuzzy scores every name.
+
+    for query in QUERIES[:-1]:
+
+        assert extract_one(query, index) == process.extractOne(query, COMMITTEES.to_dict(), scorer=fuzz.token_sort_ratio)
+
+    # A name that shares no pieces with the table has no match.
+
+    assert extract_one(QUERIES[-1], index) == (None, 0, None)
+
+def test_extract_one_with_fewer_candidates():
+
+    # Only the names with the most pieces in common are scored, and the best of those is still the best overall.
+
+    index = build_index(COMMITTEES)
+
+    assert extract_one('Democratic National Committee', index, candidates=2) == ('Democratic National Committee', 100, 13)
+
+def test_extract_bulk():
+
+    matches = extract_bulk(pd.Series(['act blue', None, 'act blue', 'Winred'], index=[3, 2, 1, 0]), build_index(COMMITTEES))
+
+    assert list(matches.index) == [3, 2, 1, 0]
+
+    assert list(matches.position.iloc[[0, 2, 3]]) == [16, 16, 17]
+
+    assert matches.score.iloc[1] == 0
+
+# extract_cached()
+
+def test_extract_cached_reuses_and_invalidates(tmp_path, monkeypatch):
+
+    searched = []
+
+    def extract_bulk_counted(queries, index, candidates):
+
+        searched.extend(queries)
+
+        return extract_bulk(queries, index, candidates)
+
+    monkeypatch.setattr(fuzzy_index, 'extract_bulk', extract_bulk_counted)
+
+    cache = str(tmp_path / 'cache')
+
+    first = fuzzy_index.extract_cached(pd.Series(QUERIES), COMMITTEES, cache, 'committee_matches')
+
+    assert len(searched) == len(QUERIES)
+
+    # Names already in the cache aren't searched again, including names that are only spelled differently (the cache is by sort_tokens()).
+
+    searched.clear()
+
+    second = fuzzy_index.extract_cached(pd.Series(QUERIES + ['FRIENDS OF BOB SMITH', 'friends bob of smith']), COMMITTEES, cache, 'committee_matches')
+
+    assert searched == ['bob friends of smith']
+
+    pd.testing.assert_frame_equal(second.iloc[:len(QUERIES)], first, check_dtype=False)
+
+    assert second.position.iloc[-1] == 10
+
+    # A changed table has a new version, so every name is searched again and the old matches are dropped.
+
+    changed = pd.concat([COMMITTEES, pd.Series(['Bob Smith Friends'], index=[18])])
+
+    assert fuzzy_index.table_version(changed) != fuzzy_index.table_version(COMMITTEES)
+
+    searched.clear()
+
+    third = fuzzy_index.extract_cached(pd.Series(QUERIES[:1]), changed, cache, 'committee_matches')
+
+    assert len(searched) == 1
+
+    assert third.position.iloc[0] == 18
+
+    assert len(pd.read_pickle(tmp_path / 'cache' / 'committee_matches')) == 1
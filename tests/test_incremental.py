@@ -0,0 +1,105 @@
+# Tests for matching new filings to the stored raw rows in incremental.py.
+
+import os
+import zipfile
+import pandas as pd
+from fec.read_fec import SCHEMAS, archive_path, read_fec
+from fec.schema import compact
+from fec.datasets import save_data, read_data
+from fec.pipeline import load_mappings
+from incremental import find_changes, clean_rows, seed, update
+
+
+def raw_rows(records):
+
+    return pd.DataFrame(records, columns=['id_committee', 'id_transaction', 'amendment', 'fec_record', 'amount'])
+
+# find_changes()
+
+def test_find_changes_replaces_amended_and_terminating_rows():
+
+    stored = raw_rows([['C1', 'T1', 'N', '1', 10], ['C1', 'T2', 'N', '2', 20], ['C2', 'T1', 'N', '3', 30]])
+
+    # The amendment ('A') and the termination report ('T') both replace the stored row with the same committee and transaction ID. The new row ('N') replaces nothing.
+
+    new = raw_rows([['C1', 'T1', 'A', '4', 15], ['C1', 'T2', 'T', '5', 25], ['C2', 'T9', 'N', '6', 60]])
+
+    rows, added, removed = find_changes(stored, new, 'id_committee')
+
+    assert sorted(removed.fec_record) == ['1', '2']
+
+    assert sorted(rows.fec_record) == ['3', '4', '5', '6']
+
+    assert len(added) == 3
+
+def test_find_changes_with_a_complete_file():
+
+    stored = raw_rows([['C1', 'T1', 'N', '1', 10], ['C1', 'T2', 'N', '2', 20]])
+
+    new = raw_rows([['C1', 'T1', 'N', '1', 10], ['C1', 'T3', 'N', '3', 30]])
+
+    rows, added, removed = find_changes(stored, new, 'id_committee', full=True)
+
+    assert list(added.fec_record) == ['3']
+
+    assert list(removed.fec_record) == ['2']
+
+    assert len(rows) == 2
+
+# seed() and update()
+
+def expenditure_line(committee, amendment, amount, transaction, record):
+
+    fields = {'id_committee': committee, 'amendment': amendment, 'type': 'Q1', 'image': '201901170000000001', 'name_full': 'ACME PRINTING', 'city': 'BOSTON',
+              'state': 'MA', 'zip': '021341234', 'date': '01/15/2020', 'amount': str(amount), 'purpose': 'PRINTING', 'entity': 'ORG',
+              'fec_record': record, 'id_transaction': transaction}
+
+    return '|'.join(fields.get(column, '') for column in SCHEMAS['expenditures']['columns']) + '\n'
+
+def test_update_uses_the_given_folders(tmp_path, monkeypatch):
+
+    input_path, output_path, raw_path, cache_path = [str(tmp_path / folder) for folder in ['fec', 'cleaned_data', 'raw_rows', 'cache']]
+
+    os.makedirs(input_path)
+
+    with zipfile.ZipFile(archive_path(input_path, 'expenditures', 2020), 'w') as archive:
+
+        archive.writestr('oppexp.txt', expenditure_line('C00000001', 'N', 100, 'T1', '1') + expenditure_line('C00000002', 'N', 200, 'T1', '2'))
+
+    # Build the finalized dataframes the way process_data.py would, from the same file.
+
+    df_committee = pd.DataFrame({'id_committee': ['C00000001', 'C00000002'], 'committee': ['Friends Of Bob', 'Acme Pac']})
+
+    df_candidate = pd.DataFrame({'id_candidate': pd.Series([], dtype='str'), 'id_committee': pd.Series([], dtype='str')})
+
+    rows = pd.concat(read_fec(archive_path(input_path, 'expenditures', 2020), 'expenditures'), ignore_index=True)
+
+    save_data(df_committee, output_path, 2020, 'df_committee')
+
+    save_data(df_candidate, output_path, 2020, 'df_candidate')
+
+    save_data(compact(clean_rows('expenditures', rows, load_mappings(), df_committee, df_candidate, cache_path, 1)), output_path, 2020, 'df_expenditures')
+
+    # Nothing may be written outside of the folders passed in.
+
+    monkeypatch.chdir(tmp_path)
+
+    assert seed('expenditures', 2020, input_path=input_path, raw_path=raw_path) == 2
+
+    new = str(tmp_path / 'new.txt')
+
+    with open(new, 'w') as f:
+
+        f.write(expenditure_line('C00000001', 'A', 150, 'T1', '3'))
+
+    summary = update('expenditures', new, 2020, workers=1, output_path=output_path, raw_path=raw_path, cache_path=cache_path)
+
+    assert summary == {'source': 'expenditures', 'cycle': 2020, 'added': 1, 'removed': 1, 'committees': 1}
+
+    df = read_data(output_path, 2020, 'df_expenditures')
+
+    assert sorted(df.amount) == [15000, 20000]
+
+    assert sorted(read_data(raw_path, 2020, 'expenditures').fec_record) == ['2', '3']
+
+    assert sorted(os.listdir(tmp_path)) == ['cleaned_data', 'fec', 'new.txt', 'raw_rows']
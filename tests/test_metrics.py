@@ -0,0 +1,36 @@
+# Tests for the stage measurements in fec/metrics.py.
+
+import pandas as pd
+from fec.read_fec import read_fec
+from fec.metrics import measure
+
+
+# measure()
+
+def test_measure_rows_in_from_dataframes():
+
+    result, stats = measure(lambda df, other: df.head(2), pd.DataFrame({'a': range(5)}), pd.Series(range(3)))
+
+    assert stats['rows_in'] == 8
+
+    assert stats['rows_out'] == 2
+
+def test_measure_rows_in_from_bulk_files(tmp_path):
+
+    path = tmp_path / 'cm.txt'
+
+    path.write_text(''.join('C0000000' + str(n) + '|COMMITTEE ' + str(n) + '|' * 13 + '\n' for n in range(5)))
+
+    # A stage that reads a bulk file takes in no dataframes, so its rows in are the raw rows it read, in every chunk.
+
+    def stage(path):
+
+        return pd.concat(read_fec(path, 'committees', chunksize=2)).head(1)
+
+    result, stats = measure(stage, str(path))
+
+    assert stats['rows_in'] == 5
+
+    assert stats['rows_out'] == 1
+
+    assert measure(lambda: None)[1]['rows_in'] is None
@@ -0,0 +1,14 @@
+# Tests for the lazy exports in fec/__init__.py.
+
+import fec
+
+
+def test_exports_are_functions_of_their_module():
+
+    for name, module in fec.EXPORTS.items():
+
+        assert callable(getattr(fec, name))
+
+        # A function named like its module would be hidden by the module once it is imported.
+
+        assert name != module
@@ -0,0 +1,38 @@
+# Tests for the worker pools in fec/parallel.py.
+
+import pandas as pd
+from fec.clean_data import split_zips
+from fec.parallel import POOL, worker_pool, parallel_apply, parallel_map
+
+
+def test_parallel_apply_keeps_order():
+
+    zips = pd.Series(['021381234', '10001', None, '9021'] * 50, index=range(100, 300))
+
+    assert parallel_apply(split_zips, zips, workers=2, min_rows=0).equals(split_zips(zips))
+
+def test_worker_pool_is_shared():
+
+    zips = pd.Series(['021381234', '10001'] * 50)
+
+    with worker_pool(2):
+
+        # Nothing is started until a call needs workers.
+
+        parallel_apply(split_zips, zips)
+
+        assert 'pool' not in POOL
+
+        first = parallel_apply(split_zips, zips, min_rows=0)
+
+        pool = POOL['pool']
+
+        second = pd.concat(parallel_map(split_zips, [zips[:10], zips[10:]]))
+
+        assert POOL['pool'] is pool
+
+    # The pool is shut down with the with statement.
+
+    assert POOL == {}
+
+    assert first.equals(split_zips(zips)) and second.equals(first)
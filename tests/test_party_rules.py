@@ -0,0 +1,57 @@
+# Tests for the party name rules in fec/party_rules.py.
+
+import pandas as pd
+import pytest
+from fec.party_rules import compile_rules, match_rules, label_parties
+
+
+# match_rules()
+
+def test_match_rules_order():
+
+    rules = [{'name': 'b', 'pattern': r'\bBlue\b'}, {'name': 'r', 'pattern': r'\bRed\b'}]
+
+    # The earlier rule fires even when the later one matches earlier in the name.
+
+    fired = match_rules(['Red and Blue PAC', 'Red PAC', 'Green PAC', None], compile_rules(rules))
+
+    assert list(fired) == [0, 1, -1, -1]
+
+def test_match_rules_without_rules():
+
+    assert list(match_rules(['Red PAC', None], compile_rules([]))) == [-1, -1]
+
+# compile_rules()
+
+def test_compile_rules_rejects_named_groups():
+
+    # Unnamed groups are fine, but a named group could be taken for a rule.
+
+    fired = match_rules(['Red PAC', 'Blue PAC'], compile_rules([{'name': 'r', 'pattern': r'\b(Red|Crimson)\b'}, {'name': 'b', 'pattern': r'\bBlue\b'}]))
+
+    assert list(fired) == [0, 1]
+
+    with pytest.raises(ValueError, match="'r'"):
+
+        compile_rules([{'name': 'r', 'pattern': r'\b(?P<color>Red)\b'}])
+
+# label_parties()
+
+def test_label_parties():
+
+    df = pd.DataFrame({'recipient': ['Minnesota Democratic-Farmer-Labor Party', 'Democrats for a Republican Majority', 'Friends of Bob', 'ActBlue', 'ActBlue', 'NRCC', None],
+                       'party': ['Unknown', None, 'Unknown', 'Green Party', 'Other', 'Other', 'Unknown']})
+
+    df = label_parties(df)
+
+    # The more specific Democratic-Farmer-Labor rule comes before the Democratic one, and Republican comes before both. A missing party counts as Unknown.
+
+    assert list(df.party[:3]) == ['Democratic-Farmer-Labor', 'Republican Party', 'Unknown']
+
+    # A rule only replaces the parties it lists.
+
+    assert list(df.party[3:6]) == ['Green Party', 'Other', 'Republican Party']
+
+    assert df.party[6] == 'Unknown'
+
+    assert list(df.party_rule.astype('object').fillna('')) == ['democratic_farmer_labor', 'republican', '', '', '', 'republican_committees', '']
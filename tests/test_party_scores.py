@@ -0,0 +1,66 @@
+# Tests for the party scores in fec/party_scores.py.
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from fec.party_scores import propagate, party_scores
+
+
+# propagate()
+
+def test_propagate_converges_through_loops():
+
+    # Committees 0 and 1 are unknown and send money to each other in a loop. Committee 0 also sends half of its money to committee 2 (Democratic), and committee 3 sends all of its money to committee 4 (Republican).
+
+    transfers = sparse.csr_matrix(np.array([[0, 50, 50, 0, 0], [100, 0, 0, 0, 0], [0, 0, 0, 0, 0], [0, 0, 0, 0, 10], [0, 0, 0, 0, 0]], dtype='float64'))
+
+    known = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0], [0, 0, 0], [0, 1, 0]], dtype='float64')
+
+    scores, iterations = propagate(transfers, known)
+
+    # Every dollar in the loop ends up with the Democratic committee, so both scores approach 1 from below.
+
+    assert iterations < 200
+
+    assert np.allclose(scores[:2], [[1, 0, 0], [1, 0, 0]], atol=1e-5)
+
+    assert (scores[:2, 0] <= 1).all()
+
+    assert np.array_equal(scores[2:], [[1, 0, 0], [0, 1, 0], [0, 1, 0]])
+
+    # Stopping early leaves the loop's scores short of 1.
+
+    early, iterations = propagate(transfers, known, max_iterations=3)
+
+    assert iterations == 3
+
+    assert early[0, 0] < scores[0, 0]
+
+# party_scores()
+
+def test_party_scores():
+
+    df_committee = pd.DataFrame({'id_committee': ['C00000001', 'C00000002', 'C00000003', 'C00000004'], 'committee': ['Dem Candidate', 'Rep Candidate', 'Mixed PAC', 'Quiet PAC'],
+                                 'id_candidate': ['H00000001', 'H00000002', None, None], 'party': ['Democratic Party', 'Republican Party', 'Unknown', None]})
+
+    df_candidate = pd.DataFrame({'id_candidate': ['H00000001', 'H00000002'], 'id_committee': ['C00000001', 'C00000002'],
+                                 'party_candidate': ['Democratic Party', 'Republican Party']})
+
+    df_cc = pd.DataFrame({'id_sender': ['C00000003', 'C00000003', 'C00000003', 'C00000009'], 'id_recipient': ['C00000001', 'C00000002', 'C00000003', 'C00000003'],
+                          'amount': [300.0, 100.0, 50.0, 10.0], 'party': [None] * 4, 'party_rule': [None] * 4})
+
+    df_scores = party_scores(df_committee, df_candidate, df_cc).set_index('id_committee')
+
+    # The PAC's money to itself is left out. A sender that isn't in the committee list still gets scores.
+
+    assert df_scores.loc['C00000003', ['democratic', 'republican', 'third_party', 'unknown']].tolist() == [0.75, 0.25, 0, 0]
+
+    assert df_scores.loc['C00000003', 'dollars'] == 400
+
+    assert df_scores.loc['C00000009', ['democratic', 'republican']].tolist() == [0.75, 0.25]
+
+    # Known committees keep their party, and an unknown committee that sent nothing has no scores.
+
+    assert df_scores.loc['C00000002', 'republican'] == 1
+
+    assert df_scores.loc['C00000004', ['democratic', 'republican', 'third_party', 'unknown']].isna().all()
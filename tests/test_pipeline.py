@@ -0,0 +1,30 @@
+# Tests for the cleaning stages in fec/pipeline.py.
+
+import pandas as pd
+from fec.read_fec import SCHEMAS
+from fec.pipeline import load_mappings, clean_expenditure_rows
+
+
+def raw_chunk(source, rows, index=None):
+
+    columns = list(SCHEMAS[source]['dtypes'])
+
+    return pd.DataFrame([[row.get(column) for column in columns] for row in rows], columns=columns, index=index)
+
+# clean_expenditure_rows()
+
+def test_clean_expenditure_rows_zip_codes():
+
+    chunks = [raw_chunk('expenditures', [{'id_committee': 'C00000001', 'name_full': 'ACME PRINTING', 'zip': '021341234', 'amount': 10.0, 'date': '01/15/2020', 'fec_record': '1'},
+                                         {'id_committee': 'C00000002', 'name_full': 'ACME PRINTING', 'zip': '90210', 'amount': 20.0, 'date': '02/01/2020', 'fec_record': '2'}], index=[5, 9]),
+              raw_chunk('expenditures', [{'id_committee': 'C00000003', 'name_full': 'BOB ROE', 'zip': None, 'amount': 30.0, 'date': '03/01/2020', 'fec_record': '3'}])]
+
+    df = clean_expenditure_rows(chunks, load_mappings(), 1)
+
+    # Each expenditure gets the zip code it was reported with. They used to get the zip codes of the committees in the same row positions.
+
+    assert list(df.fec_record) == ['1', '2', '3']
+
+    assert list(df.zip.fillna('')) == ['02134', '90210', '']
+
+    assert list(df.zip2.fillna('')) == ['1234', '', '']
@@ -0,0 +1,105 @@
+# Tests for reading the FEC bulk files in fec/read_fec.py, with the small bulk file of individual contributions in tests/data/ and the same file in a zip archive like the FEC's.
+
+import os
+import zipfile
+import pandas as pd
+import pytest
+from fec.read_fec import SCHEMAS, archive_path, open_fec, read_fec
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+# read_fec()
+
+def test_read_fec_schema():
+
+    df = pd.concat(read_fec(os.path.join(DATA_PATH, 'itcont.txt'), 'individuals'), ignore_index=True)
+
+    # Only the schema's columns are read, in its order and with its types. Codes, IDs, and zip codes keep their leading zeros.
+
+    assert list(df.columns) == list(SCHEMAS['individuals']['dtypes'])
+
+    assert df.amount.dtype == 'float64'
+
+    assert all(pd.api.types.is_string_dtype(df[column]) for column, dtype in SCHEMAS['individuals']['dtypes'].items() if dtype == 'str')
+
+    assert list(df.zip[:2]) == ['021341234', '02458']
+
+    assert list(df.amount) == [100.0, 250.5, -25.0, 0.0, 5.0]
+
+    assert df.memo_text[2] == 'EARMARKED FOR FRIENDS OF BOB SMITH (C00000001)'
+
+    assert df.city[3:4].isna().all()
+
+@pytest.mark.parametrize('chunksize', [1, 2, 5, 100])
+def test_read_fec_chunks(chunksize):
+
+    path = os.path.join(DATA_PATH, 'itcont.txt')
+
+    chunks = list(read_fec(path, 'individuals', chunksize=chunksize))
+
+    # Every chunk but the last is full, and the chunks together are the whole file.
+
+    assert [len(chunk) for chunk in chunks[:-1]] == [chunksize] * (len(chunks) - 1)
+
+    assert 0 < len(chunks[-1]) <= chunksize
+
+    whole = next(read_fec(path, 'individuals', chunksize=100))
+
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), whole)
+
+@pytest.mark.parametrize('source', list(SCHEMAS))
+def test_read_fec_every_schema(source, tmp_path):
+
+    schema = SCHEMAS[source]
+
+    # One row with a leading zero in every field, and a number in the amounts.
+
+    path = tmp_path / schema['file']
+
+    path.write_text('|'.join('10' if column == 'amount' else '0' + str(n) for n, column in enumerate(schema['columns'])) + '\n')
+
+    df = next(read_fec(str(path), source))
+
+    assert list(df.columns) == list(schema['dtypes'])
+
+    for column, dtype in schema['dtypes'].items():
+
+        if dtype == 'str':
+
+            assert df[column][0] == '0' + str(schema['columns'].index(column))
+
+        else:
+
+            assert df[column].dtype == dtype
+
+# open_fec()
+
+def test_read_fec_from_zip_archive():
+
+    path = archive_path(DATA_PATH, 'individuals', 2020)
+
+    # The archive also holds split copies of the data in a subfolder, one of them under the same file name. Only the top-level file is read.
+
+    with zipfile.ZipFile(path) as archive:
+
+        assert sorted(archive.namelist()) == ['by_date/itcont.txt', 'by_date/itcont_2020_1.txt', 'itcont.txt']
+
+    for chunksize in [2, 100]:
+
+        pd.testing.assert_frame_equal(pd.concat(read_fec(path, 'individuals', chunksize=chunksize), ignore_index=True),
+                                      pd.concat(read_fec(os.path.join(DATA_PATH, 'itcont.txt'), 'individuals'), ignore_index=True))
+
+def test_open_fec_closes_the_file():
+
+    with open_fec(archive_path(DATA_PATH, 'individuals', 2020), 'individuals') as f:
+
+        assert f.readline().startswith(b'C00000001|')
+
+    assert f.closed
+
+def test_open_fec_missing_file():
+
+    with pytest.raises(FileNotFoundError, match='itoth.txt'):
+
+        next(read_fec(archive_path(DATA_PATH, 'individuals', 2020), 'cc'))
@@ -0,0 +1,39 @@
+# Tests for the FEC ID lookups in fec/resolve.py.
+
+import pandas as pd
+from fec.resolve import encode_ids, resolve_party
+
+
+# encode_ids()
+
+def test_encode_ids():
+
+    keys = encode_ids(pd.Series(['C00000059', 'c00000059', 'C0000005', None, 'H8CA05035']))
+
+    assert keys[0] == keys[1] >= 0
+
+    assert list(keys[2:4]) == [-1, -1]
+
+    assert keys[4] >= 0 and keys[4] != keys[0]
+
+# resolve_party()
+
+def test_resolve_party_order():
+
+    df_committee = pd.DataFrame({'id_committee': ['C00000001', 'C00000002', 'C00000003', 'C00000004'],
+                                 'id_candidate': ['H00000001', 'H00000002', None, 'H00000004'],
+                                 'party': ['Green Party', 'Green Party', 'Libertarian Party', 'Republican Party']})
+
+    df_candidate = pd.DataFrame({'id_candidate': ['H00000001', 'H00000002', 'H00000004'],
+                                 'id_committee': ['C00000001', None, 'C00000004'],
+                                 'party_candidate': ['Democratic Party', 'Republican Party', 'Unknown']})
+
+    df_cc = pd.DataFrame({'id_recipient': ['C00000001', 'C00000002', 'C00000003', 'C00000004', 'C00000009']})
+
+    party = resolve_party(df_cc, df_committee, df_candidate)
+
+    # Principal campaign committee, then the registered candidate, then the committee itself. An "Unknown" candidate party doesn't hide the committee's party.
+
+    assert list(party[:4]) == ['Democratic Party', 'Republican Party', 'Libertarian Party', 'Republican Party']
+
+    assert pd.isna(party[4])
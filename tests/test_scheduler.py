@@ -0,0 +1,101 @@
+# Tests for the stage graph in fec/scheduler.py.
+
+import os
+from functools import partial
+import pytest
+from fec import parallel
+from fec.parallel import split_workers
+from fec.scheduler import check_stages, run_stages
+
+
+# Stage functions are defined at the top of the module so they can be sent to worker processes.
+
+def one():
+
+    return 1
+
+def add(a, b):
+
+    return a + b
+
+def double(a):
+
+    return 2 * a
+
+def fail(a):
+
+    raise ValueError('stage failed')
+
+STAGES = {'d': (add, ['b', 'c']), 'b': (double, ['a']), 'c': (partial(add, 10), ['a']), 'a': (one, [])}
+
+# check_stages()
+
+def test_check_stages_order():
+
+    order = check_stages(STAGES)
+
+    assert order.index('a') < order.index('b') < order.index('d')
+
+    assert order.index('c') < order.index('d')
+
+def test_check_stages_errors():
+
+    with pytest.raises(ValueError, match='missing'):
+
+        check_stages({'a': (one, ['x'])})
+
+    with pytest.raises(ValueError, match='cycle'):
+
+        check_stages({'a': (double, ['b']), 'b': (double, ['a'])})
+
+# run_stages()
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run_stages_results(processes):
+
+    assert run_stages(STAGES, processes, workers=1) == {'a': 1, 'b': 2, 'c': 11, 'd': 13}
+
+    assert run_stages(STAGES, processes, workers=1, outputs=['d']) == {'d': 13}
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_run_stages_failure(processes, tmp_path):
+
+    stages = dict(STAGES, e=(fail, ['b']), f=(double, ['e']))
+
+    with pytest.raises(ValueError, match='stage failed'):
+
+        run_stages(stages, processes, workers=1, checkpoints=str(tmp_path))
+
+    # The stages that finished before the failure kept their checkpoints, and the stages after it never ran.
+
+    saved = {name.split('.')[0] for name in os.listdir(tmp_path) if name.endswith('.pkl')}
+
+    assert {'a', 'b'} <= saved and not {'e', 'f'} & saved
+
+def test_run_stages_checkpoints(tmp_path):
+
+    stats = {}
+
+    run_stages(STAGES, 1, workers=1, checkpoints=str(tmp_path))
+
+    assert run_stages(STAGES, 1, workers=1, checkpoints=str(tmp_path), stats=stats) == {'a': 1, 'b': 2, 'c': 11, 'd': 13}
+
+    assert all(stage == {'checkpoint': True} for stage in stats.values())
+
+# split_workers()
+
+def test_split_workers(monkeypatch):
+
+    monkeypatch.setattr(parallel, 'WORKERS', 32)
+
+    assert split_workers() == (4, 8)
+
+    assert split_workers(1) == (1, 32)
+
+    assert split_workers(workers=16) == (2, 16)
+
+    assert split_workers(3, 5) == (3, 5)
+
+    monkeypatch.setattr(parallel, 'WORKERS', 2)
+
+    assert split_workers() == (2, 1)
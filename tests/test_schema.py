@@ -0,0 +1,81 @@
+# Tests for the compact schema of the cleaned dataframes in fec/schema.py.
+
+import pandas as pd
+from fec.schema import TEXT, compact, concat, to_cents, to_unsigned
+
+
+# to_unsigned()
+
+def test_to_unsigned():
+
+    values = to_unsigned(pd.Series(['02134', ' 90210 ', '123.0', '12-34', None, '']), 'UInt32')
+
+    # Leading zeros and whitespace are dropped, and anything that isn't a whole number becomes <NA>.
+
+    assert values.dtype == 'UInt32'
+
+    assert list(values[:3]) == [2134, 90210, 123]
+
+    assert values[3:].isna().all()
+
+def test_to_unsigned_keeps_every_digit():
+
+    assert to_unsigned(pd.Series(['201912319180000001']), 'UInt64')[0] == 201912319180000001
+
+# to_cents()
+
+def test_to_cents():
+
+    cents = to_cents(pd.Series([0.1, 0.29, -25.0, 1234567.895, None]))
+
+    # Rounded rather than truncated, so 0.29 dollars are 29 cents and not 28.
+
+    assert cents.dtype == 'Int64'
+
+    assert list(cents[:3]) == [10, 29, -2500]
+
+    assert pd.isna(cents[4])
+
+# compact()
+
+def test_compact():
+
+    df = compact(pd.DataFrame({'state': ['MA', 'MA', 'CA'], 'zip': ['02134', None, '9021'], 'amount': [10.5, 20.0, 0.01],
+                               'date': ['2020-01-15', 'not a date', None], 'name': ['Jane Doe', 'John Smith', None], 'count': [1, 2, 3],
+                               'zip_candidate': ['021', '902', None]}), text=['zip_candidate'])
+
+    assert isinstance(df.state.dtype, pd.CategoricalDtype)
+
+    assert list(df.zip.fillna(0)) == [2134, 0, 9021]
+
+    assert list(df.amount) == [1050, 2000, 1]
+
+    assert df.date[0] == pd.Timestamp('2020-01-15') and df.date[1:].isna().all()
+
+    # Free text becomes TEXT, numbers are left alone, and columns listed as text stay text even when they look like zip codes.
+
+    assert df.name.dtype == TEXT and df.zip_candidate.dtype == TEXT
+
+    assert df['count'].dtype == 'int64'
+
+    assert list(df.zip_candidate[:2]) == ['021', '902']
+
+# concat()
+
+def test_concat_unions_categories():
+
+    stored = compact(pd.DataFrame({'state': ['MA', 'CA'], 'amount': [1.0, 2.0]}))
+
+    new = compact(pd.DataFrame({'state': ['NY', None], 'amount': [3.0, 4.0]}, index=[7, 8]))
+
+    df = concat([stored, new])
+
+    # Categorical columns stay categorical with the categories of every frame, in order, and the index is new.
+
+    assert list(df.state.cat.categories) == ['MA', 'CA', 'NY']
+
+    assert list(df.state.astype('object').fillna('')) == ['MA', 'CA', 'NY', '']
+
+    assert list(df.index) == [0, 1, 2, 3]
+
+    assert list(df.amount) == [100, 200, 300, 400]